@@ -16,7 +16,8 @@ if project_root not in sys.path:
 # FastAPIのインポート
 from fastapi import FastAPI, HTTPException, Request, Depends, Body
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 
 # サービスのインポート
@@ -24,6 +25,10 @@ from backend.services.crawler import CrawlerService, SearchResult
 from backend.services import get_ai_service
 from backend.services.graph import GraphService
 from backend.services.cot_deepresearch import CoTDeepResearchService
+from backend.services.http_client import close_async_client, run_blocking, shutdown_executor
+from backend.services.llm_cache import bypass_llm_cache, get_llm_cache, llm_cache_bypassed
+from backend.services.semantic_cache import get_semantic_cache
+from backend.services.sse import SSE_HEADERS, format_sse
 
 # 環境変数の読み込み
 load_dotenv()
@@ -52,11 +57,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def llm_cache_control(request: Request, call_next):
+    """Cache-Control: no-cache を指定したリクエストではLLM応答キャッシュを読まずにAPIを呼び出します。"""
+    no_cache = "no-cache" in request.headers.get("cache-control", "").lower()
+    with bypass_llm_cache(no_cache):
+        return await call_next(request)
+
 # リクエスト/レスポンスモデルの定義
 class ResearchRequest(BaseModel):
     query: str
     max_pages: Optional[int] = 5
     language: Optional[str] = "ja"
+    # 同じjob_idで再実行すると中断したクロールの取得済みページを再利用する
+    job_id: Optional[str] = None
 
 class ResearchResponse(BaseModel):
     results: List[dict]
@@ -89,6 +103,39 @@ from backend.routes.research import router as research_router
 # ルーターの登録
 app.include_router(research_router, prefix="/research", tags=["research"])
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """共有HTTPクライアント、WebDriverプール、Executorを解放します。"""
+    await close_async_client()
+    crawler_service.close()
+    shutdown_executor()
+
+async def _semantic_lookup(query: str, scope: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """意味的に近いクエリの保存済みレスポンスを返します（Cache-Control: no-cache の場合は読みません）。"""
+    semantic_cache = get_semantic_cache()
+    if semantic_cache is None or llm_cache_bypassed():
+        return None
+    # 埋め込みとSQLiteの読み書きでイベントループを塞がないよう、共有Executorで実行します
+    hit = await run_blocking(semantic_cache.lookup, query, scope)
+    if hit is None:
+        return None
+    response = hit["value"]
+    response["metadata"] = {
+        **(response.get("metadata") or {}),
+        "semantic_cache": {
+            "approximate": hit["approximate"],
+            "similarity": hit["similarity"],
+            "matched_query": hit["matched_query"],
+        },
+    }
+    return response
+
+async def _semantic_store(query: str, scope: Dict[str, Any], response: Dict[str, Any]) -> None:
+    """レスポンスを意味的キャッシュに保存します。"""
+    semantic_cache = get_semantic_cache()
+    if semantic_cache is not None:
+        await run_blocking(semantic_cache.store, query, scope, jsonable_encoder(response))
+
 # エンドポイントの定義
 @app.post("/api/research", response_model=ResearchResponse)
 async def research(request: ResearchRequest):
@@ -97,7 +144,7 @@ async def research(request: ResearchRequest):
     """
     try:
         logger.info(f"Research request received: {request.query}")
-        results = await crawler_service.deep_crawl(request.query, request.max_pages)
+        results = await crawler_service.deep_crawl(request.query, request.max_pages, job_id=request.job_id)
         analysis = await gemini_service.analyze(results)
         
         metadata = {
@@ -159,6 +206,10 @@ async def search(request: SearchRequest):
     """
     try:
         logger.info(f"Search request received: {request.query}")
+        scope = {"endpoint": "research/search", "max_pages": request.max_pages}
+        cached = await _semantic_lookup(request.query, scope)
+        if cached is not None:
+            return cached
         results = await crawler_service.deep_crawl(request.query, request.max_pages)
         
         # 結果の要約
@@ -228,7 +279,7 @@ async def search(request: SearchRequest):
             except Exception as e:
                 logger.error(f"Error generating additional findings: {str(e)}")
         
-        return {
+        response = {
             "query": request.query,
             "timestamp": timestamp,
             "results": results,
@@ -240,6 +291,9 @@ async def search(request: SearchRequest):
                 "execution_time": int((datetime.now() - datetime.fromisoformat(timestamp)).total_seconds() * 1000)
             }
         }
+        if results:
+            await _semantic_store(request.query, scope, response)
+        return response
     except Exception as e:
         logger.error(f"Error in search endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -251,6 +305,10 @@ async def cot_deep_research(request: ResearchRequest):
     """
     try:
         logger.info(f"CoT Deep Research request received: {request.query}")
+        scope = {"endpoint": "cot_deepresearch", "max_pages": request.max_pages, "language": request.language}
+        cached = await _semantic_lookup(request.query, scope)
+        if cached is not None:
+            return cached
         
         # CoTDeepResearchServiceを使用
         result = await cot_service.execute_research(
@@ -261,12 +319,56 @@ async def cot_deep_research(request: ResearchRequest):
         
         # 結果のフォーマット
         formatted_result = cot_service.format_results(result)
+        if "error" not in formatted_result:
+            await _semantic_store(request.query, scope, formatted_result)
         
         return formatted_result
     except Exception as e:
         logger.error(f"Error in cot_deep_research endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _cot_research_events(request: ResearchRequest):
+    """CoT Deep Researchの各段階をSSEのイベントとして返します。"""
+    scope = {"endpoint": "cot_deepresearch", "max_pages": request.max_pages, "language": request.language}
+    event_id = 0
+    try:
+        cached = await _semantic_lookup(request.query, scope)
+        if cached is not None:
+            yield format_sse("result", cached, event_id)
+            return
+        
+        async for event, data in cot_service.stream_research(
+            query=request.query,
+            max_pages=request.max_pages,
+            language=request.language
+        ):
+            data = jsonable_encoder(data)
+            if event == "result" and "error" not in data:
+                await _semantic_store(request.query, scope, data)
+            yield format_sse(event, data, event_id)
+            event_id += 1
+    except Exception as e:
+        logger.error(f"Error in cot_deep_research stream: {str(e)}")
+        yield format_sse("error", {"error": str(e)}, event_id)
+
+@app.post("/api/cot_deepresearch/stream")
+async def cot_deep_research_stream(request: ResearchRequest):
+    """
+    Chain-of-Thought Deep Researchを実行し、検索結果・生成中の分析テキスト・最終的な分析結果を
+    Server-Sent Events（results / token / analysis / result / error）として順に返します。
+    """
+    logger.info(f"CoT Deep Research stream request received: {request.query}")
+    return StreamingResponse(_cot_research_events(request), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.get("/api/cot_deepresearch/stream")
+async def cot_deep_research_stream_get(query: str, max_pages: int = 5, language: str = "ja"):
+    """
+    ブラウザのEventSourceから利用するためのGET版です。
+    """
+    request = ResearchRequest(query=query, max_pages=max_pages, language=language)
+    logger.info(f"CoT Deep Research stream request received: {request.query}")
+    return StreamingResponse(_cot_research_events(request), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @app.get("/health")
 async def health():
     """
@@ -323,6 +425,18 @@ async def api_search(request: SearchRequest):
         logger.error(f"Error in api_search endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """
+    意味的キャッシュ（閾値・ヒット率・類似度の分布）とLLM応答キャッシュの統計情報を返します。
+    """
+    semantic_cache = get_semantic_cache()
+    llm_cache = get_llm_cache()
+    return {
+        "semantic": semantic_cache.stats() if semantic_cache is not None else None,
+        "llm": llm_cache.stats() if llm_cache is not None else None,
+    }
+
 @app.get("/api/health")
 async def health_check():
     """
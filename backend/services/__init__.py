@@ -1,15 +1,38 @@
-from .orchestrator import OrchestratorService
-from .gemini import GeminiService
-from .openai_service import OpenAIService
 import os
-from .graph import GraphService
-from .crawler import CrawlerService
-from .cot_deepresearch import CoTDeepResearchService
+from importlib import import_module
+
+# サービスクラスは初回アクセス時にインポートする。
+# src/crawler.py 等が backend.services.url_utils のような依存の少ないモジュールだけを使う場合に、
+# google.generativeai・selenium・langchain を必要としないようにするため
+_LAZY_SERVICES = {
+    'OrchestratorService': '.orchestrator',
+    'GeminiService': '.gemini',
+    'OpenAIService': '.openai_service',
+    'GraphService': '.graph',
+    'CrawlerService': '.crawler',
+    'CoTDeepResearchService': '.cot_deepresearch',
+}
+
+
+def __getattr__(name):
+    module = _LAZY_SERVICES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
 
 def get_ai_service():
     provider = os.getenv("AI_PROVIDER", "gemini").lower()
     if provider == "openai":
+        from .openai_service import OpenAIService
         return OpenAIService()
+    if provider == "fake":
+        # APIを呼び出さない定型の応答（ローカルでのテスト用）
+        from .fake_llm import FakeAIService
+        return FakeAIService()
+    from .gemini import GeminiService
     return GeminiService()
 
 __all__ = [
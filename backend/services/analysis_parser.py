@@ -0,0 +1,71 @@
+from typing import Any, Dict
+
+_NUMBERED = ("1.", "2.", "3.", "4.", "5.")
+
+
+def parse_analysis(text: str) -> Dict[str, Any]:
+    """分析プロンプトの応答（要約・主要な洞察・パターンと関連性・信頼性評価・追加調査）を項目ごとに分解する"""
+    summary = ""
+    insights = []
+    patterns = []
+    reliability = ""
+    further_research = []
+    
+    current_section = None
+    
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+            
+        if "要約:" in line or "1." in line and "要約" in line:
+            current_section = "summary"
+            summary = line.split(":", 1)[1].strip() if ":" in line else ""
+        elif "主要な洞察:" in line or "2." in line and "洞察" in line:
+            current_section = "insights"
+        elif "パターンと関連性:" in line or "3." in line and "パターン" in line:
+            current_section = "patterns"
+        elif "信頼性評価:" in line or "4." in line and "信頼性" in line:
+            current_section = "reliability"
+        elif "追加調査:" in line or "5." in line and "調査" in line:
+            current_section = "further_research"
+        elif current_section == "summary" and not summary:
+            summary = line
+        elif current_section == "insights":
+            if line.startswith("-") or line.startswith("*"):
+                insights.append(line[1:].strip())
+            elif line and not any(line.startswith(x) for x in _NUMBERED):
+                insights.append(line)
+        elif current_section == "patterns":
+            if line.startswith("-") or line.startswith("*"):
+                patterns.append(line[1:].strip())
+            elif line and not any(line.startswith(x) for x in _NUMBERED):
+                patterns.append(line)
+        elif current_section == "reliability":
+            if not reliability:
+                reliability = line
+        elif current_section == "further_research":
+            if line.startswith("-") or line.startswith("*"):
+                further_research.append(line[1:].strip())
+            elif line and not any(line.startswith(x) for x in _NUMBERED):
+                further_research.append(line)
+    
+    return {
+        "summary": summary,
+        "insights": insights,
+        "patterns": patterns,
+        "reliability": reliability,
+        "further_research": further_research,
+    }
+
+
+def analysis_error(error: Exception) -> Dict[str, Any]:
+    """分析に失敗した場合の結果"""
+    return {
+        "error": f"分析中にエラーが発生しました: {str(error)}",
+        "summary": "分析できませんでした",
+        "insights": [],
+        "patterns": [],
+        "reliability": "評価できません",
+        "further_research": []
+    }
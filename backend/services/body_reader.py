@@ -0,0 +1,85 @@
+import re
+import codecs
+import logging
+from typing import Optional, Sequence, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# 本文を抽出できるContent-Type
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# 文字コードの判定に使う本文先頭のバイト数（HTML仕様のプレスキャンと同じ1024バイト）
+SNIFF_BYTES = 1024
+
+_HEADER_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+_META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)", re.IGNORECASE)
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+class UnsupportedContentTypeError(ValueError):
+    """本文を取得しないContent-Typeのレスポンス"""
+
+
+def check_content_type(content_type: str, accept: Optional[Sequence[str]]) -> None:
+    """Content-Typeが許可されていない場合はUnsupportedContentTypeErrorを送出する（Noneの場合は全て許可）"""
+    if accept is None:
+        return
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type not in accept:
+        raise UnsupportedContentTypeError(f"Unsupported content type: {content_type}")
+
+
+def _known_codec(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def sniff_charset(content_type: str, head: bytes, default: str = "utf-8") -> str:
+    """本文先頭のバイト列から文字コードを判定する
+
+    BOM、Content-Typeのcharset、先頭SNIFF_BYTESバイト内の<meta charset>の順に調べ、
+    本文全体の統計的な推定は行わない。
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    match = _HEADER_CHARSET.search(content_type or "")
+    encoding = _known_codec(match.group(1)) if match else None
+    if encoding is None:
+        match = _META_CHARSET.search(head[:SNIFF_BYTES])
+        encoding = _known_codec(match.group(1).decode("ascii", "ignore")) if match else None
+    return encoding or default
+
+
+def decode_body(body: bytes, content_type: str = "") -> str:
+    """本文をsniff_charsetで判定した文字コードで文字列に変換する（不正なバイトは置換する）"""
+    return body.decode(sniff_charset(content_type, body[:SNIFF_BYTES]), errors="replace")
+
+
+async def read_capped(response: httpx.Response, max_bytes: int) -> Tuple[bytes, bool]:
+    """ストリーミング中のレスポンス本文をmax_bytesまで読み込む
+
+    Returns:
+        (本文, 上限で打ち切ったかどうか)
+    """
+    chunks = []
+    size = 0
+    async for chunk in response.aiter_bytes():
+        remaining = max_bytes - size
+        if len(chunk) > remaining:
+            chunks.append(chunk[:remaining])
+            logger.info(f"Body of {response.url} truncated at {max_bytes} bytes")
+            return b"".join(chunks), True
+        chunks.append(chunk)
+        size += len(chunk)
+    return b"".join(chunks), False
@@ -0,0 +1,149 @@
+import os
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# 検索結果の解析に使わない画像・フォント・メディア・スタイルシート
+BLOCKED_RESOURCE_PATTERNS = (
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico", "*.bmp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.ogg", "*.wav",
+    "*.css",
+    "*/th?id=*", "*/th/id/*",  # Bingのサムネイル画像（拡張子なし）
+)
+# 広告・計測用のサードパーティ（Network.setBlockedURLsはワイルドカードのみのためホストで指定する）
+BLOCKED_THIRD_PARTY_PATTERNS = (
+    "*doubleclick.net*", "*googlesyndication.com*", "*googleadservices.com*", "*google-analytics.com*",
+    "*googletagmanager.com*", "*adservice.google.*", "*bat.bing.com*", "*clarity.ms*", "*c.bing.com/c.gif*",
+    "*facebook.net*", "*connect.facebook.net*", "*scorecardresearch.com*", "*adnxs.com*", "*criteo.*",
+    "*taboola.com*", "*outbrain.com*", "*amazon-adsystem.com*", "*hotjar.com*", "*newrelic.com*",
+)
+
+# 共通の起動オプション
+BASE_ARGUMENTS = (
+    "--headless",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--window-size=1920,1080",
+    "--disable-extensions",
+    "--disable-infobars",
+    "--lang=ja",
+    "--accept-lang=ja",
+)
+# 軽量プロファイルで追加する起動オプション（バックグラウンド通信・不要な機能を止める）
+LIGHT_ARGUMENTS = (
+    "--blink-settings=imagesEnabled=false",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-client-side-phishing-detection",
+    "--disable-domain-reliability",
+    "--disable-breakpad",
+    "--disable-features=Translate,OptimizationHints,MediaRouter,InterestFeedContentSuggestions,AutofillServerCommunication",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--no-pings",
+)
+# 画像・通知・位置情報等を無効にするコンテンツ設定（2 = ブロック）
+LIGHT_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.default_content_setting_values.geolocation": 2,
+    "profile.default_content_setting_values.media_stream": 2,
+    "profile.default_content_setting_values.plugins": 2,
+}
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+
+
+class BrowserProfile:
+    """headless Chromeの起動オプションとページ読み込みの設定
+
+    lightプロファイルはDOMContentLoadedで読み込みを完了とし（eager）、画像・フォント・
+    メディア・CSS・広告/計測スクリプトをCDPのNetwork.setBlockedURLsで取得しない。
+    """
+
+    def __init__(self, name: str = "light", page_load_strategy: str = "eager",
+                 page_load_timeout: float = 15.0, blocked_urls: Sequence[str] = (),
+                 arguments: Sequence[str] = BASE_ARGUMENTS, prefs: Optional[Dict[str, Any]] = None,
+                 user_agent: str = DEFAULT_USER_AGENT):
+        """
+        Args:
+            name: プロファイル名（ログ・ベンチマーク用）
+            page_load_strategy: normal / eager / none
+            page_load_timeout: ページ読み込みのタイムアウト（秒、0以下の場合は設定しない）
+            blocked_urls: 取得しないURLのパターン（*をワイルドカードとする）
+            arguments: Chromeの起動オプション
+            prefs: Chromeのプロファイル設定
+            user_agent: User-Agent
+        """
+        self.name = name
+        self.page_load_strategy = page_load_strategy
+        self.page_load_timeout = page_load_timeout
+        self.blocked_urls = list(blocked_urls)
+        self.arguments = list(arguments)
+        self.prefs = dict(prefs or {})
+        self.user_agent = user_agent
+
+    def chrome_arguments(self) -> List[str]:
+        """Chromeの起動オプション（User-Agentを含む）"""
+        return self.arguments + [f"--user-agent={self.user_agent}"]
+
+    def apply(self, options: Any) -> Any:
+        """ChromeOptionsに起動オプション・設定・ページ読み込み戦略を反映する"""
+        for argument in self.chrome_arguments():
+            options.add_argument(argument)
+        if self.prefs:
+            options.add_experimental_option("prefs", self.prefs)
+        options.page_load_strategy = self.page_load_strategy
+        return options
+
+    def configure(self, driver: Any) -> Any:
+        """作成したWebDriverにタイムアウトとURLのブロックを設定する"""
+        if self.page_load_timeout > 0:
+            driver.set_page_load_timeout(self.page_load_timeout)
+        if self.blocked_urls:
+            try:
+                driver.execute_cdp_cmd("Network.enable", {})
+                driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.blocked_urls})
+            except Exception as e:
+                # CDPに対応していないドライバー（Edge以外のリモート等）ではブロックせずに続ける
+                logger.warning(f"Failed to block resources via CDP: {str(e)}")
+        return driver
+
+
+def light_profile(page_load_timeout: float = 15.0, extra_blocked_urls: Sequence[str] = ()) -> BrowserProfile:
+    """リソースをブロックし、eagerで読み込む軽量プロファイル"""
+    return BrowserProfile(
+        name="light",
+        page_load_strategy="eager",
+        page_load_timeout=page_load_timeout,
+        blocked_urls=BLOCKED_RESOURCE_PATTERNS + BLOCKED_THIRD_PARTY_PATTERNS + tuple(extra_blocked_urls),
+        arguments=BASE_ARGUMENTS + LIGHT_ARGUMENTS,
+        prefs=LIGHT_PREFS,
+    )
+
+
+def default_profile(page_load_timeout: float = 0.0) -> BrowserProfile:
+    """全てのリソースを読み込む従来どおりのプロファイル"""
+    return BrowserProfile(name="default", page_load_strategy="normal", page_load_timeout=page_load_timeout)
+
+
+def get_browser_profile(name: Optional[str] = None) -> BrowserProfile:
+    """BROWSER_PROFILE等の環境変数からプロファイルを作成する"""
+    name = (name or os.getenv("BROWSER_PROFILE", "light")).lower()
+    timeout = float(os.getenv("BROWSER_PAGE_LOAD_TIMEOUT", "15"))
+    if name == "default":
+        return default_profile(timeout)
+    if name != "light":
+        logger.warning(f"Unknown browser profile '{name}', using light")
+    extra = [pattern.strip() for pattern in os.getenv("BROWSER_BLOCKED_URLS", "").split(",") if pattern.strip()]
+    return light_profile(timeout, extra)
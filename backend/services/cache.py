@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# プロジェクトルート/data/cache をデフォルトの保存先とする
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "cache"
+)
+
+
+def normalize_query(query: str) -> str:
+    """キャッシュキー用にクエリを正規化する（全角/半角・大文字小文字・空白の揺れを吸収）"""
+    return " ".join(unicodedata.normalize("NFKC", query or "").lower().split())
+
+
+def make_search_key(query: str, max_pages: int, backend: str) -> str:
+    """検索結果キャッシュのキーを作成する"""
+    return f"{backend}:{max_pages}:{normalize_query(query)}"
+
+
+def hash_key(*parts: Any) -> str:
+    """任意の値からSHA-256のキャッシュキーを作成する"""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TwoTierCache:
+    """メモリ上のLRUとSQLiteの2層からなるTTL付きキャッシュ
+
+    値はJSONにシリアライズして保存するため、取得した値を変更しても
+    キャッシュ内容には影響しない。
+    """
+
+    def __init__(self, name: str, max_entries: int = 256, ttl: float = 3600.0,
+                 db_path: Optional[str] = None, max_disk_entries: int = 10000):
+        """
+        Args:
+            name: SQLiteのテーブル名
+            max_entries: メモリ層の最大エントリ数
+            ttl: デフォルトの有効期限（秒）
+            db_path: SQLiteファイルのパス（Noneの場合はメモリ層のみ）
+            max_disk_entries: ディスク層の最大エントリ数
+        """
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0, "memory_hits": 0, "disk_hits": 0,
+            "misses": 0, "evictions": 0, "expirations": 0, "sets": 0
+        }
+        self._conn = None
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str) -> None:
+        """SQLiteファイルを開き、テーブルを作成する"""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.name} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.name}_created ON {self.name}(created_at)"
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to open cache database {db_path}: {str(e)}")
+            self._conn = None
+
+    def get(self, key: str) -> Optional[Any]:
+        """キャッシュから値を取得する。存在しないか期限切れの場合はNone"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    return json.loads(payload)
+                del self._memory[key]
+                self._stats["expirations"] += 1
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        f"SELECT value, expires_at FROM {self.name} WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.error(f"Cache read failed: {str(e)}")
+                    row = None
+                if row is not None:
+                    payload, expires_at = row
+                    if expires_at > now:
+                        # ディスク層のヒットはメモリ層へ昇格させる
+                        self._put_memory(key, expires_at, payload)
+                        self._stats["hits"] += 1
+                        self._stats["disk_hits"] += 1
+                        return json.loads(payload)
+                    self._delete_disk(key)
+                    self._stats["expirations"] += 1
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """値をキャッシュに保存する"""
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        payload = json.dumps(value, ensure_ascii=False, default=str)
+        with self._lock:
+            self._put_memory(key, expires_at, payload)
+            self._stats["sets"] += 1
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        f"INSERT OR REPLACE INTO {self.name} (key, value, expires_at, created_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (key, payload, expires_at, now)
+                    )
+                    self._evict_disk()
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Cache write failed: {str(e)}")
+
+    def delete(self, key: str) -> None:
+        """キャッシュからエントリを削除する"""
+        with self._lock:
+            self._memory.pop(key, None)
+            self._delete_disk(key)
+
+    def clear(self) -> None:
+        """全てのエントリを削除する"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute(f"DELETE FROM {self.name}")
+                self._conn.commit()
+
+    def _put_memory(self, key: str, expires_at: float, payload: str) -> None:
+        self._memory[key] = (expires_at, payload)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _delete_disk(self, key: str) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(f"DELETE FROM {self.name} WHERE key = ?", (key,))
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Cache delete failed: {str(e)}")
+
+    def _evict_disk(self) -> None:
+        """期限切れと上限超過分をディスク層から削除する"""
+        self._conn.execute(f"DELETE FROM {self.name} WHERE expires_at <= ?", (time.time(),))
+        count = self._conn.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.name} WHERE key IN "
+                f"(SELECT key FROM {self.name} ORDER BY created_at ASC LIMIT ?)",
+                (overflow,)
+            )
+            self._stats["evictions"] += overflow
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット率などの統計情報を返す"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "memory_entries": len(self._memory),
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        """SQLite接続を閉じる"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,421 @@
+import re
+import json
+import logging
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover - optional dependency
+    etree = None
+
+logger = logging.getLogger(__name__)
+
+# 中身を読まずに読み飛ばす要素
+SKIP_TAGS = frozenset((
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "object",
+    "nav", "header", "footer", "aside", "form", "button", "select", "textarea",
+))
+# class/idの単語（ハイフン・アンダースコア・camelCaseで区切ったもの）がこれを含む要素は
+# ナビゲーション・広告・Cookieバナー等として読み飛ばす
+BOILERPLATE_WORDS = frozenset((
+    "cookie", "cookies", "consent", "breadcrumb", "breadcrumbs", "sidebox", "widget", "widgets",
+    "share", "sharing", "social", "sns", "comment", "comments", "related", "recommend", "recommended",
+    "ranking", "popular", "pager", "pagination", "ad", "ads", "advert", "advertisement", "promo",
+    "sponsor", "sponsored", "subscribe", "newsletter", "modal", "popup",
+))
+# これらの単語はclass/idの末尾にある場合（site-header・global-nav等）だけ読み飛ばす
+# （header-fixed等の修飾クラスはページ全体のラッパーに付くことがある）
+BOILERPLATE_HEADS = frozenset((
+    "header", "footer", "nav", "navi", "navbar", "navigation", "menu", "sidebar", "banner",
+))
+# has-sidebar等の状態を表すクラスは判定に使わない
+STATE_PREFIXES = frozenset(("has", "is", "no", "with", "js"))
+# ページ全体・本文を囲む要素はclass/idに関係なく読み飛ばさない
+NEVER_SKIP_TAGS = frozenset(("html", "body", "main", "article"))
+# class/idがこれに一致するコンテナは本文である可能性が高い
+CONTENT_PATTERN = re.compile(r"article|content|entry|main|post|story|body|text|honbun", re.IGNORECASE)
+BYLINE_PATTERN = re.compile(r"byline|author|writer", re.IGNORECASE)
+
+# テキストを1つの段落として区切る要素
+PARAGRAPH_TAGS = frozenset((
+    "p", "h1", "h2", "h3", "h4", "h5", "h6", "li", "pre", "blockquote", "td", "th", "dd", "dt", "figcaption",
+))
+BLOCK_TAGS = PARAGRAPH_TAGS | frozenset((
+    "div", "section", "article", "main", "ul", "ol", "dl", "table", "tr", "figure", "br", "hr", "body",
+))
+HEADING_TAGS = frozenset(("h1", "h2", "h3", "h4", "h5", "h6"))
+VOID_TAGS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr",
+))
+
+# 段落として数える最小文字数と、段落・コンテナを本文とみなすリンク文字の割合の上限
+MIN_PARAGRAPH_CHARS = 25
+MAX_LINK_DENSITY = 0.5
+# パーサーに一度に渡す文字数（渡すたびに本文の文字数が予算に達したかを確認する）
+FEED_CHUNK_CHARS = 16384
+
+AUTHOR_META = ("author", "article:author", "dc.creator", "byl", "sailthru.author", "parsely-author")
+DATE_META = (
+    "article:published_time", "datepublished", "date", "pubdate", "publishdate", "dc.date.issued",
+    "dc.date", "citation_publication_date", "og:published_time", "article:modified_time",
+)
+
+_WHITESPACE = re.compile(r"\s+")
+_PUNCTUATION = re.compile(r"[、，,。．]")
+_CAMEL_CASE = re.compile(r"([a-z0-9])([A-Z])")
+_NAME_SEPARATOR = re.compile(r"[-_:.]+")
+
+
+def _is_boilerplate(marker: str) -> bool:
+    """class/idの各名前を単語に分け、ボイラープレートを表す名前があるかどうか"""
+    for name in marker.split():
+        words = [word for word in _NAME_SEPARATOR.split(_CAMEL_CASE.sub(r"\1-\2", name).lower()) if word]
+        if not words or words[0] in STATE_PREFIXES:
+            continue
+        if words[-1] in BOILERPLATE_HEADS or any(word in BOILERPLATE_WORDS for word in words):
+            return True
+    return False
+
+
+class _Frame:
+    __slots__ = ("tag", "id", "text_chars", "link_chars", "weight", "byline")
+
+    def __init__(self, tag: str, frame_id: int, weight: float, byline: bool):
+        self.tag = tag
+        self.id = frame_id
+        self.text_chars = 0
+        self.link_chars = 0
+        self.weight = weight
+        self.byline = byline
+
+
+class _ArticleTarget:
+    """開始タグ・終了タグ・テキストのイベントを1回だけ受け取り、段落とメタデータを集める
+
+    lxmlのパーサーターゲットとして、またはhtml.parserから同じイベントで呼び出す。
+    DOMは作らず、要素ごとの文字数・リンク文字数・段落のスコアをスタック上で集計する。
+    """
+
+    def __init__(self):
+        self.stack: List[_Frame] = []
+        self.next_id = 0
+        self.skip_depth = 0
+        self.link_depth = 0
+        self.buffer: List[str] = []
+        self.buffer_link_chars = 0
+        self.paragraphs = []
+        self.scores: Dict[int, float] = {}
+        self.link_density: Dict[int, float] = {}
+        self.weights: Dict[int, float] = {}
+        # 要素ごとの、本文に含めうる段落の文字数
+        self.paragraph_chars: Dict[int, int] = {}
+        self.meta: Dict[str, str] = {}
+        self.title_parts: List[str] = []
+        self.in_title = False
+        self.first_h1: Optional[str] = None
+        self.time_datetime: Optional[str] = None
+        self.byline_parts: List[str] = []
+        self.byline_depth = 0
+        self.time_depth = 0
+        self.byline_done = False
+        self.json_ld: List[str] = []
+        self.in_json_ld = False
+
+    # --- パーサーイベント ---
+
+    def start(self, tag, attrib):
+        tag = tag.lower() if isinstance(tag, str) else ""
+        attrib = {k.lower(): v for k, v in (attrib or {}).items() if v is not None}
+        if tag == "meta":
+            self._collect_meta(attrib)
+        elif tag == "time" and self.time_datetime is None and attrib.get("datetime"):
+            self.time_datetime = attrib["datetime"]
+        elif tag == "title" and not self.stack_has("body"):
+            self.in_title = True
+        if tag == "script" and "ld+json" in attrib.get("type", "").lower():
+            self.in_json_ld = True
+        if self.skip_depth:
+            if tag not in VOID_TAGS:
+                self.skip_depth += 1
+            return
+
+        if tag in BLOCK_TAGS:
+            self._flush()
+        # html.parserは閉じられていない段落を自動で閉じないため、同じ段落要素の開始で閉じる
+        if tag in PARAGRAPH_TAGS and self.stack and self.stack[-1].tag == tag and tag in ("p", "li", "dd", "dt"):
+            self.end(tag)
+        if tag in VOID_TAGS:
+            return
+
+        marker = f"{attrib.get('class', '')} {attrib.get('id', '')}"
+        content = bool(marker.strip()) and bool(CONTENT_PATTERN.search(marker))
+        if tag in SKIP_TAGS or (tag not in NEVER_SKIP_TAGS and not content and _is_boilerplate(marker)
+                                and not BYLINE_PATTERN.search(marker)):
+            self.skip_depth = 1
+            return
+        weight = 25.0 if content else 0.0
+        if tag in ("article", "main"):
+            weight += 25.0
+        byline = (not self.byline_done and bool(marker.strip()) and bool(BYLINE_PATTERN.search(marker))) \
+            or attrib.get("rel") == "author" or attrib.get("itemprop") == "author"
+        self.stack.append(_Frame(tag, self.next_id, weight, byline))
+        self.next_id += 1
+        if byline:
+            self.byline_depth += 1
+        if tag == "a":
+            self.link_depth += 1
+        elif tag == "time":
+            self.time_depth += 1
+
+    def end(self, tag):
+        tag = tag.lower() if isinstance(tag, str) else ""
+        if tag == "title":
+            self.in_title = False
+        if tag == "script":
+            self.in_json_ld = False
+        if self.skip_depth:
+            if tag not in VOID_TAGS:
+                self.skip_depth -= 1
+            return
+        if tag in VOID_TAGS or not any(frame.tag == tag for frame in self.stack):
+            return
+        # 閉じられていない子要素もまとめて閉じる
+        while self.stack:
+            if self.stack[-1].tag in BLOCK_TAGS or self.stack[-1].tag == tag:
+                self._flush()
+            frame = self.stack.pop()
+            self._close(frame)
+            if frame.tag == tag:
+                break
+
+    def data(self, text):
+        if self.in_title:
+            self.title_parts.append(text)
+        if self.in_json_ld:
+            self.json_ld.append(text)
+        if self.skip_depth or not self.stack:
+            return
+        self.buffer.append(text)
+        if self.link_depth:
+            self.buffer_link_chars += len(text.strip())
+        # 署名欄の日付（time要素）は著者名に含めない
+        if self.byline_depth and not self.byline_done and not self.time_depth:
+            self.byline_parts.append(text)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        while self.stack:
+            self._flush()
+            self._close(self.stack.pop())
+        return self
+
+    # --- 集計 ---
+
+    def stack_has(self, tag: str) -> bool:
+        return any(frame.tag == tag for frame in self.stack)
+
+    def _collect_meta(self, attrib):
+        key = (attrib.get("property") or attrib.get("name") or attrib.get("itemprop") or "").lower()
+        content = attrib.get("content")
+        if key and content and key not in self.meta:
+            self.meta[key] = content.strip()
+
+    def _flush(self):
+        """溜めたテキストを1つの段落として記録し、親と祖父の要素にスコアを加算する"""
+        if not self.buffer:
+            return
+        text = _WHITESPACE.sub(" ", "".join(self.buffer)).strip()
+        link_chars = self.buffer_link_chars
+        self.buffer = []
+        self.buffer_link_chars = 0
+        if not text or not self.stack:
+            return
+
+        chars = len(text)
+        for frame in self.stack:
+            frame.text_chars += chars
+            frame.link_chars += min(link_chars, chars)
+        # テキストを含む最も内側のブロック要素（span・a等のインライン要素は除く）
+        index = len(self.stack) - 1
+        while index > 0 and self.stack[index].tag not in BLOCK_TAGS:
+            index -= 1
+        owner = self.stack[index]
+        # 段落要素の場合はその親から、div等に直接書かれたテキストはその要素自身から数える
+        containers = self.stack[:index] if owner.tag in PARAGRAPH_TAGS else self.stack[:index + 1]
+        heading = owner.tag in HEADING_TAGS
+        if owner.tag == "h1" and self.first_h1 is None:
+            self.first_h1 = text
+        link_density = link_chars / chars
+        # 著者・日付の行はメタデータとして返すため本文には含めない
+        if not self.byline_depth:
+            self.paragraphs.append((text, link_density, heading, tuple(frame.id for frame in self.stack)))
+            if link_density < MAX_LINK_DENSITY:
+                for frame in self.stack:
+                    self.paragraph_chars[frame.id] = self.paragraph_chars.get(frame.id, 0) + chars + 1
+
+        if chars >= MIN_PARAGRAPH_CHARS and link_density < MAX_LINK_DENSITY and containers:
+            score = 1.0 + len(_PUNCTUATION.findall(text)) + min(chars / 100.0, 3.0)
+            parent = containers[-1]
+            self.scores[parent.id] = self.scores.get(parent.id, 0.0) + score
+            self.weights[parent.id] = parent.weight
+            if len(containers) > 1:
+                grandparent = containers[-2]
+                self.scores[grandparent.id] = self.scores.get(grandparent.id, 0.0) + score / 2
+                self.weights[grandparent.id] = grandparent.weight
+
+    def _close(self, frame: _Frame):
+        if frame.tag == "a":
+            self.link_depth = max(0, self.link_depth - 1)
+        elif frame.tag == "time":
+            self.time_depth = max(0, self.time_depth - 1)
+        if frame.byline:
+            self.byline_depth -= 1
+            self.byline_done = self.byline_done or bool("".join(self.byline_parts).strip())
+        if frame.id in self.scores:
+            self.link_density[frame.id] = frame.link_chars / frame.text_chars if frame.text_chars else 1.0
+
+    # --- 結果 ---
+
+    def best_container(self) -> Optional[int]:
+        """リンク密度で補正したスコアが最も高い要素"""
+        best, best_score = None, 0.0
+        for frame_id, score in self.scores.items():
+            adjusted = (score + self.weights.get(frame_id, 0.0)) * (1.0 - self.link_density.get(frame_id, 0.0))
+            if adjusted > best_score:
+                best, best_score = frame_id, adjusted
+        return best
+
+    def budget_met(self, max_chars: Optional[int]) -> bool:
+        """現時点で最もスコアの高い要素の段落だけで本文がmax_charsに達したかどうか"""
+        if max_chars is None:
+            return False
+        best = self.best_container()
+        return best is not None and self.paragraph_chars.get(best, 0) >= max_chars
+
+    def article_text(self, max_chars: Optional[int] = None) -> str:
+        best = self.best_container()
+        lines = []
+        total = 0
+        for text, link_density, heading, ancestors in self.paragraphs:
+            if best is not None and best not in ancestors:
+                continue
+            if link_density >= MAX_LINK_DENSITY:
+                continue
+            if not heading and len(text) < MIN_PARAGRAPH_CHARS and best is None:
+                continue
+            lines.append(text)
+            total += len(text) + 1
+            if max_chars is not None and total >= max_chars:
+                break
+        return "\n".join(lines)
+
+
+class _StdlibParser(HTMLParser):
+    """lxmlがない場合に_ArticleTargetへ同じイベントを送るパーサー"""
+
+    def __init__(self, target: _ArticleTarget):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+        if tag not in VOID_TAGS:
+            self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+
+def _json_ld_value(blocks: List[str], key: str) -> Optional[str]:
+    """JSON-LDからkey（author / datePublished）の値を取り出す"""
+    for block in blocks:
+        try:
+            data = json.loads(block)
+        except ValueError:
+            continue
+        items = data if isinstance(data, list) else data.get("@graph", [data]) if isinstance(data, dict) else []
+        for item in items:
+            if not isinstance(item, dict) or key not in item:
+                continue
+            value = item[key]
+            if isinstance(value, list):
+                value = value[0] if value else None
+            if isinstance(value, dict):
+                value = value.get("name")
+            if isinstance(value, str) and value.strip():
+                return value.strip()
+    return None
+
+
+def _clean_byline(text: str) -> str:
+    text = _WHITESPACE.sub(" ", text).strip()
+    text = re.sub(r"^(著者|筆者|文|執筆|記者|by)\s*[:：]?\s*", "", text, flags=re.IGNORECASE)
+    # 日付が続く場合は除く
+    return re.split(r"\s\d{4}[年/\-.]", text, maxsplit=1)[0].strip()
+
+
+def _feed(parser, target: _ArticleTarget, html: str, max_chars: Optional[int]) -> None:
+    """HTMLを分割してパーサーに渡し、本文が予算に達した時点で残りを読まずに終える"""
+    for start in range(0, len(html), FEED_CHUNK_CHARS):
+        parser.feed(html[start:start + FEED_CHUNK_CHARS])
+        if target.budget_met(max_chars):
+            break
+
+
+def _parse(html: str, max_chars: Optional[int] = None) -> _ArticleTarget:
+    target = _ArticleTarget()
+    if etree is not None:
+        try:
+            parser = etree.HTMLParser(target=target, remove_comments=True, remove_pis=True)
+            _feed(parser, target, html, max_chars)
+            return parser.close()
+        except (etree.ParserError, ValueError) as e:
+            logger.debug(f"lxml target parser failed, using html.parser: {str(e)}")
+            target = _ArticleTarget()
+    parser = _StdlibParser(target)
+    _feed(parser, target, html, max_chars)
+    parser.close()
+    return target.close()
+
+
+def extract_article(html: str, max_chars: Optional[int] = None) -> Dict[str, str]:
+    """HTMLから本文とタイトル・著者・公開日時を抽出する
+
+    文書を1回だけ走査して段落ごとのテキスト量とリンク文字の割合を集計し、スコアの最も高い
+    コンテナ内の段落だけを本文とする。ナビゲーション・フッター・Cookieバナー等は読み飛ばす。
+    max_charsを指定した場合は、そのコンテナの本文が予算に達した時点で文書の残りを解析しない。
+
+    Args:
+        html: HTML文字列
+        max_chars: 本文の最大文字数（達した時点で以降の段落を含めない）
+
+    Returns:
+        title, text, author, date, description を持つ辞書（見つからない項目は空文字列）
+    """
+    if not html or not html.strip():
+        return {"title": "", "text": "", "author": "", "date": "", "description": ""}
+    target = _parse(html, max_chars)
+    meta = target.meta
+
+    title = meta.get("og:title") or _WHITESPACE.sub(" ", "".join(target.title_parts)).strip() or target.first_h1 or ""
+    author = next((meta[key] for key in AUTHOR_META if meta.get(key) and not meta[key].startswith("http")), None)
+    author = author or _json_ld_value(target.json_ld, "author") or _clean_byline("".join(target.byline_parts))
+    date = next((meta[key] for key in DATE_META if meta.get(key)), None)
+    date = date or _json_ld_value(target.json_ld, "datePublished") or target.time_datetime or ""
+
+    return {
+        "title": title,
+        "text": target.article_text(max_chars),
+        "author": author,
+        "date": date,
+        "description": meta.get("description") or meta.get("og:description") or "",
+    }
@@ -3,7 +3,7 @@ import sys
 import logging
 import json
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Union
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple, Union
 
 # プロジェクトのルートディレクトリをPythonパスに追加（必要な場合）
 root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -11,7 +11,6 @@ if root_dir not in sys.path:
     sys.path.append(root_dir)
 
 # バックエンドサービスのインポート
-from scripts.cot_deepresearch import CoTDeepResearch
 from backend.services.langgraph_utils import generate_graph_from_text
 
 class CoTDeepResearchService:
@@ -28,6 +27,8 @@ class CoTDeepResearchService:
         self.logger.info('CoTDeepResearchServiceが初期化されました。')
         
         # 基本となるCoTDeepResearchクラスのインスタンスを作成
+        # （scripts.cot_deepresearch は backend.services を参照するため、循環インポートを避けて遅延インポートする）
+        from scripts.cot_deepresearch import CoTDeepResearch
         self.cot_deepresearch = CoTDeepResearch()
     
     async def execute_research(self, 
@@ -72,6 +73,41 @@ class CoTDeepResearchService:
                 "message": "CoTDeepResearch実行中にエラーが発生しました。"
             }
     
+    async def stream_research(self,
+                        query: str,
+                        max_pages: int = 15,
+                        depth: int = 2,
+                        language: str = "ja") -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        execute_researchのストリーミング版
+
+        検索結果（results）、生成中の分析テキスト（token）、分析結果（analysis）を段階ごとに返し、
+        最後にformat_resultsで整形した結果（result）または error を返す。
+
+        Args:
+            query (str): 検索クエリ
+            max_pages (int): 検索する最大ページ数
+            depth (int): 分析の深さ (1=基本, 2=詳細, 3=高度)
+            language (str): 検索言語
+
+        Yields:
+            Tuple[str, Dict[str, Any]]: (イベント名, データ)
+        """
+        self.logger.info(f'CoTDeepResearchストリーミング実行: クエリ="{query}", max_pages={max_pages}, depth={depth}, language={language}')
+        
+        async for event, data in self.cot_deepresearch.execute_stream(query, max_pages, depth):
+            if event != "done":
+                yield event, data
+                continue
+            
+            result = data
+            if "metadata" in result:
+                result["metadata"]["language"] = language
+            graph = generate_graph_from_text(str(result.get("analysis", "")))
+            if graph is not None:
+                result["langgraph"] = graph
+            yield "result", self.format_results(result)
+    
     def format_results(self, result: Dict[str, Any]) -> Dict[str, Any]:
         """
         CoTDeepResearchの結果をフォーマットする
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from .cache import DEFAULT_CACHE_DIR
+from .url_utils import url_key
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlCheckpointStore:
+    """クロールジョブの状態と取得済みページをジョブIDごとにSQLiteへ保存する
+
+    状態（フロンティアや検索結果など任意のJSON）と取得済みページは同じトランザクションで
+    書き込むため、再開時に両者が食い違うことはない。
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Args:
+            db_path: SQLiteファイルのパス（Noneの場合はメモリ上のみ）
+        """
+        self._lock = threading.Lock()
+        self._conn = None
+        self._open_db(db_path or ":memory:")
+
+    def _open_db(self, db_path: str) -> None:
+        """SQLiteファイルを開き、テーブルを作成する"""
+        try:
+            if db_path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS crawl_jobs ("
+                "job_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS crawl_pages ("
+                "job_id TEXT NOT NULL, key TEXT NOT NULL, url TEXT NOT NULL, "
+                "data TEXT NOT NULL, fetched_at REAL NOT NULL, PRIMARY KEY (job_id, key))"
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to open crawl checkpoint database {db_path}: {str(e)}")
+            self._conn = None
+
+    def load_state(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """保存済みの状態を返す（ない場合はNone）"""
+        if self._conn is None:
+            return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT state FROM crawl_jobs WHERE job_id = ?", (job_id,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Crawl checkpoint read failed: {str(e)}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def load_pages(self, job_id: str) -> Dict[str, Dict[str, Any]]:
+        """取得済みページを取得順に{URLキー: ページ}で返す"""
+        if self._conn is None:
+            return {}
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT key, data FROM crawl_pages WHERE job_id = ? ORDER BY fetched_at, rowid", (job_id,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Crawl checkpoint read failed: {str(e)}")
+            return {}
+        return {key: json.loads(data) for key, data in rows}
+
+    def save(self, job_id: str, state: Optional[Dict[str, Any]] = None,
+             pages: Optional[List[tuple]] = None) -> bool:
+        """状態と新しく取得したページ（(URL, ページ)のリスト）を1つのトランザクションで保存する"""
+        if self._conn is None:
+            return False
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                if pages:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO crawl_pages (job_id, key, url, data, fetched_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        [(job_id, url_key(url), url, json.dumps(page, ensure_ascii=False), now)
+                         for url, page in pages]
+                    )
+                if state is not None:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO crawl_jobs (job_id, state, updated_at) VALUES (?, ?, ?)",
+                        (job_id, json.dumps(state, ensure_ascii=False), now)
+                    )
+            return True
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.error(f"Crawl checkpoint write failed: {str(e)}")
+            return False
+
+    def delete(self, job_id: str) -> None:
+        """ジョブの状態と取得済みページを削除する"""
+        if self._conn is None:
+            return
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM crawl_jobs WHERE job_id = ?", (job_id,))
+                self._conn.execute("DELETE FROM crawl_pages WHERE job_id = ?", (job_id,))
+        except sqlite3.Error as e:
+            logger.error(f"Crawl checkpoint delete failed: {str(e)}")
+
+    def job(self, job_id: str, interval: int = 20, max_age: float = 30.0) -> "CrawlCheckpoint":
+        """ジョブのチェックポイントを開く（保存済みの状態とページを読み込む）"""
+        return CrawlCheckpoint(self, job_id, interval=interval, max_age=max_age)
+
+
+class CrawlCheckpoint:
+    """1つのクロールジョブのチェックポイント
+
+    取得したページはメモリ上に溜め、interval件ごとまたはmax_age秒ごとに
+    状態と一緒に保存する。再起動時は保存済みのページを再取得せずに使う。
+    """
+
+    def __init__(self, store: CrawlCheckpointStore, job_id: str, interval: int = 20, max_age: float = 30.0):
+        self.store = store
+        self.job_id = job_id
+        self.interval = interval
+        self.max_age = max_age
+        self.state = store.load_state(job_id)
+        self.pages = store.load_pages(job_id)
+        self._pending: List[tuple] = []
+        self._last_flush = time.monotonic()
+
+    @property
+    def resumed(self) -> bool:
+        """保存済みの状態から再開したかどうか"""
+        return self.state is not None
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """取得済みのページを返す（未取得の場合はNone）"""
+        return self.pages.get(url_key(url))
+
+    def add_page(self, url: str, page: Dict[str, Any]) -> None:
+        """取得したページを記録する（保存はflushで行う）"""
+        self.pages[url_key(url)] = page
+        self._pending.append((url, page))
+
+    def due(self) -> bool:
+        """保存すべきタイミングかどうか"""
+        return bool(self._pending) and (
+            len(self._pending) >= self.interval or time.monotonic() - self._last_flush >= self.max_age
+        )
+
+    def flush(self, state: Optional[Dict[str, Any]] = None) -> None:
+        """記録したページと状態を保存する"""
+        if state is not None:
+            self.state = state
+        if self.store.save(self.job_id, state, self._pending):
+            self._pending = []
+        self._last_flush = time.monotonic()
+
+
+_checkpoint_store: Optional[CrawlCheckpointStore] = None
+
+
+def get_crawl_checkpoints() -> CrawlCheckpointStore:
+    """CrawlerServiceとWebCrawlerで共有するチェックポイントの保存先を返す"""
+    global _checkpoint_store
+    if _checkpoint_store is None:
+        _checkpoint_store = CrawlCheckpointStore(
+            os.getenv("CRAWL_CHECKPOINT_PATH", os.path.join(DEFAULT_CACHE_DIR, "crawl_checkpoints.sqlite3"))
+        )
+    return _checkpoint_store
+
+
+def checkpoint_interval() -> int:
+    """チェックポイントを保存するページ数の間隔"""
+    return max(1, int(os.getenv("CRAWL_CHECKPOINT_INTERVAL", "20")))
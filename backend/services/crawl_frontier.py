@@ -0,0 +1,160 @@
+import heapq
+import itertools
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .url_utils import canonicalize_url, url_key
+
+# 本文よりもナビゲーション・ログイン等である可能性が高いパス
+_LOW_VALUE_PATHS = (
+    "/login", "/signin", "/signup", "/register", "/cart", "/account",
+    "/privacy", "/terms", "/contact", "/tag/", "/tags/", "/category/", "/search",
+)
+_LOW_VALUE_EXTENSIONS = (
+    ".pdf", ".zip", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".css", ".js", ".xml", ".mp4", ".mp3",
+)
+
+
+def score_link(link: str, parent: str) -> float:
+    """リンクの優先度（高いほど先に取得する）
+
+    同じホストのリンク・浅いパス・クエリのないURLを優先し、
+    ログインや一覧ページ、本文を含まないファイルへのリンクは後回しにする。
+    """
+    parts = urlsplit(link)
+    path = parts.path.lower()
+    score = 1.0
+    if parts.hostname and parts.hostname == urlsplit(parent).hostname:
+        score += 1.0
+    score -= 0.1 * max(0, path.rstrip("/").count("/") - 1)
+    if parts.query:
+        score -= 0.3
+    if any(marker in path for marker in _LOW_VALUE_PATHS):
+        score -= 1.0
+    if path.endswith(_LOW_VALUE_EXTENSIONS):
+        score -= 2.0
+    return score
+
+
+class CrawlFrontier:
+    """深さとリンクの優先度で順序付けたクロール待ち行列
+
+    浅い深さのURLから順に、同じ深さでは優先度の高いURLから取り出す。
+    一度追加したURLは正規化したキーで記録し、再度追加しない。
+    """
+
+    def __init__(self, max_depth: int = 3, max_links_per_page: int = 10,
+                 max_pages_per_depth: Optional[int] = None, max_pages: Optional[int] = None):
+        """
+        Args:
+            max_depth: 取得する最大の深さ（開始URLが深さ1）
+            max_links_per_page: 1ページから追加するリンクの最大数
+            max_pages_per_depth: 深さごとに取り出すURLの最大数（Noneの場合は無制限）
+            max_pages: 取り出すURLの総数の上限（Noneの場合は無制限）
+        """
+        self.max_depth = max_depth
+        self.max_links_per_page = max_links_per_page
+        self.max_pages_per_depth = max_pages_per_depth
+        self.max_pages = max_pages
+        self._heap: List[Tuple[int, float, int, str]] = []
+        self._counter = itertools.count()
+        self._visited = set()
+        self._popped_per_depth: Dict[int, int] = {}
+        self._popped = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def add(self, url: str, depth: int = 1, score: float = 0.0) -> bool:
+        """URLを追加する（未訪問かつmax_depth以内の場合のみTrue）"""
+        if depth > self.max_depth or not url.startswith(("http://", "https://")):
+            return False
+        key = url_key(url)
+        if key in self._visited:
+            return False
+        self._visited.add(key)
+        heapq.heappush(self._heap, (depth, -score, next(self._counter), url))
+        return True
+
+    def add_links(self, links: Iterable[str], parent: str, depth: int) -> int:
+        """ページのリンクを正規化・採点し、優先度の高いものから最大max_links_per_page件追加する
+
+        Args:
+            links: ページに含まれるリンク（相対URLも可）
+            parent: リンク元のURL
+            depth: リンク先の深さ
+
+        Returns:
+            追加したURLの数
+        """
+        if depth > self.max_depth:
+            return 0
+        candidates = {}
+        for link in links:
+            # 相対URL・リダイレクト・トラッキングパラメーターを正規化して重複を除く
+            link = canonicalize_url(link, base=parent)
+            if link.startswith(("http://", "https://")):
+                candidates.setdefault(url_key(link), link)
+        scored = sorted(
+            ((score_link(link, parent), link) for link in candidates.values()),
+            key=lambda item: -item[0]
+        )
+        added = 0
+        for score, link in scored:
+            if added >= self.max_links_per_page:
+                break
+            if self.add(link, depth, score):
+                added += 1
+        return added
+
+    def pop(self) -> Optional[Tuple[str, int]]:
+        """次に取得する(URL, 深さ)を返す（取得できるURLがない場合はNone）"""
+        if self.max_pages is not None and self._popped >= self.max_pages:
+            return None
+        while self._heap:
+            depth, _, _, url = heapq.heappop(self._heap)
+            count = self._popped_per_depth.get(depth, 0)
+            if self.max_pages_per_depth is not None and count >= self.max_pages_per_depth:
+                continue
+            self._popped_per_depth[depth] = count + 1
+            self._popped += 1
+            return url, depth
+        return None
+
+    def snapshot(self, in_flight: Iterable[Tuple[str, int]] = ()) -> Dict[str, object]:
+        """チェックポイント用にJSONへ変換できる状態を返す
+
+        Args:
+            in_flight: 取り出し済みで取得が終わっていない(URL, 深さ)。再開時に再び取り出せるよう待ち行列へ戻す
+        """
+        queue = [[depth, -neg_score, url] for depth, neg_score, _, url in sorted(self._heap)]
+        popped_per_depth = dict(self._popped_per_depth)
+        popped = self._popped
+        for url, depth in in_flight:
+            queue.append([depth, 0.0, url])
+            popped_per_depth[depth] = popped_per_depth.get(depth, 1) - 1
+            popped -= 1
+        return {
+            "queue": queue,
+            "visited": sorted(self._visited),
+            "popped_per_depth": {str(depth): count for depth, count in popped_per_depth.items()},
+            "popped": popped,
+        }
+
+    def restore(self, state: Dict[str, object]) -> None:
+        """snapshotで保存した状態を読み込む"""
+        self._heap = []
+        self._visited = set(state.get("visited", []))
+        for depth, score, url in state.get("queue", []):
+            heapq.heappush(self._heap, (depth, -score, next(self._counter), url))
+        self._popped_per_depth = {int(depth): count for depth, count in state.get("popped_per_depth", {}).items()}
+        self._popped = state.get("popped", 0)
+
+    def stats(self) -> Dict[str, object]:
+        """待ち行列の状態"""
+        return {
+            "queued": len(self._heap),
+            "visited": len(self._visited),
+            "popped": self._popped,
+            "popped_per_depth": dict(self._popped_per_depth),
+        }
@@ -2,7 +2,6 @@ from bs4 import BeautifulSoup
 import json
 from urllib.parse import quote_plus
 import time
-import re
 import os
 import httpx
 from dotenv import load_dotenv
@@ -15,7 +14,7 @@ from langchain.chains.summarize import load_summarize_chain
 from datetime import datetime
 from langchain.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field, PrivateAttr
-from typing import List, Optional, Any
+from typing import AsyncIterator, List, Optional, Any
 from selenium import webdriver
 from selenium.webdriver.edge.service import Service
 # EdgeOptionsの正しいインポート
@@ -28,10 +27,33 @@ from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 import logging
 from langchain.llms.base import BaseLLM
 import chromedriver_autoinstaller
 import asyncio
+import threading
+from functools import lru_cache
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from .http_client import DEFAULT_HEADERS, get_async_client, map_blocking, run_blocking
+from .webdriver_pool import WebDriverPool, WebDriverPoolTimeout
+from .cache import DEFAULT_CACHE_DIR, TwoTierCache, make_search_key
+from .fetch_scheduler import get_fetch_scheduler, raise_for_throttle
+from .html_parser import parse_bing_results
+from .content_extractor import extract_article
+from .dedup import NearDuplicateDetector
+from .url_utils import canonicalize_url, url_key
+from .http_cache import cached_get, get_http_cache
+from .body_reader import HTML_CONTENT_TYPES, decode_body
+from .lexicon import get_lexicon
+from .keywords import get_keyword_extractor
+from .textrank import get_text_rank
+from .search_backends import CircuitBreaker, SearchBackend, SearchBackendRegistry
+from .crawl_checkpoint import checkpoint_interval, get_crawl_checkpoints
+from .browser_profile import get_browser_profile
+from .llm_cache import get_llm_cache
 
 # Firecrawl APIクライアント（存在する場合）
 try:
@@ -63,6 +85,12 @@ class SearchResult(BaseModel):
     timestamp: str = Field(description="The timestamp of when this result was found")
     source: Optional[str] = Field(description="The source of this information")
     analysis: Optional[str] = Field(description="AI analysis of this result")
+    author: Optional[str] = Field(default=None, description="The author of the page, if found")
+    date: Optional[str] = Field(default=None, description="The publication date of the page, if found")
+
+def gemini_model_name(model) -> str:
+    """LLMキャッシュのキーに使うGeminiのモデル名（SDKのモデルは"models/..."の形式）"""
+    return getattr(model, "model_name", None) or "gemini-pro"
 
 class GeminiLLM(BaseLLM):
     """Gemini APIをLangChainで使用するためのカスタムLLMクラス"""
@@ -70,6 +98,7 @@ class GeminiLLM(BaseLLM):
     google_api_key: str = None
     logger: Any = None
     model: Any = None
+    max_concurrency: int = 4
     
     def __init__(self, google_api_key: str):
         """
@@ -81,6 +110,8 @@ class GeminiLLM(BaseLLM):
         super().__init__()
         self.google_api_key = google_api_key
         self.logger = logging.getLogger(__name__)
+        # _agenerateで同時に送るリクエスト数の上限
+        self.max_concurrency = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
         
         try:
             genai.configure(api_key=self.google_api_key)
@@ -114,6 +145,60 @@ class GeminiLLM(BaseLLM):
         
         return LLMResult(generations=generations)
     
+    async def _agenerate(self, prompts, stop=None, run_manager=None, **kwargs):
+        """
+        複数のプロンプトをmax_concurrencyまで並行して生成する（_generateの非同期版）
+        
+        Args:
+            prompts: プロンプトのリスト
+            stop: 停止トークンのリスト
+            run_manager: 実行マネージャー
+            
+        Returns:
+            プロンプトと同じ順序の生成結果。一部のプロンプトが失敗した場合、そのプロンプトの
+            生成結果は空文字列となり、generation_infoのerrorに理由が入る。全て失敗した場合は例外を送出する
+        """
+        from langchain_core.outputs import LLMResult, Generation
+        
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+        
+        async def generate(prompt):
+            async with semaphore:
+                return await self._acall(prompt, stop=stop, **kwargs)
+        
+        outputs = await asyncio.gather(*[generate(prompt) for prompt in prompts], return_exceptions=True)
+        for output in outputs:
+            # キャンセル等はプロンプト単位のエラーとして扱わずに伝える
+            if isinstance(output, BaseException) and not isinstance(output, Exception):
+                raise output
+        errors = [output for output in outputs if isinstance(output, Exception)]
+        if errors and len(errors) == len(outputs):
+            raise errors[0]
+        
+        generations = []
+        for output in outputs:
+            if isinstance(output, Exception):
+                generations.append([Generation(text="", generation_info={"error": str(output)})])
+            else:
+                generations.append([Generation(text=output)])
+        if errors:
+            self.logger.warning(f"{len(errors)}/{len(outputs)} prompts failed in GeminiLLM._agenerate")
+        
+        return LLMResult(generations=generations)
+    
+    def _model_name(self):
+        """キャッシュのキーに使うモデル名"""
+        return gemini_model_name(self.model)
+    
+    def _generation_config(self, kwargs):
+        """呼び出し時の引数から生成設定を作成する"""
+        return {
+            "temperature": kwargs.get("temperature", 0.7),
+            "top_p": kwargs.get("top_p", 0.95),
+            "top_k": kwargs.get("top_k", 40),
+            "max_output_tokens": kwargs.get("max_tokens", 2048),
+        }
+    
     def _call(self, prompt: str, stop: Optional[List[str]] = None, **kwargs) -> str:
         """
         LangChainからの呼び出しに対応するメソッド
@@ -126,20 +211,21 @@ class GeminiLLM(BaseLLM):
             生成されたテキスト
         """
         try:
-            generation_config = {
-                "temperature": kwargs.get("temperature", 0.7),
-                "top_p": kwargs.get("top_p", 0.95),
-                "top_k": kwargs.get("top_k", 40),
-                "max_output_tokens": kwargs.get("max_tokens", 2048),
-            }
-            
-            response = self.model.generate_content(prompt, generation_config=generation_config)
+            generation_config = self._generation_config(kwargs)
             
-            if not response:
-                raise ValueError("Empty response from Gemini API")
+            def call():
+                response = self.model.generate_content(prompt, generation_config=generation_config)
                 
-            response_text = response.text if hasattr(response, 'text') else str(response)
-            return response_text
+                if not response:
+                    raise ValueError("Empty response from Gemini API")
+                    
+                return response.text if hasattr(response, 'text') else str(response)
+            
+            # 同じモデル・プロンプト・生成設定の応答はキャッシュから返す
+            cache = get_llm_cache()
+            if cache is None:
+                return call()
+            return cache.cached("gemini", self._model_name(), prompt, generation_config, call)
             
         except Exception as e:
             self.logger.error(f"Error in GeminiLLM._call: {str(e)}")
@@ -157,32 +243,86 @@ class GeminiLLM(BaseLLM):
             生成されたテキスト
         """
         try:
-            generation_config = {
-                "temperature": kwargs.get("temperature", 0.7),
-                "top_p": kwargs.get("top_p", 0.95),
-                "top_k": kwargs.get("top_k", 40),
-                "max_output_tokens": kwargs.get("max_tokens", 2048),
-            }
+            generation_config = self._generation_config(kwargs)
             
-            response = await asyncio.to_thread(
-                self.model.generate_content,
-                prompt,
-                generation_config=generation_config
-            )
-            
-            if not response:
-                raise ValueError("Empty response from Gemini API")
+            async def call():
+                # SDKの非同期APIを使い、スレッドを消費せずに待機する（古いSDKではスレッドで実行）
+                if hasattr(self.model, "generate_content_async"):
+                    response = await self.model.generate_content_async(prompt, generation_config=generation_config)
+                else:
+                    response = await asyncio.to_thread(
+                        self.model.generate_content,
+                        prompt,
+                        generation_config=generation_config
+                    )
                 
-            response_text = response.text if hasattr(response, 'text') else str(response)
-            return response_text
+                if not response:
+                    raise ValueError("Empty response from Gemini API")
+                    
+                return response.text if hasattr(response, 'text') else str(response)
+            
+            # 同じモデル・プロンプト・生成設定の応答はキャッシュから返す
+            cache = get_llm_cache()
+            if cache is None:
+                return await call()
+            return await cache.acached("gemini", self._model_name(), prompt, generation_config, call)
             
         except Exception as e:
             self.logger.error(f"Error in GeminiLLM._acall: {str(e)}")
             raise ValueError(f"Error calling Gemini API: {str(e)}")
 
+    async def astream_text(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """
+        生成されたテキストを届いた順に返す（Geminiのストリーミング生成）
+
+        Args:
+            prompt: プロンプト文字列
+
+        Yields:
+            生成されたテキストの断片。キャッシュにある場合や非同期APIのない古いSDKでは全文を1回で返す
+        """
+        generation_config = self._generation_config(kwargs)
+        cache = get_llm_cache()
+        if cache is not None:
+            cached = await run_blocking(cache.get, "gemini", self._model_name(), prompt, generation_config)
+            if cached is not None:
+                yield cached
+                return
+        if not hasattr(self.model, "generate_content_async"):
+            yield await self._acall(prompt, **kwargs)
+            return
+
+        chunks = []
+        try:
+            response = await self.model.generate_content_async(
+                prompt, generation_config=generation_config, stream=True
+            )
+            async for chunk in response:
+                text = getattr(chunk, "text", "")
+                if text:
+                    chunks.append(text)
+                    yield text
+        except Exception as e:
+            self.logger.error(f"Error in GeminiLLM.astream_text: {str(e)}")
+            raise ValueError(f"Error calling Gemini API: {str(e)}")
+        # 最後まで生成できた応答だけを保存する（_acallと同じキーで共有する）
+        if cache is not None and chunks:
+            await run_blocking(cache.set, "gemini", self._model_name(), prompt, generation_config, "".join(chunks))
+
+@lru_cache(maxsize=1)
+def _install_chromedriver():
+    """ChromeDriverの自動インストールはプロセスごとに1回だけ行う"""
+    return chromedriver_autoinstaller.install()
+
+
 class CrawlerService:
-    def __init__(self):
-        """CrawlerServiceの初期化"""
+    def __init__(self, mode=None):
+        """CrawlerServiceの初期化
+        
+        Args:
+            mode: auto（必要になった時点でブラウザを起動）または http（ブラウザを起動しない）。
+                Noneの場合はCRAWLER_MODEに従う
+        """
         print("Initializing CrawlerService...")
         
         # 環境変数の読み込み
@@ -199,9 +339,45 @@ class CrawlerService:
         # HTTPクライアントの初期化
         self.client = httpx.Client(timeout=30.0)
         
-        # WebDriverの初期化
-        self.driver = None
-        self.setup_browser()
+        # 検索結果キャッシュの初期化
+        self.search_cache = self.setup_search_cache()
+        
+        # SERPのページ送り方式（offset: 結果オフセットで並列取得, click: 次ページボタンをクリック）
+        self.serp_pagination = os.getenv("SERP_PAGINATION_MODE", "offset").lower()
+        self.serp_max_concurrency = int(os.getenv("SERP_MAX_CONCURRENCY", "5"))
+        
+        # SERP取得後に各ページ本文を並列取得するかどうか
+        self.fetch_full_pages = os.getenv("FETCH_FULL_PAGES", "false").lower() == "true"
+        self.page_fetch_concurrency = int(os.getenv("PAGE_FETCH_CONCURRENCY", "10"))
+        self.page_fetch_max_bytes = int(os.getenv("PAGE_FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+        self.page_fetch_per_host = int(os.getenv("PAGE_FETCH_PER_HOST", "2"))
+        self.page_fetch_timeout = float(os.getenv("PAGE_FETCH_TIMEOUT", "10"))
+        self._page_fetch_semaphore = None
+        self._host_semaphores = None
+        
+        # ページ本文のHTTPキャッシュ（ETag / Last-Modifiedで再検証する）
+        self.http_cache = get_http_cache()
+        
+        # 内容の近似重複検出（転載・ミラー・AMP版などを統合する）
+        self.near_duplicate_detector = None
+        if os.getenv("NEAR_DUP_ENABLED", "true").lower() == "true":
+            self.near_duplicate_detector = NearDuplicateDetector(
+                threshold=float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))
+            )
+        self.near_duplicate_mode = os.getenv("NEAR_DUP_MODE", "drop").lower()
+        
+        # 検索バックエンド（sequential: 従来の順次実行, hedged: 登録したバックエンドをヘッジ付きで並列実行）
+        self.search_strategy = os.getenv("SEARCH_STRATEGY", "sequential").lower()
+        self.search_backends = self.setup_search_backends()
+        
+        # WebDriverプールは最初に必要になった時点で作成する（httpモードでは作成しない）
+        self.mode = (mode or os.getenv("CRAWLER_MODE", "auto")).lower()
+        self.browser_retry_interval = float(os.getenv("BROWSER_RETRY_INTERVAL", "60"))
+        self.driver_pool = None
+        self._browser_lock = threading.Lock()
+        self._browser_failed_at = None
+        # Chromeの起動オプション（light: eager読み込み・画像/フォント/広告等をブロック, default: 従来どおり）
+        self.browser_profile = get_browser_profile()
         
         # LLMの設定
         self.setup_llm()
@@ -211,54 +387,139 @@ class CrawlerService:
             
     def __del__(self):
         """クリーンアップ"""
+        self.close()
+
+    def close(self):
+        """HTTPクライアントとWebDriverプールを解放する"""
         if hasattr(self, 'client'):
             self.client.close()
-        if hasattr(self, 'driver') and self.driver is not None:
-            self.driver.quit()
+        if getattr(self, 'driver_pool', None) is not None:
+            self.driver_pool.close()
+        if getattr(self, 'search_cache', None) is not None:
+            self.search_cache.close()
+        if getattr(self, 'search_backends', None) is not None:
+            self.search_backends.close()
+
+    def setup_search_cache(self):
+        """検索結果キャッシュ（メモリLRU + SQLite）を作成する"""
+        if os.getenv("SEARCH_CACHE_ENABLED", "true").lower() != "true":
+            return None
+        return TwoTierCache(
+            "search_results",
+            max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "256")),
+            ttl=float(os.getenv("SEARCH_CACHE_TTL", "3600")),
+            db_path=os.getenv("SEARCH_CACHE_PATH", os.path.join(DEFAULT_CACHE_DIR, "search_cache.sqlite3")),
+            max_disk_entries=int(os.getenv("SEARCH_CACHE_MAX_DISK_ENTRIES", "10000"))
+        )
+
+    def setup_search_backends(self):
+        """Selenium・HTTP Bing・Firecrawlを検索バックエンドとして優先順に登録する"""
+        registry = SearchBackendRegistry(
+            deadline=float(os.getenv("SEARCH_DEADLINE", "20")),
+            default_hedge_delay=float(os.getenv("SEARCH_HEDGE_DELAY", "3")),
+            max_concurrent_searches=int(os.getenv("SEARCH_MAX_CONCURRENT", "4")),
+        )
+        backends = {
+            "http": SearchBackend("http", self._http_serp_search),
+            "selenium": SearchBackend(
+                "selenium", self._selenium_backend_search, available=lambda: not self._http_only()
+            ),
+            "firecrawl": SearchBackend(
+                "firecrawl", self._firecrawl_request, available=lambda: bool(os.getenv("FIRECRAWL_API_KEY"))
+            ),
+        }
+        # FirecrawlはヘッジのたびにAPIの利用枠を消費するため、既定では登録しない
+        for name in os.getenv("SEARCH_BACKENDS", "selenium,http").split(","):
+            backend = backends.get(name.strip().lower())
+            if backend is None:
+                self.logger.warning(f"Unknown search backend: {name}")
+                continue
+            backend.breaker = CircuitBreaker(
+                failure_threshold=int(os.getenv("SEARCH_BREAKER_THRESHOLD", "3")),
+                reset_timeout=float(os.getenv("SEARCH_BREAKER_RESET", "60")),
+            )
+            registry.register(backend)
+        return registry
+
+    def _search_cache_key(self, query, max_pages, fetch_pages=False):
+        """クエリ・ページ数・検索バックエンドからキャッシュキーを作成する"""
+        if getattr(self, 'search_strategy', 'sequential') == "hedged":
+            backend = "hedged"
+        elif getattr(self, 'serp_pagination', 'click') == "offset":
+            backend = "offset"
+        else:
+            backend = "http" if self._http_only() else "selenium"
+        if fetch_pages:
+            backend += "+pages"
+        return make_search_key(query, max_pages, backend)
+
+    def _get_cached_results(self, cache_key):
+        """キャッシュされた検索結果を取得する"""
+        if self.search_cache is None:
+            return None
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            self.logger.info(f"Search cache hit: {cache_key}")
+        return cached
+
+    def _store_cached_results(self, cache_key, results):
+        """検索結果をキャッシュに保存する
+        
+        ブラウザが使えない間のフォールバック検索（1回のリクエストで最大5件）の結果は保存しない。
+        保存するとブラウザの復旧後もTTLの間は縮退した結果を返すことになるため。
+        """
+        if self.search_cache is None or not results:
+            return
+        if any(result.get('metadata', {}).get('source') == 'fallback' for result in results):
+            self.logger.info(f"Not caching fallback search results: {cache_key}")
+            return
+        self.search_cache.set(cache_key, results)
 
     def setup_browser(self):
-        """ブラウザの設定を行う"""
+        """WebDriverプールを作成し、ドライバーを事前作成する"""
         try:
             browser_type = os.getenv("SELENIUM_BROWSER", "chrome").lower()
-            self.logger.info(f"Setting up browser: {browser_type}")
+            self.logger.info(f"Setting up browser pool: {browser_type}")
             
-            if browser_type == "chrome":
-                # ChromeDriverの自動インストール
-                chromedriver_autoinstaller.install()
-                
-                # Chromeオプションの設定
-                chrome_options = webdriver.ChromeOptions()
-                chrome_options.add_argument("--headless")
-                chrome_options.add_argument("--no-sandbox")
-                chrome_options.add_argument("--disable-dev-shm-usage")
-                chrome_options.add_argument("--disable-gpu")
-                chrome_options.add_argument("--window-size=1920,1080")
-                chrome_options.add_argument("--disable-extensions")
-                chrome_options.add_argument("--disable-infobars")
-                
-                # 日本語対応
-                chrome_options.add_argument("--lang=ja")
-                chrome_options.add_argument("--accept-lang=ja")
-                
-                # UserAgentの設定
-                chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-                
-                try:
-                    self.driver = webdriver.Chrome(options=chrome_options)
-                    self.logger.info("Chrome WebDriver initialized successfully")
-                except Exception as e:
-                    self.logger.error(f"Failed to initialize Chrome WebDriver: {str(e)}")
-                    self.setup_chrome_fallback()
-            elif browser_type == "firefox":
-                # ... 既存のFirefoxコード ...
-                pass
-            else:
-                self.logger.warning(f"Unsupported browser type: {browser_type}, falling back to Chrome")
-                self.setup_chrome_fallback()
+            if self.driver_pool is None:
+                self.driver_pool = WebDriverPool(
+                    self._create_driver,
+                    size=int(os.getenv("WEBDRIVER_POOL_SIZE", "2")),
+                    lease_timeout=float(os.getenv("WEBDRIVER_LEASE_TIMEOUT", "30"))
+                )
+            
+            # 必要になった時点で呼ばれるため、少なくとも1つは作成する
+            warmed = self.driver_pool.warm_up(max(1, int(os.getenv("WEBDRIVER_WARMUP", "1"))))
+            return warmed > 0 or self.driver_pool.stats()["created"] > 0
                 
         except Exception as e:
             self.logger.error(f"Error setting up browser: {str(e)}")
-            self.setup_chrome_fallback()
+            return False
+
+    def _create_driver(self):
+        """プール用に新しいWebDriverを作成する"""
+        browser_type = os.getenv("SELENIUM_BROWSER", "chrome").lower()
+        
+        if browser_type == "chrome":
+            # ChromeDriverの自動インストール
+            _install_chromedriver()
+            
+            # Chromeオプションの設定（lightプロファイルではeager読み込み・不要なリソースのブロック）
+            chrome_options = self.browser_profile.apply(webdriver.ChromeOptions())
+            
+            try:
+                driver = self.browser_profile.configure(webdriver.Chrome(options=chrome_options))
+                self.logger.info(f"Chrome WebDriver initialized successfully (profile: {self.browser_profile.name})")
+                return driver
+            except Exception as e:
+                self.logger.error(f"Failed to initialize Chrome WebDriver: {str(e)}")
+                return self.setup_chrome_fallback()
+        elif browser_type == "firefox":
+            # ... 既存のFirefoxコード ...
+            return None
+        else:
+            self.logger.warning(f"Unsupported browser type: {browser_type}, falling back to Chrome")
+            return self.setup_chrome_fallback()
     
     def setup_chrome_fallback(self):
         """ChromeDriverを使用してブラウザをセットアップする（フォールバック）"""
@@ -266,23 +527,45 @@ class CrawlerService:
             self.logger.info("ChromeDriverを使用してブラウザをセットアップしています...")
             
             # ChromeDriverの自動インストール
-            chromedriver_autoinstaller.install()
+            _install_chromedriver()
             
             # Chromeオプションの設定
-            chrome_options = webdriver.ChromeOptions()
-            chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--lang=ja')
-            chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+            chrome_options = self.browser_profile.apply(webdriver.ChromeOptions())
             
             # WebDriverの初期化
-            self.browser = webdriver.Chrome(options=chrome_options)
+            driver = self.browser_profile.configure(webdriver.Chrome(options=chrome_options))
             self.logger.info("ChromeDriverの初期化に成功しました")
-            return True
+            return driver
         except Exception as e:
             self.logger.error(f"ChromeWebDriverの初期化に失敗しました: {str(e)}")
+            return None
+
+    def _browser_available(self):
+        """WebDriverプールが利用可能かどうか"""
+        return self.driver_pool is not None and self.driver_pool.stats()["created"] > 0
+
+    def _http_only(self):
+        """ブラウザを起動しないモードかどうか"""
+        return getattr(self, 'mode', 'auto') == "http"
+
+    def _ensure_browser(self):
+        """必要になった時点でWebDriverプールを起動する（失敗後はBROWSER_RETRY_INTERVAL秒再試行しない）"""
+        if self._http_only():
+            return False
+        if self._browser_available():
+            return True
+        with self._browser_lock:
+            if self._browser_available():
+                return True
+            if self._browser_failed_at is not None and \
+                    time.monotonic() - self._browser_failed_at < self.browser_retry_interval:
+                return False
+            started = time.perf_counter()
+            if self.setup_browser():
+                self._browser_failed_at = None
+                self.logger.info(f"Browser started on first use in {time.perf_counter() - started:.2f}s")
+                return True
+            self._browser_failed_at = time.monotonic()
             return False
 
     def setup_llm(self):
@@ -366,125 +649,208 @@ class CrawlerService:
 
     def _selenium_search(self, query, max_pages=5):
         """Seleniumを使用した検索"""
-        if self.driver is None:
+        if not self._ensure_browser():
             print("WebDriver is not initialized, falling back to alternative search methods")
             return self._fallback_search(query)
         
-        results = []
         try:
-            # Bingで検索
-            self.driver.get(f"https://www.bing.com/search?q={quote_plus(query)}")
-            
-            # 検索結果を待機
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "ol#b_results li.b_algo"))
-            )
-            
-            # 指定されたページ数まで結果を取得
-            for page in range(min(max_pages, 10)):  # 最大10ページまで
-                # 現在のページの検索結果を解析
-                soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-                search_results = soup.select("ol#b_results li.b_algo")
-                
-                for result in search_results:
-                    title_elem = result.select_one("h2 a")
-                    if not title_elem:
-                        continue
-                    
-                    title = title_elem.get_text()
-                    url = title_elem.get('href', '')
-                    
-                    # URLが有効かチェック
-                    if not url.startswith(('http://', 'https://')):
-                        continue
-                    
-                    # 説明文を取得
-                    snippet_elem = result.select_one(".b_caption p")
-                    snippet = snippet_elem.get_text() if snippet_elem else ""
-                    
-                    # 結果を追加
-                    results.append({
-                        'title': title,
-                        'url': url,
-                        'content': snippet,
-                        'metadata': {
-                            'source': 'bing',
-                            'page': page + 1,
-                            'summary': snippet[:100] + "..." if len(snippet) > 100 else snippet
-                        }
-                    })
-                
-                # 次のページがあるか確認
-                next_page = self.driver.find_elements(By.CSS_SELECTOR, "a.sb_pagN")
-                if page < max_pages - 1 and next_page:
-                    next_page[0].click()
-                    time.sleep(2)  # ページ読み込みを待機
-                    WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "ol#b_results li.b_algo"))
-                    )
-                else:
-                    break
-            
-            return results
+            return self._selenium_search_pooled(query, max_pages)
         except Exception as e:
             error_msg = f"Selenium search failed: {str(e)}"
             self.logger.error(error_msg)
             print(error_msg)
             return self._fallback_search(query)
 
+    def _selenium_search_pooled(self, query, max_pages=5):
+        """プールからドライバーを借りてSelenium検索を行う（失敗時は例外を送出）"""
+        with self.driver_pool.lease() as driver:
+            return self._selenium_search_with_driver(driver, query, max_pages)
+
+    def _selenium_search_with_driver(self, driver, query, max_pages=5):
+        """貸し出されたドライバーでBing検索を行う"""
+        results = []
+        # Bingで検索
+        self._load_page(driver, f"https://www.bing.com/search?q={quote_plus(query)}")
+        
+        # 検索結果を待機
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "ol#b_results li.b_algo"))
+        )
+        
+        # 指定されたページ数まで結果を取得
+        for page in range(min(max_pages, 10)):  # 最大10ページまで
+            # 現在のページの検索結果を解析
+            results.extend(self._parse_bing_results(driver.page_source, source='bing', page=page + 1))
+            
+            # 次のページがあるか確認
+            next_page = driver.find_elements(By.CSS_SELECTOR, "a.sb_pagN")
+            if page < max_pages - 1 and next_page:
+                next_page[0].click()
+                time.sleep(2)  # ページ読み込みを待機
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "ol#b_results li.b_algo"))
+                )
+            else:
+                break
+        
+        return results
+
+    def _load_page(self, driver, url):
+        """ページを開く。読み込みがタイムアウトした場合は読み込みを止め、取得済みのDOMで続ける"""
+        try:
+            driver.get(url)
+        except TimeoutException:
+            self.logger.warning(f"Page load timed out, stopping: {url}")
+            driver.execute_script("window.stop();")
+
+    def _serp_page_url(self, query, page):
+        """Bing SERPのURLを結果オフセット付きで作成する（page は1始まり）"""
+        url = f"https://www.bing.com/search?q={quote_plus(query)}&setlang=ja"
+        if page > 1:
+            url += f"&first={(page - 1) * 10 + 1}"
+        return url
+
+    def _is_serp_blocked(self, status_code, html):
+        """HTTPでのSERP取得がブロックされたかどうかを判定する"""
+        if status_code in (403, 429, 503):
+            return True
+        lowered = html[:20000].lower()
+        return 'b_results' not in lowered or 'captcha' in lowered
+
+    def _fetch_serp_page(self, query, page, browser_fallback=True):
+        """SERPの1ページをHTTPで取得し、ブロックされた場合はブラウザで取得する"""
+        url = self._serp_page_url(query, page)
+        try:
+            response = self.client.get(url, headers=DEFAULT_HEADERS)
+            if not self._is_serp_blocked(response.status_code, response.text):
+                return self._parse_bing_results(response.text, source='bing', page=page)
+            self.logger.info(f"HTTP SERP fetch blocked for page {page}")
+        except Exception as e:
+            self.logger.warning(f"HTTP SERP fetch failed for page {page}: {str(e)}")
+        if not browser_fallback:
+            return []
+        return self._fetch_serp_page_with_browser(query, page)
+
+    async def _afetch_serp_page(self, query, page, semaphore):
+        """_fetch_serp_pageの非同期版"""
+        url = self._serp_page_url(query, page)
+        async with semaphore:
+            try:
+                response = await get_async_client().get(url, headers=DEFAULT_HEADERS)
+                if not self._is_serp_blocked(response.status_code, response.text):
+                    return await run_blocking(self._parse_bing_results, response.text, 'bing', page)
+                self.logger.info(f"HTTP SERP fetch blocked for page {page}, using browser")
+            except Exception as e:
+                self.logger.warning(f"HTTP SERP fetch failed for page {page}: {str(e)}")
+        return await run_blocking(self._fetch_serp_page_with_browser, query, page)
+
+    def _fetch_serp_page_with_browser(self, query, page):
+        """プールのドライバーでSERPの1ページを取得する（ページ送りのクリックは行わない）"""
+        if not self._ensure_browser():
+            return []
+        try:
+            with self.driver_pool.lease() as driver:
+                self._load_page(driver, self._serp_page_url(query, page))
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "ol#b_results li.b_algo"))
+                )
+                return self._parse_bing_results(driver.page_source, source='bing', page=page)
+        except Exception as e:
+            self.logger.error(f"Browser SERP fetch failed for page {page}: {str(e)}")
+            return []
+
+    def _merge_serp_pages(self, pages):
+        """ページごとの結果をページ番号・ページ内順位の順に結合し、通し順位を付与する
+        
+        結果オフセットで取得すると前のページと同じ結果が含まれることがあるため、最初の出現だけを残す。
+        """
+        merged = []
+        seen = set()
+        for page_results in pages:
+            if isinstance(page_results, Exception):
+                self.logger.error(f"SERP page fetch failed: {str(page_results)}")
+                continue
+            for result in page_results:
+                key = url_key(result['url'])
+                if key not in seen:
+                    seen.add(key)
+                    merged.append(result)
+        for rank, result in enumerate(merged, 1):
+            result.setdefault('metadata', {})['rank'] = rank
+        return merged
+
+    def _offset_serp_search(self, query, max_pages=5, browser_fallback=True):
+        """SERPの各ページを結果オフセットで並列に取得する"""
+        pages = range(1, min(max_pages, 10) + 1)  # 最大10ページまで
+        page_results = map_blocking(
+            lambda page: self._fetch_serp_page(query, page, browser_fallback), pages, self.serp_max_concurrency
+        )
+        return self._merge_serp_pages(page_results)
+
+    def _http_serp_search(self, query, max_pages=5):
+        """HTTPのみでSERPを取得する検索バックエンド（ブロックされた場合は失敗として扱う）"""
+        results = self._offset_serp_search(query, max_pages, browser_fallback=False)
+        if not results:
+            raise RuntimeError("HTTP SERP fetch returned no results")
+        return results
+
+    def _selenium_backend_search(self, query, max_pages=5):
+        """ブラウザでSERPを取得する検索バックエンド"""
+        if not self._ensure_browser():
+            raise RuntimeError("WebDriver is not available")
+        return self._selenium_search_pooled(query, max_pages)
+
+    async def _aoffset_serp_search(self, query, max_pages=5):
+        """_offset_serp_searchの非同期版"""
+        pages = range(1, min(max_pages, 10) + 1)  # 最大10ページまで
+        semaphore = asyncio.Semaphore(self.serp_max_concurrency)
+        page_results = await asyncio.gather(
+            *[self._afetch_serp_page(query, page, semaphore) for page in pages],
+            return_exceptions=True
+        )
+        return self._merge_serp_pages(page_results)
+
     def crawl(self, query, max_pages=5):
         """指定されたクエリでウェブ検索を実行し、結果を返す"""
         self.logger.info(f"Crawling for query: {query}, max_pages: {max_pages}")
         
+        # キャッシュヒット時はブラウザを使用しない
+        cache_key = self._search_cache_key(query, max_pages)
+        cached = self._get_cached_results(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            # WebDriverが初期化されていない場合は初期化を試みる
-            if self.driver is None:
-                browser_initialized = self.setup_browser()
-                if not browser_initialized:
-                    self.logger.warning("WebDriver initialization failed, using fallback search")
+            if self.search_strategy == "hedged":
+                # 登録された検索バックエンドをヘッジ付きで並列に実行し、期限内の結果を結合する
+                results = self.search_backends.search(query, max_pages)
+            elif self.serp_pagination == "offset":
+                # 結果オフセットで各ページを並列取得（HTTP優先、ブロック時のみブラウザ）
+                results = self._offset_serp_search(query, max_pages)
+            else:
+                # WebDriverが起動していない場合はここで起動する（httpモードでは起動しない）
+                if not self._ensure_browser():
+                    self.logger.warning("WebDriver is not available, using fallback search")
                     return self._fallback_search(query)
+                
+                # Seleniumを使用した検索
+                results = self._selenium_search(query, max_pages)
             
-            # Seleniumを使用した検索
-            results = self._selenium_search(query, max_pages)
-            
-            # 結果が少ない場合はFirecrawl APIを使用
-            if len(results) < 3:
+            # 結果が少ない場合はFirecrawl APIを使用（hedgedではFirecrawlもバックエンドの1つ）
+            if len(results) < 3 and self.search_strategy != "hedged":
                 print("Few results from Selenium search, trying Firecrawl API...")
                 firecrawl_results = self._firecrawl_search(query, max_pages)
                 results.extend(firecrawl_results)
             
-            # 重複を除去
-            unique_results = []
-            urls = set()
-            for result in results:
-                url = result.get('url')
-                if url and url not in urls:
-                    urls.add(url)
-                    unique_results.append(result)
+            unique_results = self._postprocess_results(results)
             
             # 結果が空の場合
             if not unique_results:
                 print("No results found, trying fallback search")
                 return self._fallback_search(query)
             
-            # 感情分析を追加
-            for result in unique_results:
-                sentiment = self._analyze_sentiment(result.get('content', ''))
-                if 'metadata' not in result:
-                    result['metadata'] = {}
-                result['metadata']['sentiment'] = sentiment
-            
-            # インサイトを抽出
-            insights = self._extract_insights("\n".join([r.get('content', '') for r in unique_results]))
-            
-            # 結果にタイムスタンプを追加
-            timestamp = datetime.now().isoformat()
-            for result in unique_results:
-                if 'metadata' not in result:
-                    result['metadata'] = {}
-                result['metadata']['timestamp'] = timestamp
-            
             self.logger.info(f"Crawling completed. Found {len(unique_results)} unique results.")
+            self._store_cached_results(cache_key, unique_results)
             return unique_results
             
         except Exception as e:
@@ -496,83 +862,295 @@ class CrawlerService:
             print("Error occurred during crawling, returning empty results")
             return []
 
-    def _analyze_sentiment(self, text):
-        """テキストの感情分析を行う"""
-        if not text:
-            return "neutral"
+    async def acrawl(self, query, max_pages=5, fetch_pages=None, job_id=None):
+        """crawlの非同期版。ブロッキング処理はExecutorへ逃がし、HTTPは共有AsyncClientで行う
+        
+        Args:
+            query: 検索クエリ
+            max_pages: 取得するSERPの最大ページ数
+            fetch_pages: 各結果のページ本文を取得するか（Noneの場合はFETCH_FULL_PAGESに従う）
+            job_id: チェックポイントのID。同じIDで再実行すると検索結果と取得済みのページ本文を再利用する
+        """
+        self.logger.info(f"Async crawling for query: {query}, max_pages: {max_pages}")
         
-        # 簡易的な感情分析
-        positive_words = ["良い", "素晴らしい", "優れた", "最高", "成功", "幸せ", "positive", "excellent", "good", "great"]
-        negative_words = ["悪い", "最悪", "失敗", "問題", "危険", "不満", "negative", "bad", "worst", "problem"]
+        if fetch_pages is None:
+            fetch_pages = getattr(self, 'fetch_full_pages', False)
+        cache_key = self._search_cache_key(query, max_pages, fetch_pages)
+        cached = self._get_cached_results(cache_key)
+        if cached is not None:
+            return cached
         
-        text_lower = text.lower()
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        checkpoint = None
+        if job_id:
+            checkpoint = get_crawl_checkpoints().job(job_id, interval=checkpoint_interval())
         
-        if positive_count > negative_count:
-            return "positive"
-        elif negative_count > positive_count:
-            return "negative"
-        else:
-            return "neutral"
+        try:
+            if checkpoint is not None and checkpoint.resumed:
+                # 中断したジョブの検索結果から再開する（検索はやり直さない）
+                self.logger.info(f"Resuming crawl job {job_id} ({len(checkpoint.pages)} pages already fetched)")
+                results = checkpoint.state.get("results", [])
+            elif self.search_strategy == "hedged":
+                # バックエンドの競争は期限まで待機するため、共有Executorではなくレジストリ専用のExecutorで行う
+                results = await self.search_backends.asearch(query, max_pages)
+            elif self.serp_pagination == "offset":
+                # 結果オフセットで各ページを並列取得（HTTP優先、ブロック時のみブラウザ）
+                results = await self._aoffset_serp_search(query, max_pages)
+            else:
+                if not await run_blocking(self._ensure_browser):
+                    self.logger.warning("WebDriver is not available, using async fallback search")
+                    return await self._afallback_search(query)
+                
+                # Seleniumを使用した検索（ブロッキングのためExecutorで実行）
+                results = await run_blocking(self._selenium_search_or_empty, query, max_pages)
+                if not results:
+                    results = await self._afallback_search(query)
+            
+            # 結果が少ない場合はFirecrawl APIを使用（hedgedではFirecrawlもバックエンドの1つ）
+            resumed = checkpoint is not None and checkpoint.resumed
+            if len(results) < 3 and self.search_strategy != "hedged" and not resumed:
+                self.logger.info("Few results from Selenium search, trying Firecrawl API...")
+                firecrawl_results = await run_blocking(self._firecrawl_search, query, max_pages)
+                results.extend(firecrawl_results)
+            
+            unique_results = self._dedupe_results(results)
+            if checkpoint is not None and not resumed:
+                checkpoint.flush({"query": query, "results": unique_results})
+            
+            # 重複除去後のURLについてページ本文を並列取得する
+            if fetch_pages and unique_results:
+                await self._afetch_full_pages(unique_results, checkpoint)
+            
+            # 本文取得後の内容で近似重複を統合する
+            unique_results = await run_blocking(self._dedupe_near_duplicates, unique_results)
+            # 辞書照合・TF-IDF（SQLiteへの書き込みを含む）・TextRankは本文全体を走査するためスレッドで実行する
+            unique_results = await run_blocking(self._annotate_results, unique_results)
+            
+            if not unique_results:
+                self.logger.info("No results found, trying async fallback search")
+                return await self._afallback_search(query)
+            
+            self.logger.info(f"Async crawling completed. Found {len(unique_results)} unique results.")
+            self._store_cached_results(cache_key, unique_results)
+            return unique_results
+            
+        except Exception as e:
+            self.logger.error(f"Error during async crawling: {str(e)}")
+            return []
 
-    def _extract_insights(self, text):
-        """テキストからインサイトを抽出する"""
-        if not text:
+    def _selenium_search_or_empty(self, query, max_pages=5):
+        """Selenium検索のみを行い、失敗時は空リストを返す（HTTPフォールバックは呼び出し側で非同期に行う）"""
+        if not self._ensure_browser():
+            return []
+        try:
+            return self._selenium_search_pooled(query, max_pages)
+        except WebDriverPoolTimeout as e:
+            self.logger.warning(f"WebDriver lease timed out: {str(e)}")
+            return []
+        except Exception as e:
+            self.logger.error(f"Selenium search failed: {str(e)}")
             return []
+
+    def _postprocess_results(self, results):
+        """重複除去・感情分析・タイムスタンプ付与を行う"""
+        return self._annotate_results(self._dedupe_near_duplicates(self._dedupe_results(results)))
+
+    def _dedupe_near_duplicates(self, results):
+        """内容のフィンガープリントで近似重複を統合する"""
+        detector = getattr(self, 'near_duplicate_detector', None)
+        if detector is None or len(results) < 2:
+            return results
+        return detector.dedupe(results, mode=self.near_duplicate_mode)
+
+    def _dedupe_results(self, results):
+        """URLの重複を除去する"""
+        unique_results = []
+        urls = set()
+        for result in results or []:
+            url = result.get('url')
+            if not url:
+                continue
+            # http/https, www, AMP版などの違いを同一視する
+            key = url_key(url)
+            if key not in urls:
+                urls.add(key)
+                unique_results.append(result)
+        return unique_results
+
+    def _annotate_results(self, unique_results):
+        """感情分析・タイムスタンプを付与する"""
+        if not unique_results:
+            return []
+        
+        # 感情分析を追加（辞書のオートマトンで各結果を1回ずつ走査する）
+        sentiments = get_lexicon().sentiments([result.get('content', '') for result in unique_results])
+        for result, sentiment in zip(unique_results, sentiments):
+            if 'metadata' not in result:
+                result['metadata'] = {}
+            result['metadata']['sentiment'] = sentiment
         
-        # 簡易的なインサイト抽出
-        insights = []
+        # キーワードを結果全体でまとめて抽出する（文書頻度は調査をまたいで蓄積される）
+        keywords, _ = get_keyword_extractor().extract_batch([result.get('content', '') for result in unique_results])
+        for result, result_keywords in zip(unique_results, keywords):
+            result['metadata']['keywords'] = result_keywords
         
-        # 文を分割
-        sentences = re.split(r'[.!?。！？]', text)
+        # 各結果の重要文を抽出する（LLMへの入力を要点に絞るために使う）
+        key_sentences, corpus_sentences = get_text_rank().summarize(
+            [result.get('content', '') for result in unique_results]
+        )
+        corpus_rank = {sentence: rank for rank, sentence in enumerate(corpus_sentences)}
+        for result, sentences in zip(unique_results, key_sentences):
+            result['metadata']['key_sentences'] = sentences
+            # 全体の重要文は抽出元の結果に順位とともに記録する（キャッシュ・チェックポイントにも残る）
+            result['metadata']['corpus_key_sentences'] = [
+                {"rank": corpus_rank.pop(sentence), "sentence": sentence}
+                for sentence in sentences if sentence in corpus_rank
+            ]
         
-        # 重要そうな文を選択（長さや特定のキーワードに基づく）
-        important_keywords = ["重要", "主要", "特徴", "特性", "結論", "研究", "調査", "分析", "important", "key", "significant"]
+        # 結果にタイムスタンプを追加
+        timestamp = datetime.now().isoformat()
+        for result in unique_results:
+            if 'metadata' not in result:
+                result['metadata'] = {}
+            result['metadata']['timestamp'] = timestamp
         
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if len(sentence) > 20 and len(sentence) < 200:  # 適切な長さの文
-                # 重要なキーワードを含む文を優先
-                if any(keyword in sentence.lower() for keyword in important_keywords):
-                    insights.append(sentence)
-                # 一定数のインサイトを集めたら終了
-                if len(insights) >= 5:
-                    break
+        return unique_results
+
+    def _extract_main_content(self, html, max_chars=10000):
+        """HTMLから本文とタイトル・著者・公開日時を抽出する（ナビゲーション・フッター等は除く）"""
+        # 本文がmax_charsに達した時点で解析をやめる
+        article = extract_article(html, max_chars=max_chars)
+        article['title'] = article['title'] or "No title"
+        return article
+
+    def _host_semaphore(self, url):
+        """ホストごとの同時接続数を制限するセマフォを返す"""
+        if self._host_semaphores is None:
+            self._host_semaphores = defaultdict(lambda: asyncio.Semaphore(self.page_fetch_per_host))
+        return self._host_semaphores[urlsplit(url).netloc.lower()]
+
+    async def _afetch_page_text(self, url):
+        """1ページを取得して本文を抽出する（ホストごとの速度制限・robots.txtはスケジューラーが管理する）"""
+        return await get_fetch_scheduler().fetch(url, self._afetch_page_text_once)
+
+    async def _afetch_page_text_once(self, url):
+        """1ページを取得して本文を抽出する（全体上限とホストごとの上限の両方を守る）"""
+        if self._page_fetch_semaphore is None:
+            self._page_fetch_semaphore = asyncio.Semaphore(self.page_fetch_concurrency)
         
-        # インサイトが少ない場合は、長さだけで選択
-        if len(insights) < 3:
-            for sentence in sentences:
-                sentence = sentence.strip()
-                if len(sentence) > 30 and sentence not in insights:
-                    insights.append(sentence)
-                if len(insights) >= 5:
-                    break
+        async with self._page_fetch_semaphore, self._host_semaphore(url):
+            # 本文はストリーミングで上限バイト数まで読み込み、HTML以外はダウンロードしない
+            response = await cached_get(
+                get_async_client(), url, getattr(self, 'http_cache', None),
+                max_bytes=getattr(self, 'page_fetch_max_bytes', None), accept=HTML_CONTENT_TYPES,
+                timeout=self.page_fetch_timeout
+            )
+            raise_for_throttle(url, response.status_code, response.headers)
+            response.raise_for_status()
+            html = decode_body(response.content, response.headers.get('content-type', ''))
         
-        return insights
+        # 解析はCPU処理のためExecutorで行い、セマフォは保持しない
+        return await run_blocking(self._extract_main_content, html)
 
-    def _extract_keywords(self, text):
-        """テキストからキーワードを抽出する"""
-        if not text:
-            return []
+    async def _afetch_full_pages(self, results, checkpoint=None):
+        """検索結果の各URLを並列に取得し、本文をcontentに設定する
         
-        # 簡易的なキーワード抽出
-        # ストップワードを定義
-        stop_words = ["の", "に", "は", "を", "た", "が", "で", "て", "と", "し", "れ", "さ", "ある", "いる", "する", "から", "など", "まで", "として", "について", "the", "a", "an", "in", "on", "at", "of", "for", "with", "by", "to", "and", "or", "but"]
+        checkpointを指定した場合は取得済みのページを再取得せず、新しく取得したページを定期的に保存する
+        """
+        async def fetch(url):
+            if checkpoint is not None:
+                saved = checkpoint.get(url)
+                if saved is not None:
+                    return saved
+            article = await self._afetch_page_text(url)
+            if checkpoint is not None:
+                checkpoint.add_page(url, article)
+                if checkpoint.due():
+                    checkpoint.flush()
+            return article
         
-        # 単語を分割して頻度をカウント
-        words = re.findall(r'\w+', text.lower())
-        word_count = {}
+        try:
+            texts = await asyncio.gather(
+                *[fetch(result['url']) for result in results],
+                return_exceptions=True
+            )
+        finally:
+            if checkpoint is not None:
+                checkpoint.flush()
         
-        for word in words:
-            if len(word) > 1 and word not in stop_words:
-                word_count[word] = word_count.get(word, 0) + 1
+        fetched = 0
+        for result, page in zip(results, texts):
+            metadata = result.setdefault('metadata', {})
+            if isinstance(page, Exception):
+                self.logger.warning(f"Page fetch failed for {result['url']}: {str(page)}")
+                metadata['full_content'] = False
+                continue
+            text = page['text']
+            if text.strip():
+                if not result.get('snippet'):
+                    result['snippet'] = result.get('content', '')
+                result['content'] = text
+                fetched += 1
+            metadata['full_content'] = bool(text.strip())
+            # 本文抽出で見つかった著者・公開日時（_generate_combined_textで使う）
+            for key in ('author', 'date'):
+                if page.get(key) and not metadata.get(key):
+                    metadata[key] = page[key]
+        
+        self.logger.info(f"Fetched full content for {fetched}/{len(results)} pages")
+        return results
+
+    def _analyze_sentiment(self, text):
+        """テキストの感情分析を行う"""
+        # 簡易的な感情分析（肯定語・否定語の辞書はLEXICON_PATHで変更できる）
+        return get_lexicon().sentiment(text)
+
+    def _extract_insights(self, text):
+        """テキストからインサイト（TextRankで選んだ重要文）を抽出する"""
+        if not text:
+            return []
+        return get_text_rank().key_sentences(text, top_k=5)
+
+    def _extract_keywords(self, text):
+        """テキストからキーワードを抽出する（TF-IDF, 日本語は文字種とn-gramで分割）"""
+        if not text:
+            return []
         
-        # 頻度順にソート
-        sorted_words = sorted(word_count.items(), key=lambda x: x[1], reverse=True)
+        # 蓄積された文書頻度を使い、このテキストでは更新しない
+        keywords, _ = get_keyword_extractor().extract_batch([text], update=False)
+        return keywords[0]
+
+    def _parse_bing_results(self, html, source='bing', page=None, limit=None):
+        """BingのSERP HTMLから検索結果を抽出する（高速パーサーを優先して使用）"""
+        results = []
+        for item in parse_bing_results(html):
+            if limit is not None and len(results) >= limit:
+                break
+            
+            title = item['title']
+            # リダイレクトの展開・トラッキングパラメーターの除去
+            url = canonicalize_url(item['url'])
+            
+            # URLが有効かチェック
+            if not url.startswith(('http://', 'https://')):
+                continue
+            
+            snippet = item['snippet']
+            metadata = {
+                'source': source,
+                'summary': snippet[:100] + "..." if len(snippet) > 100 else snippet
+            }
+            if page is not None:
+                metadata['page'] = page
+            
+            # 結果を追加
+            results.append({
+                'title': title,
+                'url': url,
+                'content': snippet,
+                'metadata': metadata
+            })
         
-        # 上位10個を返す
-        return [word for word, count in sorted_words[:10]]
+        return results
 
     def _fallback_search(self, query):
         """フォールバック検索を実行する"""
@@ -582,47 +1160,12 @@ class CrawlerService:
             # Bingでの検索URL
             search_url = f"https://www.bing.com/search?q={quote_plus(query)}&setlang=ja"
             
-            # リクエストヘッダー
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                "Accept-Language": "ja,en-US;q=0.9,en;q=0.8"
-            }
-            
             # リクエスト送信
-            response = self.client.get(search_url, headers=headers)
+            response = self.client.get(search_url, headers=DEFAULT_HEADERS)
             response.raise_for_status()
             
-            # HTMLの解析
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 検索結果の抽出
-            results = []
-            for i, result in enumerate(soup.select("li.b_algo")):
-                if i >= 5:  # 最大5件まで
-                    break
-                    
-                # タイトルとURLを取得
-                title_elem = result.select_one("h2 a")
-                if not title_elem:
-                    continue
-                    
-                title = title_elem.get_text()
-                url = title_elem.get("href", "")
-                
-                # 説明文を取得
-                snippet_elem = result.select_one(".b_caption p")
-                snippet = snippet_elem.get_text() if snippet_elem else ""
-                
-                # 結果を追加
-                results.append({
-                    'title': title,
-                    'url': url,
-                    'content': snippet,
-                    'metadata': {
-                        'source': 'fallback',
-                        'summary': snippet[:100] + "..." if len(snippet) > 100 else snippet
-                    }
-                })
+            # HTMLの解析（最大5件まで）
+            results = self._parse_bing_results(response.text, source='fallback', limit=5)
             
             if not results:
                 print("No results from fallback search")
@@ -635,11 +1178,26 @@ class CrawlerService:
             self.logger.error(error_msg)
             print(error_msg)
             return []
+
+    async def _afallback_search(self, query):
+        """共有AsyncClientを使用したフォールバック検索"""
+        try:
+            self.logger.info(f"Executing async fallback search for query: {query}")
+            
+            search_url = f"https://www.bing.com/search?q={quote_plus(query)}&setlang=ja"
+            response = await get_async_client().get(search_url, headers=DEFAULT_HEADERS)
+            response.raise_for_status()
+            
+            # HTMLの解析はCPU処理のためExecutorで実行
+            return await run_blocking(self._parse_bing_results, response.text, 'fallback', None, 5)
+            
+        except Exception as e:
+            self.logger.error(f"Async fallback search failed: {str(e)}")
+            return []
     
-    async def deep_crawl(self, query, max_pages=5):
+    async def deep_crawl(self, query, max_pages=5, fetch_pages=None, job_id=None):
         """非同期での深層クローリング"""
-        # 同期メソッドを呼び出す
-        return self.crawl(query, max_pages)
+        return await self.acrawl(query, max_pages, fetch_pages=fetch_pages, job_id=job_id)
             
     def _create_error_result(self, query, error_message):
         """エラー結果を作成する"""
@@ -657,24 +1215,9 @@ class CrawlerService:
     async def analyze_webpage(self, url: str) -> SearchResult:
         """指定されたURLのウェブページを分析する"""
         try:
-            # ウェブページの取得
-            response = self.client.get(url)
-            response.raise_for_status()
-            
-            # HTMLの解析
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # タイトルの取得
-            title = soup.title.string if soup.title else "No title"
-            
-            # メインコンテンツの取得（簡易的な実装）
-            main_content = ""
-            for tag in soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-                main_content += tag.get_text() + "\n"
-            
-            # コンテンツが長すぎる場合は分割
-            if len(main_content) > 10000:
-                main_content = main_content[:10000] + "..."
+            # ウェブページの取得と解析
+            article = await self._afetch_page_text(url)
+            title, main_content = article['title'], article['text']
             
             # Chain of Thought分析
             analysis = await self.cot_chain.arun(content=main_content)
@@ -686,7 +1229,9 @@ class CrawlerService:
                 snippet=main_content[:200] + "..." if len(main_content) > 200 else main_content,
                 timestamp=datetime.now().isoformat(),
                 source="web",
-                analysis=analysis
+                analysis=analysis,
+                author=article.get('author') or None,
+                date=article.get('date') or None
             )
 
         except Exception as e:
@@ -706,34 +1251,36 @@ class CrawlerService:
     def _firecrawl_search(self, query, count):
         """Firecrawl APIを使用した検索"""
         try:
-            api_key = os.getenv("FIRECRAWL_API_KEY")
-            if not api_key:
+            if not os.getenv("FIRECRAWL_API_KEY"):
                 print("Firecrawl API key not found, skipping Firecrawl search")
                 return []
-            
-            firecrawl = FirecrawlApp(api_key=api_key)
-            firecrawl_results = firecrawl.search(query, count=count)
-            
-            # 結果の形式を統一
-            formatted_results = []
-            for result in firecrawl_results:
-                formatted_result = {
-                    'title': result.get('title', 'No Title'),
-                    'url': result.get('url', ''),
-                    'content': result.get('text', ''),
-                    'snippet': result.get('text', '')[:200] if result.get('text') else '',
-                    'metadata': {
-                        'source': 'firecrawl',
-                        'timestamp': datetime.now().isoformat()
-                    }
-                }
-                formatted_results.append(formatted_result)
-            
-            return formatted_results
+            return self._firecrawl_request(query, count)
         except Exception as e:
             print(f"Firecrawl search error: {str(e)}")
             return []
 
+    def _firecrawl_request(self, query, count):
+        """Firecrawl APIで検索し、結果の形式を統一する（失敗時は例外を送出）"""
+        firecrawl = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
+        firecrawl_results = firecrawl.search(query, count=count)
+        
+        # 結果の形式を統一
+        formatted_results = []
+        for result in firecrawl_results:
+            formatted_result = {
+                'title': result.get('title', 'No Title'),
+                'url': canonicalize_url(result.get('url', '')),
+                'content': result.get('text', ''),
+                'snippet': result.get('text', '')[:200] if result.get('text') else '',
+                'metadata': {
+                    'source': 'firecrawl',
+                    'timestamp': datetime.now().isoformat()
+                }
+            }
+            formatted_results.append(formatted_result)
+        
+        return formatted_results
+
     def _get_dummy_results(self, query):
         """APIが正常に動作するようにダミーの検索結果を返す"""
         self.logger.info(f"Generating dummy results for query: {query}")
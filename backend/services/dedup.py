@@ -0,0 +1,148 @@
+import zlib
+import logging
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def _normalize(text: str) -> str:
+    """全角/半角・大文字小文字・空白の揺れを除去する"""
+    return "".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+def shingles(text: str, size: int = 5) -> np.ndarray:
+    """文字n-gramのハッシュ値配列を返す（空白で区切られない日本語にも対応）"""
+    normalized = _normalize(text)
+    if len(normalized) < size:
+        return np.empty(0, dtype=np.uint64)
+    grams = {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+class MinHasher:
+    """numpyで一括計算するMinHash"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self._a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> Optional[np.ndarray]:
+        """シングルのハッシュ配列からMinHashシグネチャを計算する"""
+        if hashes.size == 0:
+            return None
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+    @staticmethod
+    def similarity(sig1: np.ndarray, sig2: np.ndarray) -> float:
+        """推定Jaccard類似度"""
+        return float(np.count_nonzero(sig1 == sig2)) / len(sig1)
+
+
+def _choose_bands(num_perm: int, threshold: float) -> int:
+    """閾値付近で候補になる確率が立ち上がるバンド数を選ぶ"""
+    best_bands, best_error = 1, float("inf")
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if error < best_error:
+            best_bands, best_error = bands, error
+    return best_bands
+
+
+class NearDuplicateDetector:
+    """MinHash + LSHで検索結果の近似重複（転載・ミラー・AMP版など）を検出する
+
+    各結果はLSHのバンド数だけバケットに登録され、同じバケットに入った候補とのみ
+    類似度を比較するため、結果数に対してほぼ線形の計算量で動作する。
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, shingle_size: int = 5):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm)
+        self.bands = _choose_bands(num_perm, threshold)
+        self.rows = num_perm // self.bands
+
+    def cluster(self, texts: List[str]) -> Tuple[List[int], List[float]]:
+        """各テキストの代表（最初に現れた類似テキスト）のインデックスと、代表との推定類似度を返す"""
+        representatives = list(range(len(texts)))
+        similarities = [1.0] * len(texts)
+        signatures: List[Optional[np.ndarray]] = [
+            self.hasher.signature(shingles(text or "", self.shingle_size)) for text in texts
+        ]
+        buckets: List[Dict[bytes, int]] = [{} for _ in range(self.bands)]
+
+        for index, signature in enumerate(signatures):
+            if signature is None:
+                continue
+            candidates = set()
+            keys = []
+            for band in range(self.bands):
+                key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                keys.append(key)
+                if key in buckets[band]:
+                    candidates.add(buckets[band][key])
+
+            # 先に現れた代表の中で最も類似度が高いものに統合する
+            best, best_similarity = None, self.threshold
+            for candidate in sorted(candidates):
+                similarity = MinHasher.similarity(signature, signatures[candidate])
+                if similarity >= best_similarity:
+                    best, best_similarity = candidate, similarity
+
+            if best is not None:
+                representatives[index] = best
+                similarities[index] = best_similarity
+                continue
+            for band, key in enumerate(keys):
+                buckets[band].setdefault(key, index)
+
+        return representatives, similarities
+
+    def dedupe(self, results: List[Dict[str, Any]], text_key: str = "content",
+               mode: str = "drop") -> List[Dict[str, Any]]:
+        """近似重複を除去（drop）またはクラスタ情報を付与（cluster）する
+
+        残した結果の metadata['duplicates'] に統合された結果のURLとタイトルを記録する。
+        """
+        if len(results) < 2:
+            return results
+
+        texts = [result.get(text_key) or "" for result in results]
+        representatives, similarities = self.cluster(texts)
+
+        kept = []
+        for index, (result, representative) in enumerate(zip(results, representatives)):
+            metadata = result.setdefault("metadata", {})
+            if representative == index:
+                kept.append(result)
+                if mode == "cluster":
+                    metadata["cluster"] = index
+                continue
+
+            owner = results[representative].setdefault("metadata", {})
+            owner.setdefault("duplicates", []).append({
+                "url": result.get("url", ""),
+                "title": result.get("title", ""),
+                "similarity": round(similarities[index], 3),
+            })
+            if mode == "cluster":
+                metadata["cluster"] = representative
+                metadata["duplicate_of"] = results[representative].get("url", "")
+                kept.append(result)
+
+        dropped = len(results) - len(kept)
+        if dropped:
+            logger.info(f"Folded {dropped} near-duplicate results")
+        return kept
@@ -0,0 +1,93 @@
+import os
+import re
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .analysis_parser import parse_analysis
+
+logger = logging.getLogger(__name__)
+
+_TITLE = re.compile(r"^\s*タイトル:\s*(.+)$", re.MULTILINE)
+
+
+class FakeLLM:
+    """APIを呼び出さずに定型の応答を返すLLM（ローカルでのテスト・デモ用）
+
+    応答は入力の「タイトル:」行から組み立て、token_chars文字ずつtoken_delay秒の間隔で返す。
+    """
+
+    def __init__(self, token_delay: float = 0.02, token_chars: int = 8):
+        """
+        Args:
+            token_delay: 断片を返す間隔（秒）
+            token_chars: 1つの断片の文字数
+        """
+        self.token_delay = token_delay
+        self.token_chars = token_chars
+
+    def respond(self, prompt: str) -> str:
+        """分析プロンプトと同じ形式の応答を作成する"""
+        titles = [title.strip() for title in _TITLE.findall(prompt)][:3] or ["検索結果"]
+        insights = "\n".join(f"   - 「{title}」に関する記述が含まれています" for title in titles)
+        return (
+            f"1. 要約: {len(_TITLE.findall(prompt))}件の検索結果をもとにしたテスト用の分析です。\n"
+            f"2. 主要な洞察:\n{insights}\n"
+            "3. パターンと関連性:\n"
+            "   - 複数の情報源で共通するテーマがあります\n"
+            "   - 情報源間の矛盾は検出されていません\n"
+            "4. 信頼性評価: テスト用の応答のため評価していません\n"
+            "5. 追加調査が必要な領域:\n"
+            "   - 実際のLLMで分析した結果との比較\n"
+            "   - 一次資料の確認\n"
+        )
+
+    async def astream_text(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """応答を断片に分けて返す"""
+        text = self.respond(prompt)
+        for start in range(0, len(text), self.token_chars):
+            if self.token_delay > 0:
+                await asyncio.sleep(self.token_delay)
+            yield text[start:start + self.token_chars]
+
+    async def agenerate_text(self, prompt: str) -> str:
+        """応答の全文を返す"""
+        return "".join([text async for text in self.astream_text(prompt)])
+
+
+class FakeAIService:
+    """GeminiServiceと同じインターフェースでFakeLLMの応答を返す分析サービス（AI_PROVIDER=fake）"""
+
+    def __init__(self, llm: Optional[FakeLLM] = None):
+        self.logger = logging.getLogger(__name__)
+        self.llm = llm or FakeLLM(token_delay=float(os.getenv("FAKE_LLM_TOKEN_DELAY", "0.02")))
+        self.logger.info("FakeAIService initialized (no API calls will be made)")
+
+    @staticmethod
+    def _results_text(results: Any) -> str:
+        if isinstance(results, list):
+            return "\n\n".join(
+                f"タイトル: {result.get('title', 'No Title')}\nURL: {result.get('url', 'No URL')}"
+                for result in results
+            )
+        return str(results)
+
+    @staticmethod
+    def _analysis(text: str) -> Dict[str, Any]:
+        return {**parse_analysis(text), "keywords": [], "raw_analysis": text, "analysis_mode": "fake"}
+
+    async def analyze(self, results: Any) -> Dict[str, Any]:
+        """検索結果を分析する"""
+        return self._analysis(await self.llm.agenerate_text(self._results_text(results)))
+
+    async def stream_analyze(self, results: Any) -> AsyncIterator[Tuple[str, Any]]:
+        """("token", テキスト) を順に返し、最後に ("analysis", 分析結果) を返す"""
+        chunks: List[str] = []
+        async for text in self.llm.astream_text(self._results_text(results)):
+            chunks.append(text)
+            yield "token", text
+        yield "analysis", self._analysis("".join(chunks))
+
+    async def generate_text(self, prompt: str) -> str:
+        """指定されたプロンプトに基づいてテキストを生成する"""
+        return await self.llm.agenerate_text(prompt)
@@ -0,0 +1,295 @@
+import os
+import time
+import asyncio
+import logging
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+logger = logging.getLogger(__name__)
+
+
+class ThrottledError(Exception):
+    """ホストから429/503などで制限されたことを示す例外（スケジューラーが再キューする）"""
+
+    def __init__(self, url: str, retry_after: Optional[float] = None):
+        super().__init__(f"Throttled by host: {url}")
+        self.url = url
+        self.retry_after = retry_after
+
+
+class RobotsDisallowedError(Exception):
+    """robots.txtで取得が禁止されているURL"""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-Afterヘッダー（秒数）を解釈する。日付形式は無視する"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def raise_for_throttle(url: str, status_code: int, headers: Any) -> None:
+    """429/503レスポンスの場合にThrottledErrorを送出する"""
+    if status_code in (429, 503):
+        retry_after = parse_retry_after(headers.get("retry-after") if headers else None)
+        raise ThrottledError(url, retry_after)
+
+
+class TokenBucket:
+    """ホストごとのトークンバケット（制限を受けると速度を半減し、成功時に徐々に戻す）"""
+
+    def __init__(self, rate: float, burst: float):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        # asyncio.Lockは最初に使ったイベントループに紐づくため、ループごとに作成する
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+    def _lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        return lock
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        """トークンが得られるまで待機する"""
+        async with self._lock():
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def set_rate(self, rate: float) -> None:
+        """Crawl-delayなどに合わせて基準速度を変更する"""
+        self.base_rate = rate
+        self.rate = min(self.rate, rate)
+        self.burst = min(self.burst, max(1.0, rate))
+
+    def penalize(self, retry_after: Optional[float], min_rate: float) -> float:
+        """制限を受けた場合に速度を半減し、待機時間を設定する"""
+        self.rate = max(min_rate, self.rate / 2)
+        delay = retry_after if retry_after is not None else 1.0 / self.rate
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        self.tokens = 0
+        return delay
+
+    def reward(self) -> None:
+        """成功時に速度を基準値へ近づける"""
+        self.rate = min(self.base_rate, self.rate * 1.1)
+
+
+class FetchScheduler:
+    """ホストごとの礼儀正しい取得を行うスケジューラー
+
+    - ホストごとにトークンバケットで取得速度を制限する
+    - robots.txtをホストごとにTTL付きでキャッシュし、Crawl-delayを速度に反映する
+    - 制限（429/503）を受けたURLは失敗させずに待機後に再キューする
+    """
+
+    def __init__(self, rate: float = 2.0, burst: float = 2.0, robots_ttl: float = 3600.0,
+                 respect_robots: bool = True, user_agent: str = "*", max_requeues: int = 3,
+                 min_rate: float = 0.1, max_hosts: int = 1000,
+                 robots_fetcher: Optional[Callable[[str], Awaitable[tuple]]] = None):
+        """
+        Args:
+            rate: ホストごとの1秒あたりの取得数
+            burst: ホストごとのバースト許容数
+            robots_ttl: robots.txtキャッシュの有効期限（秒）
+            respect_robots: robots.txtを尊重するかどうか
+            user_agent: robots.txt判定に使うユーザーエージェント名
+            max_requeues: 制限を受けたURLを再キューする最大回数
+            min_rate: 制限を受けた場合の最低速度
+            max_hosts: 速度とrobots.txtを保持するホストの最大数（超えた場合は最近使われていないホストから破棄する）
+            robots_fetcher: robots.txtを取得する関数（URLを受け取り(status, text)を返す）
+        """
+        self.rate = rate
+        self.burst = burst
+        self.robots_ttl = robots_ttl
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.max_requeues = max_requeues
+        self.min_rate = min_rate
+        self.max_hosts = max_hosts
+        self._robots_fetcher = robots_fetcher or self._default_robots_fetcher
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._robots: "OrderedDict[str, tuple]" = OrderedDict()
+        # set_host_rateで速度を指定したホストは破棄しない
+        self._pinned: Set[str] = set()
+        self._robots_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Lock]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._stats = {"fetches": 0, "requeues": 0, "throttled": 0, "disallowed": 0, "robots_fetches": 0}
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc.lower()}"
+
+    def _bucket(self, origin: str) -> TokenBucket:
+        bucket = self._buckets.get(origin)
+        if bucket is None:
+            bucket = self._buckets[origin] = TokenBucket(self.rate, self.burst)
+            self._evict()
+        else:
+            self._buckets.move_to_end(origin)
+        return bucket
+
+    def _forget(self, origin: str) -> None:
+        """ホストの速度・robots.txt・ロックを破棄する"""
+        if origin not in self._pinned:
+            self._buckets.pop(origin, None)
+        self._robots.pop(origin, None)
+        for locks in self._robots_locks.values():
+            locks.pop(origin, None)
+
+    def _evict(self) -> None:
+        """保持するホスト数がmax_hostsを超えた分を、最近使われていない順に破棄する"""
+        while len(self._robots) > self.max_hosts:
+            self._forget(next(iter(self._robots)))
+        unpinned = [origin for origin in self._buckets if origin not in self._pinned]
+        for origin in unpinned[:max(0, len(unpinned) - self.max_hosts)]:
+            self._forget(origin)
+
+    @staticmethod
+    async def _default_robots_fetcher(url: str) -> tuple:
+        from .http_client import get_async_client
+        response = await get_async_client().get(url, timeout=10.0)
+        return response.status_code, response.text
+
+    async def _get_robots(self, origin: str) -> Optional[RobotFileParser]:
+        """ホストのrobots.txtを取得する（TTL付きキャッシュ）"""
+        cached = self._robots.get(origin)
+        if cached is not None and cached[0] > time.monotonic():
+            self._robots.move_to_end(origin)
+            return cached[1]
+
+        locks = self._robots_locks.setdefault(asyncio.get_running_loop(), {})
+        lock = locks.setdefault(origin, asyncio.Lock())
+        async with lock:
+            cached = self._robots.get(origin)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+
+            parser: Optional[RobotFileParser] = RobotFileParser()
+            try:
+                self._stats["robots_fetches"] += 1
+                status, text = await self._robots_fetcher(f"{origin}/robots.txt")
+                if status in (401, 403):
+                    parser.disallow_all = True
+                elif status >= 400:
+                    parser.allow_all = True
+                else:
+                    parser.parse(text.splitlines())
+            except Exception as e:
+                logger.warning(f"Failed to fetch robots.txt for {origin}: {str(e)}")
+                parser = None
+
+            self._robots[origin] = (time.monotonic() + self.robots_ttl, parser)
+            self._robots.move_to_end(origin)
+            self._evict()
+
+            # Crawl-delayを取得速度に反映する
+            if parser is not None:
+                delay = parser.crawl_delay(self.user_agent)
+                if delay:
+                    self._bucket(origin).set_rate(1.0 / float(delay))
+            return parser
+
+    async def allowed(self, url: str) -> bool:
+        """robots.txtで取得が許可されているか"""
+        if not self.respect_robots:
+            return True
+        parser = await self._get_robots(self._origin(url))
+        return parser is None or parser.can_fetch(self.user_agent, url)
+
+    def set_host_rate(self, url: str, rate: float, burst: Optional[float] = None) -> None:
+        """URLのホストの速度を設定する（APIのエンドポイント等。既に速度を持つホストは変更しない）"""
+        origin = self._origin(url)
+        self._pinned.add(origin)
+        if origin not in self._buckets:
+            self._buckets[origin] = TokenBucket(rate, burst or rate)
+
+    async def fetch(self, url: str, fetch_fn: Callable[[str], Awaitable[Any]],
+                    throttle_url: Optional[str] = None) -> Any:
+        """スケジューラーの制約の下でfetch_fnを実行する
+
+        fetch_fnがThrottledErrorを送出した場合は、ホストの速度を落として再キューする。
+
+        Args:
+            url: 取得するURL（robots.txtの判定とホストごとの速度制限に使う）
+            fetch_fn: 取得を1回行う関数
+            throttle_url: 制限（429/503）を返すのがurlのホストではなくAPI等の別のホストの場合、そのURL。
+                速度の低下と待機はそのホストに適用し、urlのホストには適用しない
+        """
+        origin = self._origin(url)
+        if not await self.allowed(url):
+            self._stats["disallowed"] += 1
+            raise RobotsDisallowedError(f"Disallowed by robots.txt: {url}")
+
+        bucket = self._bucket(origin)
+        throttle_origin = self._origin(throttle_url) if throttle_url else origin
+        throttle_bucket = self._bucket(throttle_origin)
+        for attempt in range(self.max_requeues + 1):
+            await bucket.acquire()
+            if throttle_bucket is not bucket:
+                await throttle_bucket.acquire()
+            try:
+                result = await fetch_fn(url)
+            except ThrottledError as e:
+                self._stats["throttled"] += 1
+                if attempt >= self.max_requeues:
+                    raise
+                delay = throttle_bucket.penalize(e.retry_after, self.min_rate)
+                self._stats["requeues"] += 1
+                logger.info(f"Throttled by {throttle_origin}, requeued {url} after {delay:.1f}s")
+                continue
+            throttle_bucket.reward()
+            self._stats["fetches"] += 1
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """統計情報を返す"""
+        return {
+            **self._stats,
+            "hosts": len(self._buckets),
+            "host_rates": {origin: bucket.rate for origin, bucket in self._buckets.items()},
+        }
+
+
+_scheduler: Optional[FetchScheduler] = None
+
+
+def get_fetch_scheduler() -> FetchScheduler:
+    """CrawlerServiceとWebCrawlerで共有するスケジューラーを返す"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = FetchScheduler(
+            rate=float(os.getenv("POLITENESS_RATE", "2")),
+            burst=float(os.getenv("POLITENESS_BURST", "2")),
+            robots_ttl=float(os.getenv("ROBOTS_TTL", "3600")),
+            respect_robots=os.getenv("RESPECT_ROBOTS", "true").lower() == "true",
+            user_agent=os.getenv("ROBOTS_USER_AGENT", "*"),
+            max_requeues=int(os.getenv("POLITENESS_MAX_REQUEUES", "3")),
+            max_hosts=int(os.getenv("POLITENESS_MAX_HOSTS", "1000")),
+        )
+    return _scheduler
@@ -1,10 +1,18 @@
 import os
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
 import google.generativeai as genai
 from langchain.llms.base import BaseLLM
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from .analysis_parser import analysis_error, parse_analysis
+from .http_client import run_blocking
+from .keywords import get_keyword_extractor
+from .textrank import get_text_rank
+from .llm_cache import get_llm_cache
+from .token_budget import AnalysisBudget, estimate_tokens, map_concurrently, split_results_section
 
 class GeminiService:
     """Gemini APIを使用したAI分析サービス"""
@@ -56,121 +64,194 @@ class GeminiService:
             
             # 分析チェーンの設定
             self.analysis_chain = LLMChain(llm=self.llm, prompt=self.analysis_prompt)
+            
+            # 予算を超える入力はチャンクごとに要点を抽出（map）してから分析（reduce）する
+            self.budget = AnalysisBudget.from_env()
+            self.text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=self.budget.chunk_tokens,
+                chunk_overlap=self.budget.chunk_overlap_tokens,
+                length_function=estimate_tokens,
+                separators=["\n\n", "\n", "。", ". ", " ", ""]
+            )
+            self.map_prompt = PromptTemplate(
+                input_variables=["results"],
+                template="""以下は検索結果の一部です。後で全体を分析するために、重要な事実・数値・主張と
+その情報源（タイトルまたはURL）を簡潔な箇条書きで抽出してください（最大10項目）。
+情報源間の矛盾や共通点があれば、それも記載してください。
+
+検索結果:
+{results}
+
+日本語で回答してください。"""
+            )
+            self.map_chain = LLMChain(llm=self.llm, prompt=self.map_prompt)
             self.logger.info("GeminiService initialized successfully")
             
         except Exception as e:
             self.logger.error(f"Failed to initialize GeminiService: {str(e)}")
             raise
     
+    def _summarize_results(self, results: Any) -> Tuple[str, List[str]]:
+        """検索結果をキーワードとTextRankの重要文で要約したテキストに変換する"""
+        if isinstance(results, str):
+            return results, []
+        if not isinstance(results, list):
+            self.logger.warning(f"Unexpected results type: {type(results)}")
+            return str(results), []
+        
+        # 結果全体のキーワード（文書頻度はクロール時に更新済みのため更新しない）
+        _, keywords = get_keyword_extractor().extract_batch(
+            [result.get('content', '') for result in results], update=False
+        )
+        # 本文の代わりにTextRankの重要文を渡し、プロンプトのトークン数を抑える
+        key_sentences, corpus_sentences = get_text_rank().summarize(
+            [result.get('content', '') for result in results]
+        )
+        results_text = "\n\n".join([
+            f"タイトル: {result.get('title', 'No Title')}\n"
+            f"URL: {result.get('url', 'No URL')}\n"
+            f"内容: {' '.join(sentences) or result.get('content', 'No Content')}\n"
+            for result, sentences in zip(results, key_sentences)
+        ])
+        if corpus_sentences:
+            overview = "\n".join(f"- {sentence}" for sentence in corpus_sentences)
+            results_text = f"全体の要点:\n{overview}\n\n{results_text}"
+        return results_text, keywords
+    
+    async def _prepare_results_text(self, results: Any) -> Tuple[str, List[str], str]:
+        """検索結果を分析プロンプトの入力に変換する
+
+        Returns:
+            (入力テキスト, キーワード, 分析モード single / map_reduce / map_reduce_truncated)
+        """
+        # TF-IDFとTextRankは本文全体を走査するためスレッドで実行する
+        results_text, keywords = await run_blocking(self._summarize_results, results)
+        
+        mode = "single"
+        if not self.budget.fits(results_text):
+            # CoTプロンプト等の指示はそのまま残し、検索結果の部分だけを要約する
+            instructions, section = split_results_section(results_text)
+            max_tokens = max(self.budget.max_prompt_tokens - estimate_tokens(instructions), self.budget.chunk_tokens)
+            section, truncated = await self._map_reduce(section, max_tokens)
+            results_text = instructions + section
+            mode = "map_reduce_truncated" if truncated else "map_reduce"
+        return results_text, keywords, mode
+    
     async def analyze(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """検索結果を分析する"""
         try:
-            # 結果をテキスト形式に変換
-            results_text = ""
-            if isinstance(results, list):
-                results_text = "\n\n".join([
-                    f"タイトル: {result.get('title', 'No Title')}\n"
-                    f"URL: {result.get('url', 'No URL')}\n"
-                    f"内容: {result.get('content', 'No Content')}\n"
-                    for result in results
-                ])
-            elif isinstance(results, str):
-                results_text = results
-            else:
-                self.logger.warning(f"Unexpected results type: {type(results)}")
-                results_text = str(results)
+            results_text, keywords, mode = await self._prepare_results_text(results)
             
             # 分析の実行
             analysis_result = await self.analysis_chain.arun(results=results_text)
             
             # 結果の解析
-            lines = analysis_result.split("\n")
-            summary = ""
-            insights = []
-            patterns = []
-            reliability = ""
-            further_research = []
-            
-            current_section = None
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                if "要約:" in line or "1." in line and "要約" in line:
-                    current_section = "summary"
-                    summary = line.split(":", 1)[1].strip() if ":" in line else ""
-                elif "主要な洞察:" in line or "2." in line and "洞察" in line:
-                    current_section = "insights"
-                elif "パターンと関連性:" in line or "3." in line and "パターン" in line:
-                    current_section = "patterns"
-                elif "信頼性評価:" in line or "4." in line and "信頼性" in line:
-                    current_section = "reliability"
-                elif "追加調査:" in line or "5." in line and "調査" in line:
-                    current_section = "further_research"
-                elif current_section == "summary" and not summary:
-                    summary = line
-                elif current_section == "insights":
-                    if line.startswith("-") or line.startswith("*"):
-                        insights.append(line[1:].strip())
-                    elif line and not any(line.startswith(x) for x in ["1.", "2.", "3.", "4.", "5."]):
-                        insights.append(line)
-                elif current_section == "patterns":
-                    if line.startswith("-") or line.startswith("*"):
-                        patterns.append(line[1:].strip())
-                    elif line and not any(line.startswith(x) for x in ["1.", "2.", "3.", "4.", "5."]):
-                        patterns.append(line)
-                elif current_section == "reliability":
-                    if not reliability:
-                        reliability = line
-                elif current_section == "further_research":
-                    if line.startswith("-") or line.startswith("*"):
-                        further_research.append(line[1:].strip())
-                    elif line and not any(line.startswith(x) for x in ["1.", "2.", "3.", "4.", "5."]):
-                        further_research.append(line)
-            
             return {
-                "summary": summary,
-                "insights": insights,
-                "patterns": patterns,
-                "reliability": reliability,
-                "further_research": further_research,
-                "raw_analysis": analysis_result
+                **parse_analysis(analysis_result),
+                "keywords": keywords,
+                "raw_analysis": analysis_result,
+                "analysis_mode": mode
             }
             
         except Exception as e:
             self.logger.error(f"Analysis failed: {str(e)}")
-        return {
-                "error": f"分析中にエラーが発生しました: {str(e)}",
-                "summary": "分析できませんでした",
-                "insights": [],
-                "patterns": [],
-                "reliability": "評価できません",
-                "further_research": []
-        } 
+            return analysis_error(e)
+    
+    async def stream_analyze(self, results: Any) -> AsyncIterator[Tuple[str, Any]]:
+        """analyzeのストリーミング版
+        
+        生成中のテキストを ("token", テキスト) として順に返し、最後に ("analysis", 分析結果) を返す。
+        """
+        try:
+            results_text, keywords, mode = await self._prepare_results_text(results)
+            chunks = []
+            async for text in self.llm.astream_text(self.analysis_prompt.format(results=results_text)):
+                chunks.append(text)
+                yield "token", text
+            analysis_result = "".join(chunks)
+            yield "analysis", {
+                **parse_analysis(analysis_result),
+                "keywords": keywords,
+                "raw_analysis": analysis_result,
+                "analysis_mode": mode
+            }
+        except Exception as e:
+            self.logger.error(f"Streaming analysis failed: {str(e)}")
+            yield "analysis", analysis_error(e)
         
+    async def _map_reduce(self, text: str, max_tokens: int) -> Tuple[str, bool]:
+        """予算を超える入力をチャンクに分割し、並行して要点を抽出してmax_tokens以内に収める
+
+        Returns:
+            (抽出した要点, 収まらずに末尾のチャンクを捨てたかどうか)
+        """
+        truncated = False
+        for round_index in range(self.budget.max_rounds):
+            chunks = self.text_splitter.split_text(text)
+            self.logger.info(
+                f"Map round {round_index + 1}: {estimate_tokens(text)} tokens in {len(chunks)} chunks "
+                f"(fanout {self.budget.fanout})"
+            )
+            notes = await map_concurrently(
+                chunks, lambda chunk: self.map_chain.arun(results=chunk), self.budget.fanout
+            )
+            notes = [note for note in notes if note]
+            if not notes:
+                raise ValueError("All map prompts failed")
+            text = "\n\n".join(notes)
+            if estimate_tokens(text) <= max_tokens:
+                break
+        else:
+            # 繰り返しても収まらない場合は予算内の先頭のチャンクだけを使う
+            chunks = self.text_splitter.split_text(text)
+            kept, used = [], 0
+            for chunk in chunks:
+                used += estimate_tokens(chunk)
+                if used > max_tokens:
+                    break
+                kept.append(chunk)
+            text = "\n\n".join(kept)
+            truncated = len(kept) < len(chunks)
+            if truncated:
+                self.logger.warning(
+                    f"Map-reduce did not fit in {max_tokens} tokens after {self.budget.max_rounds} rounds; "
+                    f"dropped {len(chunks) - len(kept)} of {len(chunks)} chunks"
+                )
+        return f"（検索結果を分割して抽出した要点）\n{text}", truncated
+
     async def generate_text(self, prompt: str) -> str:
         """指定されたプロンプトに基づいてテキストを生成する"""
         try:
             self.logger.info(f"Generating text with prompt: {prompt[:100]}...")
             
+            from .crawler import gemini_model_name
+            
             # Gemini APIの設定
             genai.configure(api_key=self.api_key)
             
             # モデルの選択
             model = genai.GenerativeModel('gemini-pro')
             
-            # テキスト生成
-            response = model.generate_content(prompt)
+            async def call():
+                # テキスト生成（SDKの非同期APIを使い、古いSDKではスレッドで実行する）
+                if hasattr(model, "generate_content_async"):
+                    response = await model.generate_content_async(prompt)
+                else:
+                    response = await run_blocking(model.generate_content, prompt)
+                
+                # レスポンスからテキストを抽出
+                if hasattr(response, 'text'):
+                    return response.text
+                elif hasattr(response, 'parts'):
+                    return ''.join([part.text for part in response.parts])
+                else:
+                    return str(response)
             
-            # レスポンスからテキストを抽出
-            if hasattr(response, 'text'):
-                return response.text
-            elif hasattr(response, 'parts'):
-                return ''.join([part.text for part in response.parts])
-            else:
-                return str(response)
+            # 同じプロンプトの応答はキャッシュから返す（生成設定はSDKのデフォルト）
+            cache = get_llm_cache()
+            if cache is None:
+                return await call()
+            return await cache.acached("gemini", gemini_model_name(model), prompt, {}, call)
                 
         except Exception as e:
             self.logger.error(f"Text generation failed: {str(e)}")
@@ -0,0 +1,230 @@
+import os
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+# 高速パーサー（存在する場合）
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:  # pragma: no cover - optional dependency
+    try:
+        from selectolax.parser import HTMLParser as SelectolaxParser
+    except ImportError:
+        SelectolaxParser = None
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # pragma: no cover - optional dependency
+    lxml = None
+    etree = None
+
+# BingのSERP構造用セレクター
+BING_RESULT_SELECTOR = "li.b_algo"
+BING_TITLE_SELECTOR = "h2 a"
+BING_SNIPPET_SELECTOR = ".b_caption p"
+
+MAIN_CONTENT_TAGS = ('p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+
+
+def _class_xpath(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+if etree is not None:
+    # lxml用に事前コンパイルしたXPath（CSSセレクターと同じ意味）
+    _LXML_BING_RESULTS = etree.XPath(f"//li[{_class_xpath('b_algo')}]")
+    _LXML_BING_TITLE = etree.XPath("(.//h2//a)[1]")
+    _LXML_BING_SNIPPET = etree.XPath(f"(.//*[{_class_xpath('b_caption')}]//p)[1]")
+    _LXML_TITLE = etree.XPath("(//title)[1]")
+    _LXML_META_DESCRIPTION = etree.XPath("(//meta[@name='description'])[1]/@content")
+    _LXML_PARAGRAPHS = etree.XPath("//p")
+
+
+def available_backends() -> List[str]:
+    """利用可能なパーサーバックエンドを速い順に返す"""
+    backends = []
+    if SelectolaxParser is not None:
+        backends.append("selectolax")
+    if etree is not None:
+        backends.append("lxml")
+    backends.append("bs4")
+    return backends
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """使用するバックエンドを決定する（HTML_PARSER環境変数で指定可能）"""
+    backend = (backend or os.getenv("HTML_PARSER", "auto")).lower()
+    backends = available_backends()
+    if backend == "auto":
+        return backends[0]
+    if backend not in backends:
+        logger.warning(f"HTML parser backend '{backend}' is not available, using {backends[0]}")
+        return backends[0]
+    return backend
+
+
+def _lxml_document(html: str):
+    if not html or not html.strip():
+        return None
+    try:
+        return lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+# --- BingのSERP解析 ---
+
+def _bing_results_selectolax(html: str) -> List[Dict[str, str]]:
+    tree = SelectolaxParser(html)
+    results = []
+    for node in tree.css(BING_RESULT_SELECTOR):
+        title_elem = node.css_first(BING_TITLE_SELECTOR)
+        if title_elem is None:
+            continue
+        snippet_elem = node.css_first(BING_SNIPPET_SELECTOR)
+        results.append({
+            'title': title_elem.text(deep=True),
+            'url': title_elem.attributes.get('href') or '',
+            'snippet': snippet_elem.text(deep=True) if snippet_elem is not None else ''
+        })
+    return results
+
+
+def _bing_results_lxml(html: str) -> List[Dict[str, str]]:
+    doc = _lxml_document(html)
+    if doc is None:
+        return []
+    results = []
+    for node in _LXML_BING_RESULTS(doc):
+        title_elems = _LXML_BING_TITLE(node)
+        if not title_elems:
+            continue
+        snippet_elems = _LXML_BING_SNIPPET(node)
+        results.append({
+            'title': title_elems[0].text_content(),
+            'url': title_elems[0].get('href', ''),
+            'snippet': snippet_elems[0].text_content() if snippet_elems else ''
+        })
+    return results
+
+
+def _bing_results_bs4(html: str) -> List[Dict[str, str]]:
+    soup = BeautifulSoup(html, 'html.parser')
+    results = []
+    for node in soup.select(BING_RESULT_SELECTOR):
+        title_elem = node.select_one(BING_TITLE_SELECTOR)
+        if not title_elem:
+            continue
+        snippet_elem = node.select_one(BING_SNIPPET_SELECTOR)
+        results.append({
+            'title': title_elem.get_text(),
+            'url': title_elem.get('href', ''),
+            'snippet': snippet_elem.get_text() if snippet_elem else ''
+        })
+    return results
+
+
+_BING_PARSERS = {
+    "selectolax": _bing_results_selectolax,
+    "lxml": _bing_results_lxml,
+    "bs4": _bing_results_bs4,
+}
+
+
+def parse_bing_results(html: str, backend: Optional[str] = None) -> List[Dict[str, str]]:
+    """BingのSERPから検索結果（title, url, snippet）を順位順に抽出する"""
+    return _BING_PARSERS[resolve_backend(backend)](html)
+
+
+# --- ページ本文の抽出 ---
+
+def _take_until(texts: Iterable[str], max_chars: Optional[int]) -> List[str]:
+    """テキストを順に集め、合計がmax_charsに達した時点で残りの要素の抽出をやめる"""
+    blocks = []
+    total = 0
+    for text in texts:
+        blocks.append(text)
+        total += len(text) + 1
+        if max_chars is not None and total >= max_chars:
+            break
+    return blocks
+
+
+def _main_content_selectolax(html: str, tags: Sequence[str],
+                             max_chars: Optional[int] = None) -> Tuple[Optional[str], List[str]]:
+    tree = SelectolaxParser(html)
+    title_elem = tree.css_first("title")
+    title = title_elem.text(deep=True) if title_elem is not None else None
+    return title, _take_until((node.text(deep=True) for node in tree.css(", ".join(tags))), max_chars)
+
+
+def _main_content_lxml(html: str, tags: Sequence[str],
+                       max_chars: Optional[int] = None) -> Tuple[Optional[str], List[str]]:
+    doc = _lxml_document(html)
+    if doc is None:
+        return None, []
+    title_elems = _LXML_TITLE(doc)
+    title = title_elems[0].text_content() if title_elems else None
+    # XPathと異なり文書順に走査するため、予算に達した時点で残りの要素を見ずに終えられる
+    nodes = doc.iter(*tags)
+    return title, _take_until((node.text_content() for node in nodes), max_chars)
+
+
+def _main_content_bs4(html: str, tags: Sequence[str],
+                      max_chars: Optional[int] = None) -> Tuple[Optional[str], List[str]]:
+    soup = BeautifulSoup(html, 'html.parser')
+    title = soup.title.string if soup.title else None
+    return title, _take_until((tag.get_text() for tag in soup.find_all(list(tags))), max_chars)
+
+
+_CONTENT_PARSERS = {
+    "selectolax": _main_content_selectolax,
+    "lxml": _main_content_lxml,
+    "bs4": _main_content_bs4,
+}
+
+
+def extract_text_blocks(html: str, tags: Sequence[str] = MAIN_CONTENT_TAGS,
+                        backend: Optional[str] = None,
+                        max_chars: Optional[int] = None) -> Tuple[Optional[str], List[str]]:
+    """タイトルと、指定タグのテキストを文書順に抽出する
+
+    max_charsを指定した場合は、テキストの合計がmax_charsに達した時点で抽出をやめる。
+    """
+    return _CONTENT_PARSERS[resolve_backend(backend)](html, tags, max_chars)
+
+
+def extract_page_metadata(html: str, backend: Optional[str] = None) -> Dict[str, str]:
+    """タイトル・meta description・段落テキストを抽出する（WebCrawler用）"""
+    backend = resolve_backend(backend)
+    if backend == "selectolax":
+        tree = SelectolaxParser(html)
+        title_elem = tree.css_first("title")
+        description_elem = tree.css_first("meta[name='description']")
+        return {
+            "title": title_elem.text(deep=True) if title_elem is not None else "",
+            "description": (description_elem.attributes.get("content") or "") if description_elem is not None else "",
+            "text": " ".join(node.text(deep=True) for node in tree.css("p")),
+        }
+    if backend == "lxml":
+        doc = _lxml_document(html)
+        if doc is None:
+            return {"title": "", "description": "", "text": ""}
+        title_elems = _LXML_TITLE(doc)
+        descriptions = _LXML_META_DESCRIPTION(doc)
+        return {
+            "title": title_elems[0].text_content() if title_elems else "",
+            "description": str(descriptions[0]) if descriptions else "",
+            "text": " ".join(node.text_content() for node in _LXML_PARAGRAPHS(doc)),
+        }
+    soup = BeautifulSoup(html, "html.parser")
+    description = soup.find("meta", {"name": "description"})
+    return {
+        "title": soup.title.string if soup.title else "",
+        "description": description["content"] if description else "",
+        "text": " ".join([p.get_text() for p in soup.find_all("p")]),
+    }
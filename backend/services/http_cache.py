@@ -0,0 +1,343 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import httpx
+
+from .body_reader import check_content_type, read_capped
+from .cache import DEFAULT_CACHE_DIR
+from .http_client import run_blocking
+from .url_utils import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# キャッシュに保存するレスポンスヘッダー（本文は復号済みで保存するためContent-Encodingは保存しない）
+STORED_HEADERS = ("content-type", "etag", "last-modified", "cache-control", "expires", "date")
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """Cache-Controlヘッダーをディレクティブの辞書に変換する"""
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip().strip('"') or None
+    return directives
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def freshness_lifetime(headers: Any, default_ttl: float = 0.0) -> float:
+    """レスポンスが再検証なしで使える秒数を返す（max-age, Expires, Ageを考慮）"""
+    directives = parse_cache_control(headers.get("cache-control"))
+    if "no-cache" in directives:
+        return 0.0
+
+    lifetime = None
+    if directives.get("max-age") is not None:
+        try:
+            lifetime = float(directives["max-age"])
+        except ValueError:
+            lifetime = 0.0
+    else:
+        expires = _parse_http_date(headers.get("expires"))
+        if expires is not None:
+            date = _parse_http_date(headers.get("date")) or time.time()
+            lifetime = expires - date
+    if lifetime is None:
+        lifetime = default_ttl
+
+    try:
+        age = float(headers.get("age") or 0)
+    except ValueError:
+        age = 0.0
+    return max(0.0, lifetime - age)
+
+
+def is_storable(status_code: int, headers: Any) -> bool:
+    """レスポンスをキャッシュに保存できるか"""
+    if status_code != 200:
+        return False
+    if "no-store" in parse_cache_control(headers.get("cache-control")):
+        return False
+    return headers.get("vary", "").strip() != "*"
+
+
+class HttpCache:
+    """ETag / Last-Modifiedで再検証するディスク上のHTTPキャッシュ
+
+    本文は圧縮してSQLiteに保存し、合計サイズが上限を超えた場合は
+    最後に使われた時刻が古いものから削除する。
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_bytes: int = 256 * 1024 * 1024,
+                 default_ttl: float = 0.0):
+        """
+        Args:
+            db_path: SQLiteファイルのパス（Noneの場合はメモリ上のみ）
+            max_bytes: 保存する本文（圧縮後）の合計サイズの上限
+            default_ttl: Cache-Control/Expiresがない場合に再検証なしで使う秒数
+        """
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "revalidated": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._conn = self._open_db(db_path or ":memory:")
+        self._total_bytes = self._query_total_bytes()
+
+    def _open_db(self, db_path: str) -> Optional[sqlite3.Connection]:
+        """SQLiteファイルを開き、テーブルを作成する"""
+        try:
+            if db_path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS http_cache ("
+                "key TEXT PRIMARY KEY, headers TEXT NOT NULL, body BLOB NOT NULL, "
+                "size INTEGER NOT NULL, fresh_until REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_access ON http_cache(last_access)")
+            conn.commit()
+            return conn
+        except sqlite3.Error as e:
+            logger.error(f"Failed to open HTTP cache database {db_path}: {str(e)}")
+            return None
+
+    def _query_total_bytes(self) -> int:
+        if self._conn is None:
+            return 0
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """保存済みのエントリ（headers, body, fresh）を返す。存在しない場合はNone"""
+        if self._conn is None:
+            return None
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT headers, body, fresh_until FROM http_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                self._conn.execute(
+                    "UPDATE http_cache SET last_access = ? WHERE key = ?", (time.time(), key)
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"HTTP cache read failed: {str(e)}")
+                return None
+        headers, body, fresh_until = row
+        return {
+            "headers": json.loads(headers),
+            "body": zlib.decompress(body),
+            "fresh": fresh_until > time.time(),
+        }
+
+    def conditional_headers(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """再検証用のIf-None-Match / If-Modified-Sinceヘッダーを返す"""
+        if not entry:
+            return {}
+        headers = {}
+        if entry["headers"].get("etag"):
+            headers["If-None-Match"] = entry["headers"]["etag"]
+        if entry["headers"].get("last-modified"):
+            headers["If-Modified-Since"] = entry["headers"]["last-modified"]
+        return headers
+
+    def store(self, key: str, headers: Any, body: bytes) -> None:
+        """レスポンスを保存する（上限を超えた場合は古いエントリを削除する）"""
+        if self._conn is None:
+            return
+        stored = {name: headers[name] for name in STORED_HEADERS if headers.get(name)}
+        compressed = zlib.compress(body, 6)
+        if len(compressed) > self.max_bytes:
+            return
+        now = time.time()
+        fresh_until = now + freshness_lifetime(headers, self.default_ttl)
+        with self._lock:
+            try:
+                previous = self._conn.execute(
+                    "SELECT size FROM http_cache WHERE key = ?", (key,)
+                ).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO http_cache (key, headers, body, size, fresh_until, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, json.dumps(stored), compressed, len(compressed), fresh_until, now)
+                )
+                self._total_bytes += len(compressed) - (previous[0] if previous else 0)
+                self._evict()
+                self._conn.commit()
+                self._stats["stores"] += 1
+            except sqlite3.Error as e:
+                logger.error(f"HTTP cache write failed: {str(e)}")
+
+    def refresh(self, key: str, entry: Dict[str, Any], headers: Any) -> Dict[str, Any]:
+        """304レスポンスのヘッダーでgetしたエントリの検証子と有効期限を更新し、更新後のエントリを返す"""
+        if self._conn is None:
+            return entry
+        for name in STORED_HEADERS:
+            if name != "content-type" and headers.get(name):
+                entry["headers"][name] = headers[name]
+        fresh_until = time.time() + freshness_lifetime(entry["headers"], self.default_ttl)
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "UPDATE http_cache SET headers = ?, fresh_until = ? WHERE key = ?",
+                    (json.dumps(entry["headers"]), fresh_until, key)
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"HTTP cache update failed: {str(e)}")
+        return entry
+
+    def _evict(self) -> None:
+        """合計サイズが上限以下になるまで最後の使用が古いエントリを削除する"""
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM http_cache ORDER BY last_access ASC LIMIT 32"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for key, size in rows:
+                self._conn.execute("DELETE FROM http_cache WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self._stats["evictions"] += 1
+                if self._total_bytes <= self.max_bytes:
+                    return
+
+    def record(self, outcome: str) -> None:
+        """hits / revalidated / misses の統計を記録する"""
+        with self._lock:
+            self._stats[outcome] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット率などの統計情報を返す"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["revalidated"] + self._stats["misses"]
+            served = self._stats["hits"] + self._stats["revalidated"]
+            return {
+                **self._stats,
+                "total_bytes": self._total_bytes,
+                "hit_rate": served / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        """全てのエントリを削除する"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM http_cache")
+                self._conn.commit()
+            self._total_bytes = 0
+
+    def close(self) -> None:
+        """SQLite接続を閉じる"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _cached_response(url: str, entry: Dict[str, Any]) -> httpx.Response:
+    """キャッシュのエントリからhttpx.Responseを作成する"""
+    return httpx.Response(
+        200, headers=entry["headers"], content=entry["body"], request=httpx.Request("GET", url)
+    )
+
+
+def _capped_response(response: httpx.Response, body: bytes) -> httpx.Response:
+    """ストリーミングで読み込んだ本文からhttpx.Responseを作成する（本文は復号済み）"""
+    headers = [(name, value) for name, value in response.headers.multi_items()
+               if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+    return httpx.Response(response.status_code, headers=headers, content=body, request=response.request)
+
+
+async def _get(client: httpx.AsyncClient, url: str, max_bytes: Optional[int],
+               accept: Optional[Sequence[str]], **kwargs) -> Tuple[httpx.Response, bool]:
+    """GETする。max_bytesを指定した場合は本文をストリーミングで上限まで読み込む
+
+    Returns:
+        (レスポンス, 本文を上限で打ち切ったかどうか)
+    """
+    if max_bytes is None:
+        response = await client.get(url, **kwargs)
+        if response.is_success:
+            check_content_type(response.headers.get("content-type", ""), accept)
+        return response, False
+
+    async with client.stream("GET", url, **kwargs) as response:
+        if response.is_success:
+            # 本文をダウンロードする前にContent-Typeを確認する
+            check_content_type(response.headers.get("content-type", ""), accept)
+        body, truncated = await read_capped(response, max_bytes)
+    return _capped_response(response, body), truncated
+
+
+async def cached_get(client: httpx.AsyncClient, url: str, cache: Optional[HttpCache] = None,
+                     max_bytes: Optional[int] = None, accept: Optional[Sequence[str]] = None,
+                     **kwargs) -> httpx.Response:
+    """キャッシュを使ってGETする
+
+    新鮮なエントリはリクエストせずに返し、古いエントリは検証子を付けて再検証する。
+    304の場合はキャッシュの本文を200として返す。
+
+    Args:
+        max_bytes: 本文の最大バイト数（超えた分は読み込まず、打ち切った本文はキャッシュしない）
+        accept: 本文を読み込むContent-Type（それ以外はUnsupportedContentTypeErrorを送出する）
+    """
+    if cache is None:
+        response, _ = await _get(client, url, max_bytes, accept, **kwargs)
+        return response
+
+    # SQLiteの読み書きとzlibの圧縮・展開はスレッドで実行し、並行取得中のイベントループを塞がない
+    key = canonicalize_url(url)
+    entry = await run_blocking(cache.get, key)
+    if entry is not None and entry["fresh"]:
+        cache.record("hits")
+        check_content_type(entry["headers"].get("content-type", ""), accept)
+        return _cached_response(url, entry)
+
+    headers = {**kwargs.pop("headers", {}), **cache.conditional_headers(entry)}
+    response, truncated = await _get(client, url, max_bytes, accept, headers=headers, **kwargs)
+
+    if response.status_code == 304 and entry is not None:
+        cache.record("revalidated")
+        entry = await run_blocking(cache.refresh, key, entry, response.headers)
+        check_content_type(entry["headers"].get("content-type", ""), accept)
+        return _cached_response(url, entry)
+
+    cache.record("misses")
+    if not truncated and is_storable(response.status_code, response.headers):
+        await run_blocking(cache.store, key, response.headers, response.content)
+    return response
+
+
+_http_cache: Optional[HttpCache] = None
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """CrawlerServiceとWebCrawlerで共有するHTTPキャッシュを返す（無効の場合はNone）"""
+    global _http_cache
+    if os.getenv("HTTP_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    if _http_cache is None:
+        _http_cache = HttpCache(
+            db_path=os.getenv("HTTP_CACHE_PATH", os.path.join(DEFAULT_CACHE_DIR, "http_cache.sqlite3")),
+            max_bytes=int(os.getenv("HTTP_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+            default_ttl=float(os.getenv("HTTP_CACHE_DEFAULT_TTL", "0")),
+        )
+    return _http_cache
@@ -0,0 +1,144 @@
+import os
+import asyncio
+import logging
+import functools
+import threading
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Language": "ja,en-US;q=0.9,en;q=0.8"
+}
+
+# AsyncClientは作成したイベントループに紐づくため、ループごとに保持する
+_async_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+_async_clients_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+# 共有Executorのワーカースレッドかどうか（map_blockingの入れ子でのデッドロックを避ける）
+_worker_state = threading.local()
+
+
+def _build_async_client() -> httpx.AsyncClient:
+    """接続プール付きのAsyncClientを作成する"""
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+    )
+    timeout = httpx.Timeout(float(os.getenv("HTTP_TIMEOUT", "30")), connect=10.0)
+    try:
+        # HTTP/2はh2パッケージが必要
+        return httpx.AsyncClient(
+            http2=True, limits=limits, timeout=timeout,
+            headers=DEFAULT_HEADERS, follow_redirects=True
+        )
+    except ImportError:
+        logger.warning("h2 package not installed; falling back to HTTP/1.1")
+        return httpx.AsyncClient(
+            limits=limits, timeout=timeout,
+            headers=DEFAULT_HEADERS, follow_redirects=True
+        )
+
+
+def _prune_closed_loops() -> None:
+    """終了したイベントループのAsyncClientを破棄する（ロック内で呼び出す）"""
+    for loop in [loop for loop in _async_clients if loop.is_closed()]:
+        del _async_clients[loop]
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """実行中のイベントループで共有するAsyncClientを返す"""
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            _prune_closed_loops()
+            client = _async_clients[loop] = _build_async_client()
+        return client
+
+
+async def close_async_client() -> None:
+    """実行中のイベントループのAsyncClientを閉じる（アプリケーション終了時に呼び出す）"""
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        client = _async_clients.pop(loop, None)
+        _prune_closed_loops()
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """ブロッキング処理（Selenium, Firecrawl SDK）用の上限付きExecutorを返す"""
+    global _executor
+    if _executor is None:
+        max_workers = int(os.getenv("CRAWLER_MAX_WORKERS", "4"))
+        _executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="crawler", initializer=_mark_worker
+        )
+    return _executor
+
+
+def _mark_worker() -> None:
+    _worker_state.shared = True
+
+
+def shutdown_executor(wait: bool = False) -> None:
+    """共有Executorを停止する"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait)
+    _executor = None
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """ブロッキング関数を共有Executor上で実行し、イベントループを塞がないようにする
+
+    asyncio.to_threadと同様に、呼び出し元のコンテキスト変数を引き継いで実行する。
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+
+def map_blocking(func: Callable[[Any], Any], items: Iterable[Any], max_concurrency: int = 4) -> List[Any]:
+    """同期コードから、共有Executor上でfuncを最大max_concurrency件ずつitemsに適用する
+
+    結果はitemsと同じ順序で返し、失敗した要素は例外オブジェクトを返す。
+    共有Executorのワーカーから呼ばれた場合は、空きワーカーを待ってデッドロックしないよう
+    呼び出し元のスレッドで順に実行する。
+    """
+    items = list(items)
+    results: List[Any] = [None] * len(items)
+    if getattr(_worker_state, "shared", False):
+        for index, item in enumerate(items):
+            try:
+                results[index] = func(item)
+            except Exception as e:
+                results[index] = e
+        return results
+
+    executor = get_executor()
+    pending = {}
+    queue = iter(enumerate(items))
+    for index, item in queue:
+        pending[executor.submit(func, item)] = index
+        if len(pending) >= max(1, max_concurrency):
+            break
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            index = pending.pop(future)
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                results[index] = e
+            following = next(queue, None)
+            if following is not None:
+                pending[executor.submit(func, following[1])] = following[0]
+    return results
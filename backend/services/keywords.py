@@ -0,0 +1,306 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .cache import DEFAULT_CACHE_DIR
+from .lexicon import get_lexicon
+
+logger = logging.getLogger(__name__)
+
+# 文字種ごとの連続（漢字・カタカナ・英数字）を語の候補とする。ひらがなは助詞・活用語尾が多いため除く
+_KANJI = r"\u3400-\u4dbf\u4e00-\u9fff\u3005\u3006\u30f6"
+_TOKEN_PATTERN = re.compile(
+    rf"[{_KANJI}]+"                          # 漢字
+    r"|[\u30a1-\u30fa\u30fc]+"              # カタカナ（長音符を含み、中黒で区切る）
+    r"|[a-z0-9][a-z0-9\-_.]*[a-z0-9]"       # 英数字（2文字以上）
+)
+_KANJI_PATTERN = re.compile(rf"[{_KANJI}]+")
+_DIGITS = re.compile(r"^[0-9.\-_]+$")
+
+
+def tokenize(text: str, max_run: int = 6, ngram: int = 2,
+             stopwords: FrozenSet[str] = frozenset()) -> List[str]:
+    """日本語を含むテキストを語に分割する
+
+    漢字・カタカナ・英数字の連続をそれぞれ1語とし、max_run文字を超える漢字の連続
+    （複合語）は文字n-gramに分割する。1文字の語・数字のみの語・ストップワードは除く。
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text):
+        if len(token) < 2 or token in stopwords or _DIGITS.match(token):
+            continue
+        if len(token) > max_run and _KANJI_PATTERN.fullmatch(token):
+            tokens.extend(token[i:i + ngram] for i in range(len(token) - ngram + 1))
+        else:
+            tokens.append(token)
+    return tokens
+
+
+class KeywordExtractor:
+    """結果全体をまとめてTF-IDFでキーワードを抽出する
+
+    文書×語の出現回数をCOO形式の疎行列（numpy配列）として1回で計算する。
+    IDFの文書頻度は抽出のたびに加算され、SQLiteに保存されるため、
+    調査を重ねるほど一般的な語の重みが下がる。同じ本文は一度だけ数える。
+    語彙がmax_termsを超えると文書頻度1以下の語（足りなければ文書頻度の低い語）から削除する。
+    文書数がmax_docsを超えると文書頻度と文書数を半減し、古い文書の記録から削除する。
+    """
+
+    def __init__(self, db_path: Optional[str] = None, stopwords: Iterable[str] = (),
+                 max_terms: int = 200000, max_docs: int = 100000):
+        """
+        Args:
+            db_path: 文書頻度を保存するSQLiteファイルのパス（Noneの場合はメモリ上のみ）
+            stopwords: 除外する語
+            max_terms: 語彙（文書頻度を保持する語）の最大数
+            max_docs: 文書頻度に数える（記録する）文書の最大数
+        """
+        self.stopwords = frozenset(word.lower() for word in stopwords)
+        self.max_terms = max_terms
+        self.max_docs = max_docs
+        self._lock = threading.Lock()
+        self._vocabulary: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._df = np.zeros(0, dtype=np.int64)
+        self._doc_count = 0
+        self._conn = None
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str) -> None:
+        """SQLiteファイルを開き、保存済みの文書頻度を読み込む"""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS term_df (term TEXT PRIMARY KEY, df INTEGER NOT NULL)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen_docs (hash TEXT PRIMARY KEY, created_at REAL NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(seen_docs)")}
+            if "created_at" not in columns:
+                # 以前の形式のファイルは、既存の文書を最も古いものとして扱う
+                self._conn.execute("ALTER TABLE seen_docs ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+            self._conn.commit()
+            rows = self._conn.execute("SELECT term, df FROM term_df").fetchall()
+            self._doc_count = self._conn.execute("SELECT COUNT(*) FROM seen_docs").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Failed to open keyword database {db_path}: {str(e)}")
+            self._conn = None
+            return
+        self._term_ids([term for term, _ in rows])
+        for term, df in rows:
+            self._df[self._vocabulary[term]] = df
+        self._age()
+        self._prune()
+
+    def _term_ids(self, tokens: List[str], add: bool = True) -> Tuple[np.ndarray, List[str]]:
+        """語をIDに変換する
+
+        addがTrueの場合、未知の語は語彙に追加する。Falseの場合は語彙を変更せず、
+        未知の語には語彙の後ろに続く一時的なIDを割り当てる。
+
+        Returns:
+            (語のID, 一時的なIDを割り当てた語のリスト)
+        """
+        ids = np.empty(len(tokens), dtype=np.int64)
+        vocabulary = self._vocabulary
+        extra: Dict[str, int] = {}
+        for i, token in enumerate(tokens):
+            term_id = vocabulary.get(token)
+            if term_id is None:
+                if add:
+                    term_id = vocabulary[token] = len(self._terms)
+                    self._terms.append(token)
+                else:
+                    term_id = extra.setdefault(token, len(self._terms) + len(extra))
+            ids[i] = term_id
+        if len(self._terms) > len(self._df):
+            self._df = np.concatenate([self._df, np.zeros(len(self._terms) - len(self._df), dtype=np.int64)])
+        return ids, list(extra)
+
+    def _prune(self) -> None:
+        """語彙がmax_termsを超えた場合に文書頻度の低い語を削除する（メモリ・SQLiteとも）"""
+        if len(self._terms) <= self.max_terms:
+            return
+        keep = self._df > 1
+        if keep.sum() > self.max_terms:
+            # 文書頻度1以下の語を除いても多い場合は、文書頻度の高い順にmax_terms件を残す
+            keep = np.zeros(len(self._terms), dtype=bool)
+            keep[np.argsort(-self._df, kind="stable")[:self.max_terms]] = True
+        removed = self._keep_terms(keep)
+        logger.info(f"Pruned {len(removed)} rare terms from the keyword vocabulary")
+        if self._conn is None:
+            return
+        try:
+            self._conn.executemany("DELETE FROM term_df WHERE term = ?", [(term,) for term in removed])
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Keyword database prune failed: {str(e)}")
+
+    def _keep_terms(self, keep: np.ndarray) -> List[str]:
+        """keepがTrueの語だけを語彙に残し、削除した語を返す"""
+        removed = [self._terms[i] for i in np.flatnonzero(~keep)]
+        self._terms = [self._terms[i] for i in np.flatnonzero(keep)]
+        self._vocabulary = {term: term_id for term_id, term in enumerate(self._terms)}
+        self._df = self._df[keep]
+        return removed
+
+    def _age(self) -> None:
+        """文書数がmax_docsを超えた場合に文書頻度と文書数を半減する（メモリ・SQLiteとも）
+
+        IDFの比率を保ったまま古い文書の影響を減らす。文書頻度が0になった語と、
+        古い順に半数の文書の記録を削除する（削除した文書は再び現れた場合に数え直す）。
+        """
+        if self._doc_count <= self.max_docs:
+            return
+        forgotten = self._doc_count - self._doc_count // 2
+        self._doc_count //= 2
+        self._df //= 2
+        removed = self._keep_terms(self._df > 0)
+        logger.info(f"Aged keyword statistics: forgot {forgotten} documents and {len(removed)} terms")
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute("UPDATE term_df SET df = df / 2")
+            self._conn.execute("DELETE FROM term_df WHERE df <= 0")
+            self._conn.execute(
+                "DELETE FROM seen_docs WHERE hash IN "
+                "(SELECT hash FROM seen_docs ORDER BY created_at, rowid LIMIT ?)", (forgotten,)
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Keyword database aging failed: {str(e)}")
+
+    def _update_document_frequency(self, texts: List[str], doc_ids: np.ndarray, term_ids: np.ndarray) -> None:
+        """新しい文書の文書頻度を加算し、SQLiteへ保存する"""
+        hashes = [hashlib.sha1(text.encode("utf-8")).hexdigest() for text in texts]
+        new_docs = np.ones(len(texts), dtype=bool)
+        if self._conn is not None:
+            try:
+                seen = set()
+                # SQLiteのパラメーター数の上限を超えないよう分割して問い合わせる
+                for start in range(0, len(hashes), 500):
+                    chunk = hashes[start:start + 500]
+                    seen.update(row[0] for row in self._conn.execute(
+                        f"SELECT hash FROM seen_docs WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+                    ))
+            except sqlite3.Error as e:
+                logger.error(f"Keyword database read failed: {str(e)}")
+                seen = set()
+            new_docs = np.array([h not in seen for h in hashes], dtype=bool)
+        # 同じバッチ内の同一本文も一度だけ数える
+        first = {}
+        for index, digest in enumerate(hashes):
+            if digest in first:
+                new_docs[index] = False
+            first.setdefault(digest, index)
+
+        mask = new_docs[doc_ids]
+        increments = np.bincount(term_ids[mask], minlength=len(self._df))
+        self._df += increments
+        self._doc_count += int(new_docs.sum())
+
+        if self._conn is None or not new_docs.any():
+            return
+        changed = np.flatnonzero(increments)
+        try:
+            self._conn.executemany(
+                "INSERT INTO term_df (term, df) VALUES (?, ?) "
+                "ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+                [(self._terms[i], int(increments[i])) for i in changed]
+            )
+            now = time.time()
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen_docs (hash, created_at) VALUES (?, ?)",
+                [(digest, now) for digest, new in zip(hashes, new_docs) if new]
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Keyword database write failed: {str(e)}")
+
+    def extract_batch(self, texts: List[str], top_k: int = 10,
+                      update: bool = True) -> Tuple[List[List[str]], List[str]]:
+        """各テキストのキーワードと、結果全体のキーワードを返す
+
+        Args:
+            texts: テキストのリスト
+            top_k: 返すキーワードの数
+            update: 文書頻度を更新するかどうか
+
+        Returns:
+            (テキストごとのキーワード, 結果全体のキーワード)
+        """
+        if not texts:
+            return [], []
+        tokenized = [tokenize(text, stopwords=self.stopwords) for text in texts]
+        lengths = np.fromiter((len(tokens) for tokens in tokenized), dtype=np.int64, count=len(texts))
+
+        with self._lock:
+            # 文書頻度を更新しない場合は語彙も増やさない（未知の語の文書頻度は0とする）
+            term_ids, extra = self._term_ids([token for tokens in tokenized for token in tokens], add=update)
+            terms = self._terms + extra
+            doc_ids = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+
+            # 文書×語の出現回数（COO形式の疎行列）
+            vocab_size = max(len(terms), 1)
+            cells, counts = np.unique(doc_ids * vocab_size + term_ids, return_counts=True)
+            rows, cols = cells // vocab_size, cells % vocab_size
+
+            if update:
+                self._update_document_frequency(texts, rows, cols)
+            doc_count = max(self._doc_count, len(texts))
+            df = np.maximum(np.concatenate([self._df, np.zeros(len(extra), dtype=np.int64)])[cols], 1)
+            if update:
+                # 削除で語のIDが変わるため、このバッチの語はtermsで参照する
+                self._age()
+                self._prune()
+
+        # サブリニアTF × 平滑化IDF
+        idf = np.log((1 + doc_count) / (1 + df)) + 1.0
+        scores = (1 + np.log(counts)) * idf
+
+        # 行ごとにスコアの降順で並べ、先頭top_k件を取り出す
+        order = np.lexsort((-scores, rows))
+        rows, cols, ranked_scores = rows[order], cols[order], scores[order]
+        starts = np.searchsorted(rows, np.arange(len(texts)))
+        ends = np.searchsorted(rows, np.arange(len(texts)), side="right")
+        per_text = [[terms[c] for c in cols[s:min(e, s + top_k)]] for s, e in zip(starts, ends)]
+
+        # 結果全体では各語のスコアを合計する
+        totals = np.bincount(cols, weights=ranked_scores, minlength=vocab_size)
+        top = np.argsort(-totals, kind="stable")[:top_k]
+        corpus = [terms[c] for c in top if totals[c] > 0]
+        return per_text, corpus
+
+    def close(self) -> None:
+        """SQLite接続を閉じる"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_extractor: Optional[KeywordExtractor] = None
+
+
+def get_keyword_extractor() -> KeywordExtractor:
+    """プロセス全体で共有するキーワード抽出器を返す"""
+    global _extractor
+    if _extractor is None:
+        _extractor = KeywordExtractor(
+            db_path=os.getenv("KEYWORD_STATS_PATH", os.path.join(DEFAULT_CACHE_DIR, "keyword_stats.sqlite3")),
+            stopwords=get_lexicon().stopwords,
+            max_terms=int(os.getenv("KEYWORD_MAX_TERMS", "200000")),
+            max_docs=int(os.getenv("KEYWORD_MAX_DOCS", "100000")),
+        )
+    return _extractor
@@ -0,0 +1,211 @@
+import os
+import json
+import logging
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# C実装のAho-Corasick（存在する場合）
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - optional dependency
+    ahocorasick = None
+
+# C実装がない場合、語数がこれ以下なら語ごとの部分文字列検索の方が速い
+SUBSTRING_MAX_PATTERNS = 128
+
+# デフォルトの辞書（LEXICON_PATHのJSONで上書き・追加できる）
+DEFAULT_LEXICONS: Dict[str, List[str]] = {
+    "positive": ["良い", "素晴らしい", "優れた", "最高", "成功", "幸せ", "positive", "excellent", "good", "great"],
+    "negative": ["悪い", "最悪", "失敗", "問題", "危険", "不満", "negative", "bad", "worst", "problem"],
+    "important": ["重要", "主要", "特徴", "特性", "結論", "研究", "調査", "分析", "important", "key", "significant"],
+    "stopwords": [
+        "の", "に", "は", "を", "た", "が", "で", "て", "と", "し", "れ", "さ", "ある", "いる", "する",
+        "から", "など", "まで", "として", "について", "the", "a", "an", "in", "on", "at", "of", "for",
+        "with", "by", "to", "and", "or", "but"
+    ],
+}
+
+
+def available_backends() -> List[str]:
+    """利用可能なマッチャーのバックエンドを返す"""
+    backends = ["pyahocorasick"] if ahocorasick is not None else []
+    return backends + ["python", "substring"]
+
+
+class LexiconMatcher:
+    """ラベル付きの複数の辞書を1つのAho-Corasickオートマトンにまとめたマッチャー
+
+    テキストを1回走査するだけで、各ラベルの語がいくつ含まれるかを数える。
+    大文字小文字は区別しない（語・テキストともに小文字化する）。
+    """
+
+    def __init__(self, lexicons: Dict[str, Iterable[str]], backend: Optional[str] = None):
+        """
+        Args:
+            lexicons: ラベルから語のリストへの辞書
+            backend: pyahocorasick, python（純Python実装）または substring（語ごとの検索）。
+                Noneの場合は利用可能で最も速いもの
+        """
+        self.labels = list(lexicons)
+        self._patterns: List[str] = []
+        self._pattern_labels: List[int] = []
+        seen = set()
+        for label_id, label in enumerate(self.labels):
+            for word in lexicons[label]:
+                word = word.lower()
+                if word and (word, label_id) not in seen:
+                    seen.add((word, label_id))
+                    self._patterns.append(word)
+                    self._pattern_labels.append(label_id)
+
+        if backend is None:
+            if ahocorasick is not None:
+                backend = "pyahocorasick"
+            elif len(self._patterns) <= SUBSTRING_MAX_PATTERNS:
+                backend = "substring"
+            else:
+                backend = "python"
+        self.backend = backend
+        if backend == "pyahocorasick":
+            self._build_pyahocorasick()
+        elif backend == "python":
+            self._build_python()
+
+    def _build_pyahocorasick(self) -> None:
+        automaton = ahocorasick.Automaton()
+        outputs: Dict[str, List[int]] = {}
+        for pattern_id, pattern in enumerate(self._patterns):
+            outputs.setdefault(pattern, []).append(pattern_id)
+        for pattern, pattern_ids in outputs.items():
+            automaton.add_word(pattern, tuple(pattern_ids))
+        automaton.make_automaton()
+        self._automaton = automaton
+
+    def _build_python(self) -> None:
+        """トライを作成し、幅優先で失敗リンクと出力を計算する"""
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+        for pattern_id, pattern in enumerate(self._patterns):
+            node = 0
+            for char in pattern:
+                next_node = goto[node].get(char)
+                if next_node is None:
+                    next_node = goto[node][char] = len(goto)
+                    goto.append({})
+                    outputs.append([])
+                node = next_node
+            outputs[node].append(pattern_id)
+
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for node in queue:
+            for char, child in goto[node].items():
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0)
+                # 失敗リンク先の出力を取り込み、走査時にリンクをたどらずに済むようにする
+                outputs[child] = outputs[child] + outputs[fail[child]]
+                queue.append(child)
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [tuple(output) for output in outputs]
+
+    def _matched_patterns(self, text: str) -> set:
+        """テキストに含まれるパターンIDの集合を返す"""
+        text = text.lower()
+        matched = set()
+        if self.backend == "pyahocorasick":
+            for _, pattern_ids in self._automaton.iter(text):
+                matched.update(pattern_ids)
+            return matched
+        if self.backend == "substring":
+            return {pattern_id for pattern_id, pattern in enumerate(self._patterns) if pattern in text}
+
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        node = 0
+        for char in text:
+            next_node = goto[node].get(char)
+            while next_node is None and node:
+                node = fail[node]
+                next_node = goto[node].get(char)
+            node = next_node or 0
+            if outputs[node]:
+                matched.update(outputs[node])
+        return matched
+
+    def count(self, text: str) -> Dict[str, int]:
+        """ラベルごとに、テキストに含まれる異なる語の数を返す"""
+        counts = dict.fromkeys(self.labels, 0)
+        if not text:
+            return counts
+        for pattern_id in self._matched_patterns(text):
+            counts[self.labels[self._pattern_labels[pattern_id]]] += 1
+        return counts
+
+    def count_batch(self, texts: Sequence[str]) -> List[Dict[str, int]]:
+        """複数のテキストをまとめて数える"""
+        return [self.count(text) for text in texts]
+
+    def contains(self, text: str, label: str) -> bool:
+        """テキストにラベルの語が1つでも含まれるか"""
+        return self.count(text)[label] > 0
+
+
+class Lexicon:
+    """感情・重要語・ストップワードの辞書"""
+
+    MATCH_LABELS = ("positive", "negative", "important")
+
+    def __init__(self, lexicons: Optional[Dict[str, Iterable[str]]] = None, backend: Optional[str] = None):
+        lexicons = {**DEFAULT_LEXICONS, **(lexicons or {})}
+        self.matcher = LexiconMatcher({label: lexicons[label] for label in self.MATCH_LABELS}, backend=backend)
+        self.stopwords: FrozenSet[str] = frozenset(word.lower() for word in lexicons["stopwords"])
+
+    def sentiment(self, text: str) -> str:
+        """positive / negative / neutral を返す"""
+        if not text:
+            return "neutral"
+        counts = self.matcher.count(text)
+        if counts["positive"] > counts["negative"]:
+            return "positive"
+        if counts["negative"] > counts["positive"]:
+            return "negative"
+        return "neutral"
+
+    def sentiments(self, texts: Sequence[str]) -> List[str]:
+        """複数のテキストの感情をまとめて判定する"""
+        return [self.sentiment(text) for text in texts]
+
+    def is_important(self, text: str) -> bool:
+        """重要語を含むかどうか"""
+        return self.matcher.contains(text, "important")
+
+    def is_stopword(self, word: str) -> bool:
+        return word.lower() in self.stopwords
+
+
+def load_lexicons(path: Optional[str]) -> Dict[str, List[str]]:
+    """JSONファイル（ラベルから語のリスト）から辞書を読み込む"""
+    if not path:
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to load lexicon file {path}: {str(e)}")
+        return {}
+    return {label: list(words) for label, words in data.items() if label in DEFAULT_LEXICONS}
+
+
+_lexicon: Optional[Lexicon] = None
+
+
+def get_lexicon() -> Lexicon:
+    """プロセス全体で共有する辞書を返す（オートマトンは1回だけ作成する）"""
+    global _lexicon
+    if _lexicon is None:
+        _lexicon = Lexicon(load_lexicons(os.getenv("LEXICON_PATH")))
+    return _lexicon
@@ -0,0 +1,116 @@
+import os
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+from .cache import DEFAULT_CACHE_DIR, TwoTierCache, hash_key
+from .http_client import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# リクエスト単位でキャッシュを読まない（結果は保存する）ためのフラグ。非同期タスクにも引き継がれる
+_bypass: ContextVar[bool] = ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def bypass_llm_cache(enabled: bool = True) -> Iterator[None]:
+    """このブロック内のLLM呼び出しはキャッシュを読まずにAPIを呼び出す"""
+    token = _bypass.set(enabled)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def llm_cache_bypassed() -> bool:
+    """現在のコンテキストでキャッシュを読まない設定かどうか"""
+    return _bypass.get()
+
+
+class LLMCache:
+    """LLMの応答をプロバイダー・モデル・プロンプト・生成設定ごとに保存するキャッシュ
+
+    メモリ上のLRUとSQLiteの2層（TwoTierCache）に保存する。プロンプトはSHA-256の
+    ハッシュとしてキーに含めるため、長いプロンプトでもキーの長さは一定になる。
+    エラーは保存しない。
+    """
+
+    def __init__(self, cache: TwoTierCache, ttl: Optional[float] = None):
+        """
+        Args:
+            cache: 保存先のキャッシュ
+            ttl: 有効期限（秒、Noneの場合はcacheのデフォルト）
+        """
+        self.cache = cache
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {"bypassed": 0, "stored": 0}
+
+    @staticmethod
+    def make_key(provider: str, model: str, prompt: str, config: Optional[Dict[str, Any]] = None) -> str:
+        """キャッシュのキーを作成する"""
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return hash_key("llm", provider, model, prompt_hash, config or {})
+
+    def get(self, provider: str, model: str, prompt: str,
+            config: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """保存済みの応答を返す（ない場合・バイパス中はNone）"""
+        if llm_cache_bypassed():
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return None
+        return self.cache.get(self.make_key(provider, model, prompt, config))
+
+    def set(self, provider: str, model: str, prompt: str, config: Optional[Dict[str, Any]], text: str) -> None:
+        """応答を保存する"""
+        self.cache.set(self.make_key(provider, model, prompt, config), text, ttl=self.ttl)
+        with self._lock:
+            self._stats["stored"] += 1
+
+    def cached(self, provider: str, model: str, prompt: str, config: Optional[Dict[str, Any]],
+               call: Callable[[], str]) -> str:
+        """キャッシュにない場合だけcallでLLMを呼び出し、結果を保存する"""
+        text = self.get(provider, model, prompt, config)
+        if text is not None:
+            return text
+        text = call()
+        self.set(provider, model, prompt, config, text)
+        return text
+
+    async def acached(self, provider: str, model: str, prompt: str, config: Optional[Dict[str, Any]],
+                      call: Callable[[], Awaitable[str]]) -> str:
+        """cachedの非同期版（SQLiteの読み書きは共有Executorで行い、イベントループを塞がない）"""
+        text = await run_blocking(self.get, provider, model, prompt, config)
+        if text is not None:
+            return text
+        text = await call()
+        await run_blocking(self.set, provider, model, prompt, config, text)
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット率（= 省略したLLM呼び出しの割合）などの統計情報を返す"""
+        with self._lock:
+            return {**self.cache.stats(), **self._stats}
+
+
+_llm_cache: Optional[LLMCache] = None
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """全てのLLMプロバイダーで共有する応答キャッシュを返す（無効の場合はNone）"""
+    global _llm_cache
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    if _llm_cache is None:
+        ttl = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+        _llm_cache = LLMCache(TwoTierCache(
+            "llm_responses",
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512")),
+            ttl=ttl,
+            db_path=os.getenv("LLM_CACHE_PATH", os.path.join(DEFAULT_CACHE_DIR, "llm_cache.sqlite3")),
+            max_disk_entries=int(os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", "20000")),
+        ), ttl=ttl)
+    return _llm_cache
@@ -6,6 +6,8 @@ from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
 
+from .llm_cache import get_llm_cache
+
 class OpenAIService:
     """OpenAI API based analysis service"""
 
@@ -14,8 +16,8 @@ class OpenAIService:
         self.api_key = os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
-        model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
-        self.llm = ChatOpenAI(openai_api_key=self.api_key, model_name=model)
+        self.model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+        self.llm = ChatOpenAI(openai_api_key=self.api_key, model_name=self.model)
 
         self.analysis_prompt = PromptTemplate(
             input_variables=["results"],
@@ -33,7 +35,16 @@ class OpenAIService:
             else:
                 text = str(results)
 
-            analysis_result = await self.analysis_chain.arun(results=text)
+            # 同じモデル・プロンプト・生成設定の応答はキャッシュから返す
+            cache = get_llm_cache()
+            if cache is None:
+                analysis_result = await self.analysis_chain.arun(results=text)
+            else:
+                analysis_result = await cache.acached(
+                    "openai", self.model, self.analysis_prompt.format(results=text),
+                    {"temperature": self.llm.temperature},
+                    lambda: self.analysis_chain.arun(results=text)
+                )
             return {"raw_analysis": analysis_result}
         except Exception as e:
             self.logger.error(f"OpenAI analysis failed: {e}")
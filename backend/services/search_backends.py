@@ -0,0 +1,264 @@
+import time
+import asyncio
+import logging
+import functools
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """連続して失敗するバックエンドを一定時間スキップするサーキットブレーカー
+
+    closed（通常） → failure_threshold回連続で失敗すると open（スキップ）
+    → reset_timeout秒後に half_open（1回だけ試行） → 成功で closed / 失敗で open
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """リクエストを送ってよいか（half_openでは同時に1回だけ許可する）"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class SearchBackend:
+    """検索バックエンド（検索関数・レイテンシ履歴・サーキットブレーカー）"""
+
+    def __init__(self, name: str, search_fn: Callable[[str, int], List[Dict[str, Any]]],
+                 available: Optional[Callable[[], bool]] = None, window: int = 50,
+                 breaker: Optional[CircuitBreaker] = None):
+        """
+        Args:
+            name: バックエンド名（結果のmetadata['backend']に設定される）
+            search_fn: (query, max_pages) を受け取り結果のリストを返す関数（失敗時は例外を送出）
+            available: バックエンドが利用可能かを返す関数（APIキー未設定などの判定）
+            window: p95の計算に使う直近のレイテンシ数
+            breaker: サーキットブレーカー
+        """
+        self.name = name
+        self.search_fn = search_fn
+        self.available = available or (lambda: True)
+        self.breaker = breaker or CircuitBreaker()
+        self._latencies: "deque[float]" = deque(maxlen=window)
+        self._stats = {"calls": 0, "successes": 0, "failures": 0, "skipped": 0}
+        self._lock = threading.Lock()
+
+    def run(self, query: str, max_pages: int) -> List[Dict[str, Any]]:
+        """検索を実行し、レイテンシと成否を記録する"""
+        with self._lock:
+            self._stats["calls"] += 1
+        start = time.perf_counter()
+        try:
+            results = self.search_fn(query, max_pages)
+        except Exception:
+            self._record(False, time.perf_counter() - start)
+            raise
+        self._record(True, time.perf_counter() - start)
+        return results or []
+
+    def _record(self, success: bool, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+            self._stats["successes" if success else "failures"] += 1
+        if success:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def record_skip(self) -> None:
+        with self._lock:
+            self._stats["skipped"] += 1
+
+    @property
+    def sample_count(self) -> int:
+        return len(self._latencies)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """直近のレイテンシのパーセンタイル（履歴がない場合はNone）"""
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def stats(self) -> Dict[str, Any]:
+        """統計情報を返す"""
+        with self._lock:
+            stats = dict(self._stats)
+        return {**stats, "p50": self.percentile(0.5), "p95": self.percentile(0.95), "state": self.breaker.state}
+
+
+class SearchBackendRegistry:
+    """検索バックエンドを優先順に登録し、ヘッジ付きで並列に検索する
+
+    - 最優先のバックエンドを開始し、そのp95レイテンシを過ぎても完了しなければ次を開始する
+    - バックエンドが失敗した場合は待たずに次を開始する
+    - サーキットブレーカーがopenのバックエンドはスキップする
+    - 期限内に完了したバックエンドの結果を結合し、min_results件に達した時点で返す
+    """
+
+    def __init__(self, deadline: float = 20.0, default_hedge_delay: float = 3.0,
+                 min_hedge_delay: float = 0.5, min_samples: int = 5, min_results: int = 3,
+                 max_concurrent_searches: int = 4):
+        """
+        Args:
+            deadline: 検索全体の期限（秒）
+            default_hedge_delay: レイテンシ履歴が少ない場合のヘッジまでの待機時間（秒）
+            min_hedge_delay: ヘッジまでの最小待機時間（秒）
+            min_samples: p95を使うために必要なレイテンシ履歴の数
+            min_results: この件数に達したら残りのバックエンドを待たずに返す
+            max_concurrent_searches: asearchで同時に実行する検索の数
+        """
+        self.deadline = deadline
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        self.min_results = min_results
+        self.max_concurrent_searches = max_concurrent_searches
+        self._backends: List[SearchBackend] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def register(self, backend: SearchBackend) -> SearchBackend:
+        """バックエンドを優先度の低い側に追加する"""
+        self._backends.append(backend)
+        return backend
+
+    def get(self, name: str) -> Optional[SearchBackend]:
+        return next((backend for backend in self._backends if backend.name == name), None)
+
+    def hedge_delay(self, backend: SearchBackend) -> float:
+        """次のバックエンドを開始するまでの待機時間（バックエンドのp95）"""
+        if backend.sample_count < self.min_samples:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, backend.percentile(0.95))
+
+    def _candidates(self) -> List[SearchBackend]:
+        candidates = []
+        for backend in self._backends:
+            try:
+                available = backend.available()
+            except Exception:
+                available = False
+            if available:
+                candidates.append(backend)
+        return candidates
+
+    def search(self, query: str, max_pages: int = 5, deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+        """ヘッジ付きで検索し、期限内に完了したバックエンドの結果を結合して返す"""
+        pending_backends = self._candidates()
+        end = time.monotonic() + (self.deadline if deadline is None else deadline)
+        # 期限後も実行中の検索は待たずに破棄するため、検索ごとにExecutorを作成する
+        executor = ThreadPoolExecutor(max_workers=max(1, len(pending_backends)), thread_name_prefix="search")
+        running: Dict[Any, SearchBackend] = {}
+        merged: List[Dict[str, Any]] = []
+        next_start = time.monotonic()
+
+        try:
+            while True:
+                now = time.monotonic()
+                # ヘッジ時刻に達したか、実行中のものがなければ次のバックエンドを開始する
+                while pending_backends and (now >= next_start or not running):
+                    backend = pending_backends.pop(0)
+                    if not backend.breaker.allow():
+                        backend.record_skip()
+                        logger.info(f"Search backend {backend.name} skipped (circuit {backend.breaker.state})")
+                        continue
+                    running[executor.submit(backend.run, query, max_pages)] = backend
+                    next_start = now + self.hedge_delay(backend)
+                    break
+
+                if not running or now >= end:
+                    break
+
+                timeout = end - now
+                if pending_backends:
+                    timeout = min(timeout, max(0.0, next_start - now))
+                done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    backend = running.pop(future)
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        logger.warning(f"Search backend {backend.name} failed: {str(e)}")
+                        # 失敗した場合は次のバックエンドをすぐに開始する
+                        next_start = time.monotonic()
+                        continue
+                    for result in results:
+                        result.setdefault('metadata', {}).setdefault('backend', backend.name)
+                    merged.extend(results)
+                    logger.info(f"Search backend {backend.name} returned {len(results)} results")
+
+                if len(merged) >= self.min_results:
+                    break
+        finally:
+            executor.shutdown(wait=False)
+
+        if running:
+            logger.info(f"Search deadline reached; ignoring {', '.join(b.name for b in running.values())}")
+        return merged
+
+    async def asearch(self, query: str, max_pages: int = 5,
+                      deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+        """searchをレジストリ専用のExecutorで実行する
+
+        検索の待機は期限まで続き、その間にバックエンドが共有Executorへ処理を投入するため、
+        共有Executorのワーカーを検索の間占有しないよう専用のExecutorを使う。
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(1, self.max_concurrent_searches), thread_name_prefix="search-registry"
+                )
+            executor = self._executor
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(self.search, query, max_pages, deadline))
+
+    def close(self) -> None:
+        """asearch用のExecutorを停止する"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        """バックエンドごとの統計情報を返す"""
+        return {backend.name: backend.stats() for backend in self._backends}
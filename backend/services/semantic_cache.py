@@ -0,0 +1,414 @@
+import os
+import re
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import itertools
+import threading
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .cache import DEFAULT_CACHE_DIR, hash_key, normalize_query
+
+logger = logging.getLogger(__name__)
+
+# 言い換え・日英の表記揺れを同じ概念として扱う語のグループ（SEMANTIC_CACHE_ALIASES_PATHのJSONで追加できる）
+# {"terms": [...], "weight": w} の形式では概念の重みを変えられる。「動向」「日本」のように
+# 日本語のクエリでは省略されやすい語は重みを下げ、付け足しても別の質問とみなさないようにする
+DEFAULT_ALIASES: List[Any] = [
+    ["生成ai", "generative ai", "genai", "gen ai"],
+    ["人工知能", "ai", "artificial intelligence"],
+    ["大規模言語モデル", "llm", "large language model", "large language models"],
+    ["機械学習", "machine learning"],
+    ["規制", "法規制", "regulation", "regulations", "regulatory"],
+    {"terms": ["動向", "トレンド", "最新動向", "trend", "trends", "latest"], "weight": 0.5},
+    {"terms": ["日本", "国内", "japan", "japanese"], "weight": 0.5},
+    ["米国", "アメリカ", "us", "usa", "united states"],
+    ["中国", "china", "chinese"],
+    ["欧州", "eu", "europe", "european"],
+    ["市場", "market", "markets"],
+    ["影響", "impact", "effects"],
+    ["課題", "問題点", "challenges", "issues"],
+    ["将来", "今後", "未来", "future", "outlook"],
+    ["比較", "違い", "comparison", "compare", "vs"],
+    ["量子コンピュータ", "量子コンピューター", "quantum computer", "quantum computing"],
+    ["半導体", "semiconductor", "semiconductors", "chip", "chips"],
+    ["気候変動", "climate change"],
+    ["電気自動車", "ev", "electric vehicle", "electric vehicles"],
+    ["セキュリティ", "security", "cybersecurity"],
+]
+
+# 概念・単語の重み（概念の一致を最も重視する）。日本語の連続した文字列は文字bigramに分解し、
+# 文字列全体で1語分の重みになるように正規化する
+CONCEPT_WEIGHT = 3.0
+WORD_WEIGHT = 2.0
+
+_ASCII_WORD = re.compile(r"[a-z0-9]+")
+_NON_ASCII_RUN = re.compile(r"[^\x00-\x7f]+")
+
+
+def load_aliases(path: Optional[str]) -> List[Any]:
+    """JSONファイル（語のリスト、または{"terms": 語のリスト, "weight": 重み}のリスト）から言い換えのグループを読み込む"""
+    if not path:
+        return []
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [group if isinstance(group, dict) else list(group) for group in json.load(f)]
+    except (OSError, ValueError, TypeError) as e:
+        logger.error(f"Failed to load alias file {path}: {str(e)}")
+        return []
+
+
+class HashingEmbedder:
+    """ネットワーク・学習済みモデルを使わないハッシュ化ベクトルによるクエリの埋め込み
+
+    言い換えのグループに含まれる語を概念として抽出し、残りの英単語と日本語の文字bigramを
+    特徴量とする。特徴量は符号付きハッシュでdim次元に射影し、L2正規化する。
+    """
+
+    def __init__(self, dim: int = 1024, aliases: Optional[Sequence[Any]] = None):
+        """
+        Args:
+            dim: ベクトルの次元数
+            aliases: 言い換えのグループ（Noneの場合はDEFAULT_ALIASES）
+        """
+        self.dim = dim
+        self._aliases: List[Tuple[str, str, float]] = []
+        for group in DEFAULT_ALIASES if aliases is None else aliases:
+            terms, weight = (group.get("terms", []), float(group.get("weight", 1.0))) \
+                if isinstance(group, dict) else (group, 1.0)
+            forms = [unicodedata.normalize("NFKC", form).lower() for form in terms if form]
+            if forms:
+                self._aliases.extend((form, forms[0], weight) for form in forms)
+        # 長い表記から先に照合する（"生成ai"を"ai"より優先する）
+        self._aliases.sort(key=lambda alias: len(alias[0]), reverse=True)
+
+    def features(self, text: str) -> Dict[str, float]:
+        """テキストから特徴量と重みを抽出する"""
+        text = " " + normalize_query(text) + " "
+        features: Dict[str, float] = {}
+        for form, concept, weight in self._aliases:
+            # 英字の表記は単語境界で照合する（"ai"が"said"に一致しないように）
+            if form.isascii():
+                pattern = r"(?<![a-z0-9])" + re.escape(form) + r"(?![a-z0-9])"
+                text, count = re.subn(pattern, " ", text)
+            else:
+                count = text.count(form)
+                text = text.replace(form, " ")
+            if count:
+                features["c:" + concept] = CONCEPT_WEIGHT * weight
+        for word in _ASCII_WORD.findall(text):
+            features["w:" + word] = WORD_WEIGHT
+        for run in _NON_ASCII_RUN.findall(text):
+            grams = [run] if len(run) < 2 else [run[i:i + 2] for i in range(len(run) - 1)]
+            for gram in grams:
+                features["g:" + gram] = max(features.get("g:" + gram, 0.0), WORD_WEIGHT / len(grams) ** 0.5)
+        return features
+
+    def embed(self, text: str) -> np.ndarray:
+        """テキストのL2正規化済みベクトルを返す（特徴量がない場合はゼロベクトル）"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self.features(text).items():
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += weight if h & 0x80000000 else -weight
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+
+class LSHIndex:
+    """ランダム超平面（SimHash）による近似最近傍探索のインデックス
+
+    num_tables個のハッシュテーブルにnum_bitsビットの署名で登録し、検索時は同じバケットと
+    1ビット違いのバケット（マルチプローブ）の候補だけとコサイン類似度を計算する。
+    """
+
+    def __init__(self, dim: int, num_tables: int = 12, num_bits: int = 8, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.dim = dim
+        self.num_bits = num_bits
+        self._planes = rng.standard_normal((num_tables, num_bits, dim)).astype(np.float32)
+        self._powers = 1 << np.arange(num_bits)
+        self._tables: List[Dict[int, set]] = [{} for _ in range(num_tables)]
+        self._vectors: Dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def _signatures(self, vector: np.ndarray) -> List[int]:
+        bits = (self._planes @ vector) > 0
+        return [int(signature) for signature in bits @ self._powers]
+
+    def add(self, item_id: int, vector: np.ndarray) -> None:
+        """ベクトルを登録する"""
+        self._vectors[item_id] = vector
+        for table, signature in zip(self._tables, self._signatures(vector)):
+            table.setdefault(signature, set()).add(item_id)
+
+    def remove(self, item_id: int) -> None:
+        """ベクトルを削除する"""
+        vector = self._vectors.pop(item_id, None)
+        if vector is None:
+            return
+        for table, signature in zip(self._tables, self._signatures(vector)):
+            bucket = table.get(signature)
+            if bucket is not None:
+                bucket.discard(item_id)
+                if not bucket:
+                    del table[signature]
+
+    def search(self, vector: np.ndarray, k: int = 1) -> List[Tuple[int, float]]:
+        """類似度の高い順に最大k件の(ID, コサイン類似度)を返す"""
+        candidates = set()
+        for table, signature in zip(self._tables, self._signatures(vector)):
+            candidates.update(table.get(signature, ()))
+            for bit in range(self.num_bits):
+                candidates.update(table.get(signature ^ (1 << bit), ()))
+        if not candidates:
+            return []
+        ids = list(candidates)
+        similarities = np.stack([self._vectors[item_id] for item_id in ids]) @ vector
+        order = np.argsort(-similarities)[:k]
+        return [(ids[i], float(similarities[i])) for i in order]
+
+
+class SemanticCache:
+    """クエリの意味的な近さで研究結果を再利用するキャッシュ
+
+    クエリをHashingEmbedderで埋め込み、スコープ（エンドポイントとパラメータ）ごとの
+    LSHIndexで最も近い保存済みクエリを探す。類似度がthreshold以上なら保存済みの結果を返す。
+    エントリはSQLiteに保存し、起動時にインデックスを再構築する。
+    """
+
+    def __init__(self, name: str = "semantic_cache", threshold: float = 0.9, ttl: float = 86400.0,
+                 max_entries: int = 2000, db_path: Optional[str] = None,
+                 embedder: Optional[HashingEmbedder] = None):
+        """
+        Args:
+            name: SQLiteのテーブル名
+            threshold: 保存済みの結果を返すコサイン類似度の下限
+            ttl: 有効期限（秒）
+            max_entries: 最大エントリ数（超えた場合は保存した順に古いものから削除する）
+            db_path: SQLiteファイルのパス（Noneの場合はメモリのみ）
+            embedder: クエリの埋め込み
+        """
+        self.name = name
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.embedder = embedder or HashingEmbedder()
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, LSHIndex] = {}
+        # ID -> (スコープ, クエリ, 有効期限, 作成日時, 結果のJSON)。IDの昇順（保存した順）に並ぶ
+        self._entries: Dict[int, Tuple[str, str, float, float, str]] = {}
+        # (スコープ, 正規化したクエリ) -> ID（同じクエリの置き換え用）
+        self._by_query: Dict[Tuple[str, str], int] = {}
+        self._next_id = 1
+        self._stats = {"lookups": 0, "hits": 0, "exact_hits": 0, "misses": 0, "near_misses": 0,
+                       "sets": 0, "evictions": 0, "expirations": 0}
+        self._hit_similarity_sum = 0.0
+        # 最も近いクエリとの類似度の分布（0.1刻み、閾値の調整用）
+        self._histogram = [0] * 10
+        self._conn = None
+        if db_path:
+            self._open_db(db_path)
+
+    @staticmethod
+    def scope_key(scope: Optional[Dict[str, Any]]) -> str:
+        """スコープ（同じ結果を返してよいパラメータの組）のキーを作成する"""
+        return hash_key("semantic", scope or {})
+
+    def _open_db(self, db_path: str) -> None:
+        """SQLiteファイルを開き、有効なエントリをインデックスに読み込む"""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.name} ("
+                "id INTEGER PRIMARY KEY, scope TEXT NOT NULL, query TEXT NOT NULL, "
+                "vector BLOB NOT NULL, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute(f"DELETE FROM {self.name} WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+            rows = self._conn.execute(
+                f"SELECT id, scope, query, vector, value, expires_at, created_at FROM {self.name} ORDER BY id"
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to open semantic cache database {db_path}: {str(e)}")
+            self._conn = None
+            return
+        for item_id, scope, query, blob, value, expires_at, created_at in rows:
+            vector = np.frombuffer(blob, dtype=np.float32)
+            if vector.shape[0] != self.embedder.dim:
+                continue
+            self._add(item_id, scope, query, vector, value, expires_at, created_at)
+        self._next_id = max(self._entries, default=0) + 1
+        logger.info(f"Loaded {len(self._entries)} semantic cache entries")
+
+    def _index(self, scope: str) -> LSHIndex:
+        if scope not in self._indexes:
+            self._indexes[scope] = LSHIndex(self.embedder.dim)
+        return self._indexes[scope]
+
+    def _add(self, item_id: int, scope: str, query: str, vector: np.ndarray, value: str,
+             expires_at: float, created_at: float) -> None:
+        self._entries[item_id] = (scope, query, expires_at, created_at, value)
+        self._by_query[(scope, normalize_query(query))] = item_id
+        self._index(scope).add(item_id, vector)
+
+    def _remove(self, item_ids: Iterable[int], commit: bool = True) -> None:
+        """エントリを削除する（SQLiteからは1回のトランザクションで削除する）"""
+        item_ids = list(item_ids)
+        for item_id in item_ids:
+            scope, query = self._entries.pop(item_id)[:2]
+            key = (scope, normalize_query(query))
+            if self._by_query.get(key) == item_id:
+                del self._by_query[key]
+            self._indexes[scope].remove(item_id)
+            if not len(self._indexes[scope]):
+                del self._indexes[scope]
+        if self._conn is not None and item_ids:
+            try:
+                self._conn.executemany(f"DELETE FROM {self.name} WHERE id = ?", [(item_id,) for item_id in item_ids])
+                if commit:
+                    self._conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Semantic cache delete failed: {str(e)}")
+
+    def lookup(self, query: str, scope: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """意味的に近いクエリの結果を返す（ない場合はNone）
+
+        Returns:
+            value（保存済みの結果）、similarity、matched_query、approximate（完全一致でない場合True）
+        """
+        vector = self.embedder.embed(query)
+        scope_key = self.scope_key(scope)
+        now = time.time()
+        with self._lock:
+            self._stats["lookups"] += 1
+            index = self._indexes.get(scope_key)
+            neighbors = index.search(vector, k=4) if index is not None and vector.any() else []
+            best = None
+            expired = []
+            for item_id, similarity in neighbors:
+                if self._entries[item_id][2] <= now:
+                    expired.append(item_id)
+                    continue
+                best = (item_id, similarity)
+                break
+            self._remove(expired)
+            self._stats["expirations"] += len(expired)
+            similarity = best[1] if best else 0.0
+            self._histogram[min(9, max(0, int(similarity * 10)))] += 1
+            if best is None or similarity < self.threshold:
+                self._stats["misses"] += 1
+                if similarity >= self.threshold - 0.1:
+                    self._stats["near_misses"] += 1
+                return None
+            _, matched_query, _, _, value = self._entries[best[0]]
+            exact = normalize_query(matched_query) == normalize_query(query)
+            self._stats["hits"] += 1
+            self._stats["exact_hits"] += int(exact)
+            self._hit_similarity_sum += similarity
+        logger.info(f"Semantic cache hit for '{query}' (matched '{matched_query}', similarity {similarity:.3f})")
+        return {
+            "value": json.loads(value),
+            "similarity": similarity,
+            "matched_query": matched_query,
+            "approximate": not exact,
+        }
+
+    def store(self, query: str, scope: Optional[Dict[str, Any]], value: Any) -> None:
+        """クエリの結果を保存する（同じスコープの同じクエリは置き換える）"""
+        vector = self.embedder.embed(query)
+        if not vector.any():
+            return
+        scope_key = self.scope_key(scope)
+        payload = json.dumps(value, ensure_ascii=False, default=str)
+        now = time.time()
+        expires_at = now + self.ttl
+        normalized = normalize_query(query)
+        with self._lock:
+            replaced = self._by_query.get((scope_key, normalized))
+            if replaced is not None:
+                self._remove([replaced], commit=False)
+            item_id = self._next_id
+            self._next_id += 1
+            self._add(item_id, scope_key, query, vector, payload, expires_at, now)
+            self._stats["sets"] += 1
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        f"INSERT INTO {self.name} (id, scope, query, vector, value, expires_at, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (item_id, scope_key, query, vector.astype(np.float32).tobytes(), payload, expires_at, now)
+                    )
+                except sqlite3.Error as e:
+                    logger.error(f"Semantic cache write failed: {str(e)}")
+            overflow = len(self._entries) - self.max_entries
+            if overflow > 0:
+                # _entriesは保存した順に並ぶため、先頭から削除する
+                self._remove(list(itertools.islice(self._entries, overflow)), commit=False)
+                self._stats["evictions"] += overflow
+            if self._conn is not None:
+                try:
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Semantic cache write failed: {str(e)}")
+
+    def clear(self) -> None:
+        """全てのエントリを削除する"""
+        with self._lock:
+            self._entries.clear()
+            self._by_query.clear()
+            self._indexes.clear()
+            if self._conn is not None:
+                self._conn.execute(f"DELETE FROM {self.name}")
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット率・閾値・類似度の分布などの統計情報を返す"""
+        with self._lock:
+            lookups = self._stats["lookups"]
+            hits = self._stats["hits"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "threshold": self.threshold,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "approximate_hit_rate": (hits - self._stats["exact_hits"]) / lookups if lookups else 0.0,
+                "mean_hit_similarity": self._hit_similarity_sum / hits if hits else 0.0,
+                "similarity_histogram": {f"{i / 10:.1f}": count for i, count in enumerate(self._histogram)},
+            }
+
+    def close(self) -> None:
+        """SQLite接続を閉じる"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """研究エンドポイントで共有する意味的キャッシュを返す（無効の場合はNone）"""
+    global _semantic_cache
+    if os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    if _semantic_cache is None:
+        extra = load_aliases(os.getenv("SEMANTIC_CACHE_ALIASES_PATH"))
+        _semantic_cache = SemanticCache(
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9")),
+            ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "86400")),
+            max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2000")),
+            db_path=os.getenv("SEMANTIC_CACHE_PATH", os.path.join(DEFAULT_CACHE_DIR, "semantic_cache.sqlite3")),
+            embedder=HashingEmbedder(aliases=DEFAULT_ALIASES + extra),
+        )
+    return _semantic_cache
@@ -0,0 +1,14 @@
+import json
+from typing import Any, Optional
+
+# プロキシ（nginx等）にバッファリングさせず、イベントを届いた順に送るためのヘッダー
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_sse(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    """Server-Sent Eventsの1イベントを作成する（データはJSON、改行を含まない1行にする）"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, default=str)}")
+    return "\n".join(lines) + "\n\n"
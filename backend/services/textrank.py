@@ -0,0 +1,168 @@
+import os
+import re
+import logging
+import unicodedata
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[。．！？!?])|(?<=\.)\s+|\n+")
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def split_sentences(text: str, min_chars: int = 20, max_chars: int = 200) -> List[str]:
+    """テキストを文に分割し、短すぎる・長すぎる文と重複を除く"""
+    sentences = []
+    seen = set()
+    for sentence in _SENTENCE_BOUNDARY.split(text or ""):
+        sentence = sentence.strip()
+        if min_chars <= len(sentence) <= max_chars and sentence not in seen:
+            seen.add(sentence)
+            sentences.append(sentence)
+    return sentences
+
+
+def _bigrams(sentence: str) -> set:
+    """類似度計算用の文字bigram（空白で区切られない日本語にも対応）"""
+    normalized = _NON_WORD.sub("", unicodedata.normalize("NFKC", sentence).lower())
+    return {normalized[i:i + 2] for i in range(len(normalized) - 1)}
+
+
+class TextRank:
+    """文の類似度グラフ上のTextRankで重要文を選ぶ
+
+    類似度は文字bigramの重なりを長さの対数で正規化したもので、文×bigramの疎行列の積で
+    求める。各文について類似度の高いneighbors文だけを残した疎なグラフ上でべき乗法により順位を計算する。
+    priorを指定した場合は、ランダムジャンプの遷移先をpriorの重みに比例させる（Personalized PageRank）。
+    """
+
+    def __init__(self, max_sentences: int = 200, neighbors: int = 10, damping: float = 0.85,
+                 max_iterations: int = 100, tolerance: float = 1e-6,
+                 prior: Optional[Callable[[str], float]] = None):
+        """
+        Args:
+            max_sentences: 1回の順位付けで扱う最大の文数（超えた分は先頭から採用する）
+            neighbors: 各文について残す類似文の数
+            damping: ダンピング係数
+            max_iterations: べき乗法の最大反復回数
+            tolerance: 収束判定の閾値（L1ノルム）
+            prior: 文の事前の重み（正の値。Noneの場合は全ての文を同じ重みとする）
+        """
+        self.max_sentences = max_sentences
+        self.neighbors = neighbors
+        self.damping = damping
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.prior = prior
+
+    def similarity_matrix(self, sentences: Sequence[str]) -> sparse.csr_matrix:
+        """文×文の疎な類似度行列（各行の上位neighbors件のみを残し、対称にしたもの）"""
+        grams = [_bigrams(sentence) for sentence in sentences]
+        vocabulary: Dict[str, int] = {}
+        rows, cols = [], []
+        for row, sentence_grams in enumerate(grams):
+            for gram in sentence_grams:
+                rows.append(row)
+                cols.append(vocabulary.setdefault(gram, len(vocabulary)))
+
+        n = len(sentences)
+        if n == 0:
+            return sparse.csr_matrix((0, 0), dtype=np.float32)
+        incidence = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(n, max(len(vocabulary), 1))
+        )
+        overlap = (incidence @ incidence.T).tocoo()
+
+        log_lengths = np.log(np.maximum(np.asarray(incidence.sum(axis=1)).ravel(), 2.0))
+        keep = overlap.row != overlap.col
+        row, col = overlap.row[keep], overlap.col[keep]
+        data = overlap.data[keep] / (log_lengths[row] + log_lengths[col])
+        weights = sparse.csr_matrix((data, (row, col)), shape=(n, n))
+
+        # 各行の上位neighbors件だけを残し、対称にする
+        top_rows, top_cols, top_data = [], [], []
+        for i in range(n):
+            start, stop = weights.indptr[i], weights.indptr[i + 1]
+            row_data = weights.data[start:stop]
+            row_cols = weights.indices[start:stop]
+            if len(row_data) > self.neighbors:
+                top = np.argpartition(-row_data, self.neighbors - 1)[:self.neighbors]
+                row_data, row_cols = row_data[top], row_cols[top]
+            top_rows.append(np.full(len(row_data), i))
+            top_cols.append(row_cols)
+            top_data.append(row_data)
+        weights = sparse.csr_matrix(
+            (np.concatenate(top_data), (np.concatenate(top_rows), np.concatenate(top_cols))), shape=(n, n)
+        )
+        return weights.maximum(weights.T).tocsr()
+
+    def scores(self, sentences: Sequence[str]) -> np.ndarray:
+        """各文のTextRankスコア（合計1）"""
+        n = len(sentences)
+        if n == 0:
+            return np.zeros(0)
+        if n == 1:
+            return np.ones(1)
+
+        weights = self.similarity_matrix(sentences)
+        out_degree = np.asarray(weights.sum(axis=1)).ravel()
+        dangling = out_degree == 0
+        transition_t = (sparse.diags(1.0 / np.where(dangling, 1.0, out_degree)) @ weights).T.tocsr()
+
+        teleport = np.full(n, 1.0 / n)
+        if self.prior is not None:
+            weights_prior = np.array([self.prior(sentence) for sentence in sentences], dtype=np.float64)
+            teleport = weights_prior / weights_prior.sum()
+
+        rank = np.full(n, 1.0 / n)
+        for _ in range(self.max_iterations):
+            # 類似文のない文からはランダムジャンプと同じ分布で遷移させる
+            updated = (1 - self.damping) * teleport + self.damping * (
+                transition_t @ rank + rank[dangling].sum() * teleport
+            )
+            converged = np.abs(updated - rank).sum() < self.tolerance
+            rank = updated
+            if converged:
+                break
+        return rank
+
+    def rank(self, sentences: Sequence[str], top_k: int = 5) -> List[Tuple[str, float]]:
+        """スコアの高い順に(文, スコア)を返す"""
+        sentences = list(sentences)[:self.max_sentences]
+        scores = self.scores(sentences)
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        return [(sentences[i], float(scores[i])) for i in order]
+
+    def key_sentences(self, text: str, top_k: int = 5) -> List[str]:
+        """テキストの重要文をスコアの高い順に返す"""
+        return [sentence for sentence, _ in self.rank(split_sentences(text), top_k)]
+
+    def summarize(self, texts: Sequence[str], per_text: int = 3,
+                  top_k: int = 5) -> Tuple[List[List[str]], List[str]]:
+        """各テキストの重要文と、それらを集めた中での全体の重要文を返す"""
+        per_text_sentences = [self.key_sentences(text, per_text) for text in texts]
+        pooled = [sentence for sentences in per_text_sentences for sentence in sentences]
+        corpus = [sentence for sentence, _ in self.rank(list(dict.fromkeys(pooled)), top_k)]
+        return per_text_sentences, corpus
+
+
+_text_rank: Optional[TextRank] = None
+
+
+def get_text_rank() -> TextRank:
+    """プロセス全体で共有するTextRankを返す"""
+    global _text_rank
+    if _text_rank is None:
+        from .lexicon import get_lexicon
+
+        # 重要語（「結論」「調査」等）を含む文を優先する
+        lexicon = get_lexicon()
+        boost = float(os.getenv("TEXTRANK_IMPORTANT_BOOST", "1.0"))
+        _text_rank = TextRank(
+            max_sentences=int(os.getenv("TEXTRANK_MAX_SENTENCES", "200")),
+            prior=lambda sentence: 1.0 + boost * lexicon.is_important(sentence),
+        )
+    return _text_rank
@@ -0,0 +1,80 @@
+import os
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ASCII文字は約4文字で1トークン、日本語等の非ASCII文字は1文字で約1トークンとして見積もる
+ASCII_CHARS_PER_TOKEN = 4
+# 分析の入力がプロンプト全体の場合に、指示と検索結果を区切る見出し（検索結果はこの後ろに置く）
+RESULTS_HEADING = "## 検索結果:\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """トークナイザーを使わずにテキストのトークン数を見積もる（多めに見積もる）"""
+    if not text:
+        return 0
+    ascii_chars = sum(1 for char in text if char < "\x80")
+    return (len(text) - ascii_chars) + -(-ascii_chars // ASCII_CHARS_PER_TOKEN)
+
+
+def split_results_section(text: str) -> Tuple[str, str]:
+    """テキストを(指示, 検索結果)に分ける（RESULTS_HEADINGがない場合は全体を検索結果とする）"""
+    index = text.find(RESULTS_HEADING)
+    if index < 0:
+        return "", text
+    index += len(RESULTS_HEADING)
+    return text[:index], text[index:]
+
+
+async def map_concurrently(items: Sequence[str], func: Callable[[str], Awaitable[str]],
+                           fanout: int = 4) -> List[Optional[str]]:
+    """itemsの各要素にfuncを最大fanout件まで並行して適用する
+
+    失敗した要素の結果はNoneとし、他の要素の処理は続ける。結果の順序はitemsと同じ。
+    """
+    semaphore = asyncio.Semaphore(max(1, fanout))
+
+    async def run(index: int, item: str) -> Optional[str]:
+        async with semaphore:
+            try:
+                return await func(item)
+            except Exception as e:
+                logger.error(f"Map step {index} failed: {str(e)}")
+                return None
+
+    return await asyncio.gather(*(run(index, item) for index, item in enumerate(items)))
+
+
+class AnalysisBudget:
+    """分析プロンプトのトークン予算とmap-reduceの設定"""
+
+    def __init__(self, max_prompt_tokens: int = 8000, chunk_tokens: int = 3000,
+                 chunk_overlap_tokens: int = 100, fanout: int = 4, max_rounds: int = 3):
+        """
+        Args:
+            max_prompt_tokens: 1回の分析プロンプトに含める入力の上限（超える場合はmap-reduceで分析する）
+            chunk_tokens: mapプロンプト1件あたりの入力の上限
+            chunk_overlap_tokens: 隣接するチャンクの重なり
+            fanout: 並行して実行するmapプロンプトの数
+            max_rounds: mapの結果が予算に収まらない場合にmapを繰り返す回数の上限
+        """
+        self.max_prompt_tokens = max_prompt_tokens
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap_tokens = chunk_overlap_tokens
+        self.fanout = fanout
+        self.max_rounds = max_rounds
+
+    def fits(self, text: str) -> bool:
+        """テキストが1回の分析プロンプトに収まるかどうか"""
+        return estimate_tokens(text) <= self.max_prompt_tokens
+
+    @classmethod
+    def from_env(cls) -> "AnalysisBudget":
+        """ANALYSIS_*の環境変数から設定を作成する"""
+        return cls(
+            max_prompt_tokens=int(os.getenv("ANALYSIS_MAX_PROMPT_TOKENS", "8000")),
+            chunk_tokens=int(os.getenv("ANALYSIS_CHUNK_TOKENS", "3000")),
+            fanout=int(os.getenv("ANALYSIS_MAP_FANOUT", "4")),
+        )
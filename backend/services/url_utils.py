@@ -0,0 +1,164 @@
+import re
+import base64
+import binascii
+from functools import lru_cache
+from typing import FrozenSet, Optional
+from urllib.parse import parse_qsl, unquote, urlencode, urljoin, urlsplit, urlunsplit
+
+# どのホストでも除去するトラッキングパラメーター（ページの内容に影響しないことが明らかなもの）
+TRACKING_PARAMS = frozenset({
+    "gclid", "gclsrc", "dclid", "fbclid", "msclkid", "yclid", "twclid", "ttclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok", "vero_id", "oly_anon_id",
+    "oly_enc_id", "rb_clickid", "wt.mc_id", "__twitter_impression",
+})
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "hmb_", "ga_")
+
+# 特定のホストでだけ除去するパラメーター（ref, src等は他のサイトではページの選択に使われ得る）
+HOST_TRACKING_PARAMS = {
+    "youtube.com": frozenset({"feature", "si"}),
+    "youtu.be": frozenset({"feature", "si"}),
+    "open.spotify.com": frozenset({"si"}),
+    "bing.com": frozenset({"form", "cvid", "ocid"}),
+    "msn.com": frozenset({"ocid", "cvid"}),
+    "twitter.com": frozenset({"ref_src", "ref_url", "src"}),
+    "x.com": frozenset({"ref_src", "ref_url", "src"}),
+    "amazon.com": frozenset({"ref", "ref_"}),
+    "amazon.co.jp": frozenset({"ref", "ref_"}),
+    "taobao.com": frozenset({"spm", "scm"}),
+    "tmall.com": frozenset({"spm", "scm"}),
+    "aliexpress.com": frozenset({"spm", "scm"}),
+    "alibaba.com": frozenset({"spm", "scm"}),
+}
+
+# リダイレクトURLを包むホストと、元URLを格納するパラメーター
+REDIRECT_PARAMS = {
+    "www.bing.com": ("u",),
+    "bing.com": ("u",),
+    "www.google.com": ("q", "url"),
+    "google.com": ("q", "url"),
+    "duckduckgo.com": ("uddg",),
+    "l.facebook.com": ("u",),
+    "lm.facebook.com": ("u",),
+    "r.search.yahoo.com": ("RU",),
+    "www.youtube.com": ("q",),
+    "out.reddit.com": ("url",),
+}
+REDIRECT_PATHS = ("/ck/a", "/url", "/l/", "/l.php", "/redirect", "/aclk")
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+_VARIANT_HOST_PREFIX = re.compile(r"^(?:www\d*|m|mobile|amp)\.")
+_AMP_PATH_SUFFIX = re.compile(r"/amp/?$")
+_AMP_PARAMS = frozenset({"amp", "outputtype", "usqp"})
+
+
+def _decode_bing_target(value: str) -> Optional[str]:
+    """Bingの u=a1<base64> 形式のリダイレクト先を復号する"""
+    if value.startswith("a1"):
+        encoded = value[2:]
+        try:
+            decoded = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode("utf-8")
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+        return decoded
+    return value
+
+
+def unwrap_redirect(url: str, max_depth: int = 3) -> str:
+    """検索エンジンやSNSのリダイレクトURLから元のURLを取り出す"""
+    for _ in range(max_depth):
+        parts = urlsplit(url)
+        host = parts.netloc.lower()
+        names = REDIRECT_PARAMS.get(host)
+        if not names or not parts.path.startswith(REDIRECT_PATHS):
+            return url
+        params = dict(parse_qsl(parts.query, keep_blank_values=True))
+        target = None
+        for name in names:
+            value = params.get(name)
+            if not value:
+                continue
+            target = _decode_bing_target(value) if host.endswith("bing.com") else unquote(value)
+            break
+        if not target or not target.startswith(("http://", "https://")):
+            return url
+        url = target
+    return url
+
+
+@lru_cache(maxsize=4096)
+def _host_tracking_params(host: str) -> FrozenSet[str]:
+    """ホスト（サブドメインを含む）で追加で除去するパラメーターを返す"""
+    labels = host.split(".")
+    for index in range(len(labels) - 1):
+        params = HOST_TRACKING_PARAMS.get(".".join(labels[index:]))
+        if params is not None:
+            return params
+    return frozenset()
+
+
+def _is_tracking_param(name: str, host_params: FrozenSet[str] = frozenset()) -> bool:
+    lowered = name.lower()
+    return lowered in TRACKING_PARAMS or lowered in host_params or lowered.startswith(TRACKING_PREFIXES)
+
+
+@lru_cache(maxsize=65536)
+def canonicalize_url(url: str, base: Optional[str] = None) -> str:
+    """URLを正規化する（取得可能なURLのまま保つ）
+
+    - 相対URLをbaseで解決し、リダイレクトURLを展開する
+    - スキームとホストを小文字化し、デフォルトポートを除去する
+    - トラッキングパラメーターを除去し、クエリを並べ替える
+    - フラグメントを除去する
+    http/httpsやwwwの違いは取得結果が変わり得るため、ここでは統一しない（url_keyで統一する）。
+    """
+    if not url:
+        return ""
+    url = url.strip()
+    if base:
+        url = urljoin(base, url)
+    if not url.startswith(("http://", "https://", "HTTP://", "HTTPS://")):
+        return url
+
+    url = unwrap_redirect(url)
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+
+    host = (parts.hostname or "").rstrip(".")
+    try:
+        host = host.encode("idna").decode("ascii")
+    except UnicodeError:
+        pass
+    netloc = host
+    if parts.port is not None and str(parts.port) != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parts.port}"
+    if parts.username:
+        credentials = parts.username + (f":{parts.password}" if parts.password else "")
+        netloc = f"{credentials}@{netloc}"
+
+    path = parts.path or "/"
+    query = ""
+    if parts.query:
+        host_params = _host_tracking_params(host.lower())
+        params = [
+            (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+            if not _is_tracking_param(k, host_params)
+        ]
+        params.sort()
+        query = urlencode(params, doseq=True)
+
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+@lru_cache(maxsize=65536)
+def url_key(url: str) -> str:
+    """重複判定・キャッシュ用のキー（http/https, www/m/amp, 末尾スラッシュ, AMPパスの違いを同一視する）"""
+    canonical = canonicalize_url(url)
+    if not canonical.startswith(("http://", "https://")):
+        return canonical
+    parts = urlsplit(canonical)
+    host = _VARIANT_HOST_PREFIX.sub("", parts.netloc)
+    path = _AMP_PATH_SUFFIX.sub("", parts.path).rstrip("/") or "/"
+    query = parts.query
+    if query:
+        query = urlencode([(k, v) for k, v in parse_qsl(query, keep_blank_values=True) if k.lower() not in _AMP_PARAMS])
+    return urlunsplit(("https", host, path, query, ""))
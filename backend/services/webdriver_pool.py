@@ -0,0 +1,190 @@
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WebDriverPoolTimeout(Exception):
+    """プールからWebDriverを借りられなかった場合の例外"""
+
+
+class WebDriverPool:
+    """ヘッドレスWebDriverを貸し出すスレッドセーフなプール
+
+    各検索は1つのドライバーを専有して使用し、終了後にプールへ返却する。
+    返却時・貸出時にヘルスチェックを行い、クラッシュしたドライバーは破棄して
+    次回の貸出時に新しいドライバーを作成する。返却・破棄のたびに貸出待ちのスレッドを起こし、
+    返却されたドライバーを受け取るか、空いたスロットで新しいドライバーを作成させる。
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int = 2,
+                 lease_timeout: float = 30.0, check_on_acquire: bool = True):
+        """
+        Args:
+            factory: 新しいWebDriverを作成する関数（失敗時はNoneを返すか例外を送出する）
+            size: プールの最大ドライバー数
+            lease_timeout: 貸出待ちのデフォルトタイムアウト（秒）
+            check_on_acquire: 貸出前にヘルスチェックを行うかどうか
+        """
+        self._factory = factory
+        self.size = max(1, size)
+        self.lease_timeout = lease_timeout
+        self.check_on_acquire = check_on_acquire
+        self._idle: "deque[Any]" = deque()
+        self._lock = threading.Lock()
+        # 返却・破棄・終了を貸出待ちのスレッドに通知する
+        self._available = threading.Condition(self._lock)
+        self._created = 0
+        self._closed = False
+        self._stats = {"leases": 0, "timeouts": 0, "replaced": 0, "create_failures": 0}
+
+    def warm_up(self, count: Optional[int] = None) -> int:
+        """起動時にドライバーを事前作成する。作成できた数を返す"""
+        target = self.size if count is None else min(count, self.size)
+        created = 0
+        while created < target:
+            driver = self._create()
+            if driver is None:
+                break
+            self._put_idle(driver)
+            created += 1
+        logger.info(f"WebDriverPool warmed up with {created}/{target} drivers")
+        return created
+
+    def _create(self) -> Optional[Any]:
+        """スロットを確保してドライバーを作成する"""
+        with self._lock:
+            if self._closed or self._created >= self.size:
+                return None
+            self._created += 1
+        return self._create_in_slot()
+
+    def _create_in_slot(self) -> Optional[Any]:
+        """確保済みのスロットでドライバーを作成する（失敗時はスロットを解放する）"""
+        try:
+            driver = self._factory()
+        except Exception as e:
+            logger.error(f"Failed to create WebDriver: {str(e)}")
+            driver = None
+        if driver is None:
+            with self._available:
+                self._created -= 1
+                self._stats["create_failures"] += 1
+                self._available.notify()
+        return driver
+
+    def _put_idle(self, driver: Any) -> None:
+        with self._available:
+            self._idle.append(driver)
+            self._available.notify()
+
+    def _discard(self, driver: Any) -> None:
+        """ドライバーを終了し、スロットを解放する（貸出待ちのスレッドが新しいドライバーを作成できる）"""
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self._available:
+            self._created -= 1
+            self._available.notify()
+
+    @staticmethod
+    def is_healthy(driver: Any) -> bool:
+        """ドライバーが応答するか確認する"""
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> Any:
+        """ドライバーを借りる。空きがなければ返却またはスロットの解放を待つ"""
+        if self._closed:
+            raise WebDriverPoolTimeout("WebDriverPool is closed")
+        timeout = self.lease_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        # 作成に失敗した直後は、次の通知までは作成を再試行しない
+        may_create = True
+
+        while True:
+            driver = None
+            with self._available:
+                while True:
+                    if self._closed:
+                        raise WebDriverPoolTimeout("WebDriverPool is closed")
+                    if self._idle:
+                        driver = self._idle.popleft()
+                        break
+                    if may_create and self._created < self.size:
+                        self._created += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise WebDriverPoolTimeout(f"No WebDriver available within {timeout} seconds")
+                    self._available.wait(remaining)
+                    may_create = True
+            if driver is None:
+                driver = self._create_in_slot()
+                if driver is None:
+                    may_create = False
+                    continue
+
+            if self.check_on_acquire and not self.is_healthy(driver):
+                # クラッシュしたドライバーは置き換える
+                logger.warning("Discarding unhealthy WebDriver from pool")
+                with self._lock:
+                    self._stats["replaced"] += 1
+                self._discard(driver)
+                continue
+
+            with self._lock:
+                self._stats["leases"] += 1
+            return driver
+
+    def release(self, driver: Any, broken: bool = False) -> None:
+        """ドライバーを返却する。壊れている場合は破棄する"""
+        if broken or self._closed:
+            if broken:
+                with self._lock:
+                    self._stats["replaced"] += 1
+            self._discard(driver)
+            return
+        self._put_idle(driver)
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """with文でドライバーを借りる"""
+        driver = self.acquire(timeout)
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = not self.is_healthy(driver)
+            raise
+        finally:
+            self.release(driver, broken=broken)
+
+    def close(self) -> None:
+        """全てのドライバーを終了する"""
+        with self._available:
+            self._closed = True
+            drivers = list(self._idle)
+            self._idle.clear()
+            self._available.notify_all()
+        for driver in drivers:
+            self._discard(driver)
+
+    def stats(self) -> Dict[str, int]:
+        """プールの統計情報を返す"""
+        with self._lock:
+            return {
+                **self._stats,
+                "size": self.size,
+                "created": self._created,
+                "idle": len(self._idle),
+            }
@@ -0,0 +1,93 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+
+RESULTS = [
+    {"title": "生成AIの規制動向", "url": "https://example.com/a", "content": "欧州連合はAI法を採択した。",
+     "metadata": {"source": "bing"}},
+    {"title": "ガイドラインの公表", "url": "https://example.com/b", "content": "日本政府はガイドラインを公表した。",
+     "metadata": {"source": "bing"}},
+]
+
+
+class StubCrawler:
+    def __init__(self, error=None):
+        self.error = error
+
+    async def deep_crawl(self, query, max_pages=5):
+        if self.error is not None:
+            raise self.error
+        return [dict(result, metadata=dict(result["metadata"])) for result in RESULTS]
+
+
+@pytest.fixture
+def main_module(monkeypatch):
+    # mainのインポート時にサービスが作成されるため、APIキーとディスクキャッシュを使わない設定にしてからインポートする
+    for name, value in {"AI_PROVIDER": "fake", "FAKE_LLM_TOKEN_DELAY": "0", "SEARCH_CACHE_ENABLED": "false",
+                        "HTTP_CACHE_ENABLED": "false", "SEMANTIC_CACHE_ENABLED": "false"}.items():
+        monkeypatch.setenv(name, value)
+    import main
+    research = main.cot_service.cot_deepresearch
+    monkeypatch.setattr(research, "crawler", StubCrawler())
+    monkeypatch.setattr(research, "_save_results", lambda results_dict: "/tmp/cot_research_test.json")
+    return main
+
+
+def parse_events(body):
+    """text/event-streamの本文を(event, id, data)のリストに変換する"""
+    events = []
+    for block in body.split("\n\n"):
+        if not block:
+            continue
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields["event"], int(fields["id"]), json.loads(fields["data"])))
+    return events
+
+
+@pytest.mark.parametrize("method", ["post", "get"])
+def test_stream_emits_results_tokens_analysis_then_result(main_module, method):
+    client = TestClient(main_module.app)
+    if method == "post":
+        response = client.post("/api/cot_deepresearch/stream", json={"query": "生成AI 規制", "max_pages": 2})
+    else:
+        response = client.get("/api/cot_deepresearch/stream", params={"query": "生成AI 規制", "max_pages": 2})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.headers["x-accel-buffering"] == "no"
+    assert response.text.endswith("\n\n")
+
+    events = parse_events(response.text)
+    names = [event for event, _, _ in events]
+    assert names[0] == "results"
+    assert names[-2:] == ["analysis", "result"]
+    assert len(names) > 3 and set(names[1:-2]) == {"token"}
+    assert [event_id for _, event_id, _ in events] == list(range(len(events)))
+
+    assert events[0][2]["result_count"] == 2
+    streamed = "".join(data["text"] for event, _, data in events if event == "token")
+    assert events[-2][2]["analysis"]["raw_analysis"] == streamed
+    assert events[-1][2]["metadata"]["filepath"] == "/tmp/cot_research_test.json"
+
+
+def test_crawler_error_yields_single_error_event(main_module, monkeypatch):
+    monkeypatch.setattr(main_module.cot_service.cot_deepresearch, "crawler", StubCrawler(RuntimeError("検索に失敗")))
+    response = TestClient(main_module.app).post("/api/cot_deepresearch/stream", json={"query": "生成AI"})
+
+    events = parse_events(response.text)
+    assert [event for event, _, _ in events] == ["error"]
+    assert events[0][2]["error"] == "検索に失敗"
+
+
+def test_service_exception_yields_single_error_event(main_module, monkeypatch):
+    async def stream_research(**kwargs):
+        yield "results", {"results": [], "result_count": 0}
+        raise RuntimeError("予期しないエラー")
+
+    monkeypatch.setattr(main_module.cot_service, "stream_research", stream_research)
+    response = TestClient(main_module.app).get("/api/cot_deepresearch/stream", params={"query": "生成AI"})
+
+    events = parse_events(response.text)
+    assert [event for event, _, _ in events] == ["results", "error"]
+    assert events[1][2] == {"error": "予期しないエラー"}
@@ -0,0 +1,42 @@
+import pytest
+import httpx
+from services.body_reader import (
+    HTML_CONTENT_TYPES, UnsupportedContentTypeError, check_content_type, decode_body, read_capped, sniff_charset
+)
+
+def test_sniff_charset_prefers_bom_then_header_then_meta():
+    meta = '<html><head><meta charset="shift_jis"></head>'.encode("ascii")
+    assert sniff_charset("text/html; charset=EUC-JP", meta) == "euc_jp"
+    assert sniff_charset("text/html", meta) == "shift_jis"
+    assert sniff_charset("text/html", b'<meta http-equiv="Content-Type" content="text/html; charset=euc-jp">') == "euc_jp"
+    assert sniff_charset("text/html; charset=utf-8", b"\xef\xbb\xbf<html>") == "utf-8-sig"
+    assert sniff_charset("text/html; charset=unknown-x", b"<html>") == "utf-8"
+
+def test_decode_body_uses_meta_charset():
+    html = '<html><head><meta charset="Shift_JIS"><title>日本語</title></head></html>'
+    assert decode_body(html.encode("shift_jis"), "text/html") == html
+
+def test_check_content_type():
+    check_content_type("text/html; charset=utf-8", HTML_CONTENT_TYPES)
+    check_content_type("application/pdf", None)
+    with pytest.raises(UnsupportedContentTypeError):
+        check_content_type("application/pdf", HTML_CONTENT_TYPES)
+
+@pytest.mark.asyncio
+async def test_read_capped_stops_at_limit():
+    chunks_sent = []
+
+    async def body():
+        for _ in range(100):
+            chunks_sent.append(1)
+            yield b"x" * 1000
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body())))
+    async with client.stream("GET", "https://example.com/") as response:
+        content, truncated = await read_capped(response, 2500)
+    assert truncated and content == b"x" * 2500
+    assert len(chunks_sent) < 100
+
+    async with client.stream("GET", "https://example.com/") as response:
+        content, truncated = await read_capped(response, 10 ** 6)
+    assert not truncated and len(content) == 100000
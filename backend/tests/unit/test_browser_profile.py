@@ -0,0 +1,68 @@
+from services.browser_profile import get_browser_profile
+
+
+class FakeOptions:
+    def __init__(self):
+        self.arguments = []
+        self.experimental = {}
+        self.page_load_strategy = "normal"
+
+    def add_argument(self, argument):
+        self.arguments.append(argument)
+
+    def add_experimental_option(self, name, value):
+        self.experimental[name] = value
+
+
+class FakeDriver:
+    def __init__(self):
+        self.page_load_timeout = None
+        self.cdp = []
+
+    def set_page_load_timeout(self, seconds):
+        self.page_load_timeout = seconds
+
+    def execute_cdp_cmd(self, command, params):
+        self.cdp.append((command, params))
+
+
+def test_light_profile_blocks_resources_and_loads_eagerly(monkeypatch):
+    monkeypatch.setenv("BROWSER_BLOCKED_URLS", "*example-ads.com*, ")
+    profile = get_browser_profile("light")
+    options = profile.apply(FakeOptions())
+    assert options.page_load_strategy == "eager"
+    assert "--disable-background-networking" in options.arguments
+    assert options.experimental["prefs"]["profile.managed_default_content_settings.images"] == 2
+
+    driver = profile.configure(FakeDriver())
+    assert driver.page_load_timeout == 15.0
+    assert driver.cdp[0] == ("Network.enable", {})
+    command, params = driver.cdp[1]
+    assert command == "Network.setBlockedURLs"
+    assert {"*.woff2", "*.png", "*.css", "*doubleclick.net*", "*example-ads.com*"} <= set(params["urls"])
+
+
+def test_default_profile_keeps_normal_loading(monkeypatch):
+    monkeypatch.setenv("BROWSER_PAGE_LOAD_TIMEOUT", "0")
+    profile = get_browser_profile("default")
+    options = profile.apply(FakeOptions())
+    assert options.page_load_strategy == "normal"
+    assert "--headless" in options.arguments
+    assert not any(argument.startswith("--blink-settings") for argument in options.arguments)
+
+    driver = profile.configure(FakeDriver())
+    assert driver.page_load_timeout is None and driver.cdp == []
+
+
+def test_unknown_profile_falls_back_to_light(monkeypatch):
+    monkeypatch.setenv("BROWSER_PROFILE", "turbo")
+    assert get_browser_profile().name == "light"
+
+
+def test_cdp_failure_is_not_fatal():
+    class NoCdpDriver(FakeDriver):
+        def execute_cdp_cmd(self, command, params):
+            raise RuntimeError("CDP not supported")
+
+    driver = get_browser_profile("light").configure(NoCdpDriver())
+    assert driver.page_load_timeout == 15.0
@@ -0,0 +1,60 @@
+import time
+import pytest
+from services.cache import TwoTierCache, make_search_key, normalize_query
+
+def test_normalize_query():
+    assert normalize_query("  ＡＩ　規制   Trends ") == "ai 規制 trends"
+    assert make_search_key("AI 規制", 5, "http") == make_search_key("ai  規制", 5, "http")
+    assert make_search_key("AI 規制", 5, "http") != make_search_key("AI 規制", 3, "http")
+
+def test_memory_lru_eviction():
+    cache = TwoTierCache("test", max_entries=2)
+    cache.set("a", [1])
+    cache.set("b", [2])
+    cache.get("a")  # aを最近使用したことにする
+    cache.set("c", [3])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == [1]
+    assert cache.get("c") == [3]
+    assert cache.stats()["evictions"] == 1
+
+def test_ttl_expiration():
+    cache = TwoTierCache("test", ttl=0.05)
+    cache.set("a", {"x": 1})
+    assert cache.get("a") == {"x": 1}
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_returned_values_are_copies():
+    cache = TwoTierCache("test")
+    cache.set("a", [{"title": "t"}])
+    cache.get("a")[0]["title"] = "changed"
+    assert cache.get("a") == [{"title": "t"}]
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite3")
+    cache = TwoTierCache("search_results", db_path=db_path)
+    cache.set("key", [{"url": "https://example.com"}])
+    cache.close()
+
+    restarted = TwoTierCache("search_results", db_path=db_path)
+    assert restarted.get("key") == [{"url": "https://example.com"}]
+    stats = restarted.stats()
+    assert stats["disk_hits"] == 1
+    assert stats["hit_rate"] == 1.0
+
+    # 2回目はメモリ層からヒットする
+    restarted.get("key")
+    assert restarted.stats()["memory_hits"] == 1
+    restarted.close()
+
+def test_disk_size_limit(tmp_path):
+    cache = TwoTierCache("test", max_entries=1, db_path=str(tmp_path / "c.sqlite3"), max_disk_entries=2)
+    for key in ["a", "b", "c"]:
+        cache.set(key, key)
+        time.sleep(0.01)
+    assert cache.get("a") is None
+    assert cache.get("b") == "b"
+    cache.close()
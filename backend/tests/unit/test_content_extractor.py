@@ -0,0 +1,95 @@
+import os
+import pytest
+from services import content_extractor
+from services.content_extractor import extract_article
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fixtures")
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+PARSERS = ["stdlib"] + (["lxml"] if content_extractor.etree is not None else [])
+
+@pytest.fixture(params=PARSERS)
+def parser(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(content_extractor, "etree", None)
+    return request.param
+
+def test_article_text_excludes_boilerplate(parser):
+    article = extract_article(load_fixture("article.html"))
+    text = article["text"]
+
+    assert article["title"] == "生成AIの規制動向：日本と欧州の比較"
+    assert article["author"] == "山田 花子"
+    assert article["date"] == "2024-05-10T09:00:00+09:00"
+    assert article["description"] == "生成AIに関する各国の規制動向を解説します。"
+    assert "セクション0" in text and "セクション32" in text
+    for boilerplate in ("クッキー", "カテゴリー", "人気記事", "関連記事", "Copyright", "プライバシーポリシー", "著者:"):
+        assert boilerplate not in text
+
+def test_max_chars_stops_at_budget(parser):
+    full = extract_article(load_fixture("article.html"))["text"]
+    limited = extract_article(load_fixture("article.html"), max_chars=300)["text"]
+    assert full.startswith(limited)
+    assert 300 <= len(limited) < 600
+
+def test_metadata_fallbacks(parser):
+    html = """<html><head><title>Fallback</title>
+    <script type="application/ld+json">{"@graph": [{"@type": "NewsArticle",
+      "author": [{"@type": "Person", "name": "Taro Suzuki"}], "datePublished": "2024-03-01"}]}</script>
+    </head><body><div class="entry-content">
+    <p>本文の最初の段落です。十分な長さを持つように、いくつかの文を続けて書いておきます。</p>
+    <p>二つ目の段落です。こちらも本文として扱われるように、句読点を含めて長めに書きます。</p>
+    </div><ul class="links"><li><a href="/a">リンクだけの項目がここに並んでいて本文ではありません</a></li></ul>
+    </body></html>"""
+    article = extract_article(html)
+    assert article["title"] == "Fallback"
+    assert article["author"] == "Taro Suzuki"
+    assert article["date"] == "2024-03-01"
+    assert article["text"].splitlines() == [
+        "本文の最初の段落です。十分な長さを持つように、いくつかの文を続けて書いておきます。",
+        "二つ目の段落です。こちらも本文として扱われるように、句読点を含めて長めに書きます。",
+    ]
+
+def test_byline_and_time_without_meta(parser):
+    html = """<html><body><article><h1>見出し</h1>
+    <p class="byline">文：佐藤 次郎 <time datetime="2023-12-24T10:00:00Z">12月24日</time></p>
+    <p>記事の本文です。メタデータがない場合でも署名欄と time 要素から著者と日付を取得します。</p>
+    <p>閉じタグのない段落も扱えるようにしておきます。ここも本文として残るはずです。
+    </article></body></html>"""
+    article = extract_article(html)
+    assert article["title"] == "見出し"
+    assert article["author"] == "佐藤 次郎"
+    assert article["date"] == "2023-12-24T10:00:00Z"
+    assert len(article["text"].splitlines()) == 3
+
+def test_empty_html():
+    assert extract_article("")["text"] == ""
+
+@pytest.mark.parametrize("wrapper", [
+    '<body class="has-sidebar"><div>',
+    '<body><div class="site header-fixed">',
+])
+def test_page_wrappers_with_boilerplate_words_are_not_skipped(parser, wrapper):
+    html = f"""<html>{wrapper}
+    <div class="site-header"><a href="/">トップページへ戻るリンクがここにあります</a></div>
+    <div class="entry"><p>本文の最初の段落です。ページ全体のクラスにsidebar等の語があっても読み飛ばしません。</p>
+    <p>二つ目の段落です。こちらも本文として扱われるように、句読点を含めて長めに書きます。</p></div>
+    <div class="share-buttons"><p>この記事をシェアしてください。ソーシャルメディアのボタンが並びます。</p></div>
+    </div></body></html>"""
+    text = extract_article(html)["text"]
+    assert text.splitlines() == [
+        "本文の最初の段落です。ページ全体のクラスにsidebar等の語があっても読み飛ばしません。",
+        "二つ目の段落です。こちらも本文として扱われるように、句読点を含めて長めに書きます。",
+    ]
+
+def test_parsing_stops_once_the_article_fills_the_budget(parser):
+    paragraph = "<p>本文の段落です。予算に達した後の段落は解析されないことを確認するための文章です。</p>"
+    html = f"<html><body><article>{paragraph * 2000}</article></body></html>"
+    full = content_extractor._parse(html)
+    limited = content_extractor._parse(html, max_chars=500)
+    assert len(full.paragraphs) == 2000
+    assert len(limited.paragraphs) < len(full.paragraphs) // 2
+    assert extract_article(html, max_chars=500)["text"] == full.article_text(500)
@@ -0,0 +1,51 @@
+from services.crawl_checkpoint import CrawlCheckpointStore
+from services.crawl_frontier import CrawlFrontier
+
+
+def test_pages_and_state_survive_reopen(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite3")
+    checkpoint = CrawlCheckpointStore(path).job("job-1", interval=2)
+    assert not checkpoint.resumed
+
+    checkpoint.add_page("https://example.com/a?utm_source=x", {"title": "A", "text": "a"})
+    assert not checkpoint.due()
+    checkpoint.add_page("https://example.com/b", {"title": "B", "text": "b"})
+    assert checkpoint.due()
+    checkpoint.flush({"results": [{"url": "https://example.com/a"}]})
+    # 間隔に達していないページはflushするまで保存されない
+    checkpoint.add_page("https://example.com/c", {"title": "C", "text": "c"})
+
+    resumed = CrawlCheckpointStore(path).job("job-1")
+    assert resumed.resumed
+    assert resumed.state == {"results": [{"url": "https://example.com/a"}]}
+    assert resumed.get("https://example.com/a") == {"title": "A", "text": "a"}
+    assert [page["title"] for page in resumed.pages.values()] == ["A", "B"]
+    assert resumed.get("https://example.com/c") is None
+    assert not CrawlCheckpointStore(path).job("job-2").resumed
+
+
+def test_delete_removes_job():
+    store = CrawlCheckpointStore()
+    checkpoint = store.job("job")
+    checkpoint.add_page("https://example.com/", {"text": ""})
+    checkpoint.flush({"queue": []})
+    store.delete("job")
+    assert store.load_state("job") is None
+    assert store.load_pages("job") == {}
+
+
+def test_frontier_snapshot_requeues_in_flight_urls():
+    frontier = CrawlFrontier(max_depth=3, max_pages=10)
+    frontier.add("https://example.com/", depth=1)
+    frontier.pop()
+    frontier.add_links(["/a", "/b", "/c"], parent="https://example.com/", depth=2)
+    in_flight = [frontier.pop()]
+    state = frontier.snapshot(in_flight)
+
+    restored = CrawlFrontier(max_depth=3, max_pages=10)
+    restored.restore(state)
+    assert not restored.add("https://example.com/a", depth=2)
+    assert sorted(url for url, _ in iter(restored.pop, None)) == [
+        "https://example.com/a", "https://example.com/b", "https://example.com/c",
+    ]
+    assert restored.stats()["popped_per_depth"] == {1: 1, 2: 3}
@@ -0,0 +1,51 @@
+from services.crawl_frontier import CrawlFrontier, score_link
+
+
+def drain(frontier):
+    items = []
+    while True:
+        item = frontier.pop()
+        if item is None:
+            return items
+        items.append(item)
+
+
+def test_pops_shallow_depths_first_and_skips_visited():
+    frontier = CrawlFrontier(max_depth=3)
+    assert frontier.add("https://example.com/", depth=1)
+    assert not frontier.add("https://example.com/?utm_source=x", depth=2)
+    frontier.add("https://example.com/a/b/c", depth=3)
+    frontier.add("https://example.com/a", depth=2)
+    assert not frontier.add("https://example.com/too-deep", depth=4)
+    assert [depth for _, depth in drain(frontier)] == [1, 2, 3]
+
+
+def test_add_links_prefers_high_scoring_links_and_caps_fan_out():
+    frontier = CrawlFrontier(max_depth=2, max_links_per_page=2)
+    parent = "https://example.com/news/"
+    links = [
+        "https://other.example.org/article",
+        "/login",
+        "report.pdf",
+        "/news/ai-regulation",
+        "/news/ai-regulation#comments",
+    ]
+    assert frontier.add_links(links, parent=parent, depth=2) == 2
+    assert [url for url, _ in drain(frontier)] == [
+        "https://example.com/news/ai-regulation",
+        "https://other.example.org/article",
+    ]
+    assert score_link("https://example.com/login", parent) < score_link("https://example.com/about", parent)
+
+
+def test_per_depth_and_total_limits():
+    frontier = CrawlFrontier(max_depth=3, max_pages_per_depth=2, max_pages=3)
+    for i in range(5):
+        frontier.add(f"https://example.com/{i}", depth=2)
+    frontier.add("https://example.com/deep", depth=3)
+    assert drain(frontier) == [
+        ("https://example.com/0", 2),
+        ("https://example.com/1", 2),
+        ("https://example.com/deep", 3),
+    ]
+    assert frontier.stats()["popped_per_depth"] == {2: 2, 3: 1}
@@ -108,4 +108,233 @@ async def test_deep_crawl_success(crawler_service):
             # 結果の検証
             assert len(results) == 1
             assert results[0]["title"] == "深層テスト記事1"
-            assert results[0]["metadata"]["source"] == "deep_web" 
\ No newline at end of file
+            assert results[0]["metadata"]["source"] == "deep_web" 
+
+
+def make_bare_crawler(**attributes):
+    """__init__（ブラウザ・LLMの設定）を通さずにCrawlerServiceを作成する"""
+    import logging
+    service = CrawlerService.__new__(CrawlerService)
+    service.logger = logging.getLogger(__name__)
+    for name, value in attributes.items():
+        setattr(service, name, value)
+    return service
+
+
+def test_fallback_results_are_not_cached():
+    service = make_bare_crawler(search_cache=Mock())
+    fallback = [{"url": "https://example.com/a", "metadata": {"source": "fallback"}}]
+    service._store_cached_results("key", fallback)
+    service.search_cache.set.assert_not_called()
+
+    results = [{"url": "https://example.com/a", "metadata": {"source": "bing"}}]
+    service._store_cached_results("key", results)
+    service.search_cache.set.assert_called_once_with("key", results)
+
+
+@pytest.mark.asyncio
+async def test_acrawl_does_not_cache_fallback_when_browser_is_unavailable():
+    service = make_bare_crawler(
+        search_cache=Mock(get=Mock(return_value=None)), search_strategy="sequential",
+        serp_pagination="click", mode="auto", fetch_full_pages=False,
+    )
+    service._ensure_browser = Mock(return_value=False)
+    fallback = [{"url": "https://example.com/a", "metadata": {"source": "fallback"}}]
+
+    async def afallback_search(query):
+        return fallback
+
+    service._afallback_search = afallback_search
+    assert await service.acrawl("クエリ") == fallback
+    service.search_cache.set.assert_not_called()
+
+
+def serp_result(url, page):
+    return {"title": url, "url": url, "content": "", "metadata": {"source": "bing", "page": page}}
+
+
+def test_serp_page_url_maps_pages_to_result_offsets():
+    service = make_bare_crawler()
+    assert "first=" not in service._serp_page_url("生成AI", 1)
+    assert service._serp_page_url("生成AI", 2).endswith("&first=11")
+    assert service._serp_page_url("生成AI", 3).endswith("&first=21")
+
+
+def test_offset_serp_search_keeps_page_order_and_dedupes_across_pages():
+    import time
+    service = make_bare_crawler(serp_max_concurrency=3)
+    fetched = []
+
+    def fetch_serp_page(query, page, browser_fallback=True):
+        fetched.append(page)
+        # 後のページほど早く返しても順序はページ番号順になる
+        time.sleep(0.01 * (5 - page))
+        if page == 4:
+            raise RuntimeError("connection reset")
+        urls = [f"https://example.com/{page}-{i}" for i in range(2)]
+        if page == 3:
+            urls.append("https://www.example.com/1-0")  # 前のページと同じ結果
+        return [serp_result(url, page) for url in urls]
+
+    service._fetch_serp_page = fetch_serp_page
+    results = service._offset_serp_search("クエリ", max_pages=5)
+
+    assert sorted(fetched) == [1, 2, 3, 4, 5]
+    assert [result["url"] for result in results] == [
+        "https://example.com/1-0", "https://example.com/1-1", "https://example.com/2-0",
+        "https://example.com/2-1", "https://example.com/3-0", "https://example.com/3-1",
+        "https://example.com/5-0", "https://example.com/5-1",
+    ]
+    assert [result["metadata"]["rank"] for result in results] == list(range(1, 9))
+
+
+def test_serp_browser_fallback_only_for_blocked_pages():
+    ok_html = "<ol id='b_results'></ol>"
+    responses = {1: Mock(status_code=200, text=ok_html), 2: Mock(status_code=429, text=""),
+                 3: Mock(status_code=200, text="<html>captcha</html>")}
+    service = make_bare_crawler(client=Mock())
+    service.client.get = lambda url, headers=None: responses[3 if "first=21" in url else 2 if "first=11" in url else 1]
+    service._parse_bing_results = Mock(return_value=[serp_result("https://example.com/http", 1)])
+    service._fetch_serp_page_with_browser = Mock(return_value=[serp_result("https://example.com/browser", 2)])
+
+    assert service._fetch_serp_page("クエリ", 1)[0]["url"] == "https://example.com/http"
+    assert service._fetch_serp_page("クエリ", 2)[0]["url"] == "https://example.com/browser"
+    assert service._fetch_serp_page("クエリ", 3, browser_fallback=False) == []
+    service._fetch_serp_page_with_browser.assert_called_once_with("クエリ", 2)
+
+
+@pytest.mark.asyncio
+async def test_async_offset_serp_search_uses_browser_only_for_blocked_pages(monkeypatch):
+    import asyncio
+    from services import crawler
+
+    class Client:
+        async def get(self, url, headers=None):
+            await asyncio.sleep(0)
+            blocked = "first=11" in url
+            return Mock(status_code=403 if blocked else 200, text="" if blocked else "<ol id='b_results'></ol>")
+
+    monkeypatch.setattr(crawler, "get_async_client", lambda: Client())
+    service = make_bare_crawler(serp_max_concurrency=2)
+    service._parse_bing_results = lambda html, source, page: [serp_result(f"https://example.com/{page}", page)]
+    service._fetch_serp_page_with_browser = Mock(side_effect=lambda query, page: [
+        serp_result(f"https://example.com/browser-{page}", page)
+    ])
+
+    results = await service._aoffset_serp_search("クエリ", max_pages=3)
+
+    assert [result["url"] for result in results] == [
+        "https://example.com/1", "https://example.com/browser-2", "https://example.com/3",
+    ]
+    service._fetch_serp_page_with_browser.assert_called_once_with("クエリ", 2)
+
+
+@pytest.mark.asyncio
+async def test_full_page_fetch_limits_per_host_and_keeps_snippet_on_failure(monkeypatch):
+    import asyncio
+    from collections import defaultdict
+    from services import crawler
+
+    active = defaultdict(int)
+    peak = defaultdict(int)
+
+    async def cached_get(client, url, cache, **kwargs):
+        host = url.split("/")[2]
+        active[host] += 1
+        peak[host] = max(peak[host], active[host])
+        await asyncio.sleep(0.01)
+        active[host] -= 1
+        if url.endswith("/broken"):
+            raise RuntimeError("connection reset")
+        html = (f"<html><head><meta name='author' content='著者{url[-1]}'></head><body><article>"
+                f"<p>{url} の本文です。本文として抽出されるように十分な長さの文章を書いておきます。</p>"
+                "</article></body></html>")
+        return Mock(status_code=200, headers={"content-type": "text/html; charset=utf-8"},
+                    content=html.encode("utf-8"))
+
+    monkeypatch.setattr(crawler, "cached_get", cached_get)
+    monkeypatch.setattr(crawler, "get_async_client", lambda: None)
+    service = make_bare_crawler(
+        page_fetch_concurrency=10, page_fetch_per_host=2, page_fetch_timeout=5,
+        _page_fetch_semaphore=None, _host_semaphores=None,
+    )
+    # スケジューラー（robots.txt・速度制限）を通さずに取得する
+    service._afetch_page_text = service._afetch_page_text_once
+
+    urls = [f"https://a.example.com/{i}" for i in range(6)] + \
+        [f"https://b.example.com/{i}" for i in range(3)] + ["https://b.example.com/broken"]
+    results = [{"url": url, "content": f"スニペット {url}", "metadata": {}} for url in urls]
+    await service._afetch_full_pages(results)
+
+    assert peak["a.example.com"] == 2 and peak["b.example.com"] == 2
+    broken = results[-1]
+    assert broken["content"] == "スニペット https://b.example.com/broken"
+    assert broken["metadata"]["full_content"] is False
+    for result in results[:-1]:
+        assert result["metadata"]["full_content"] is True
+        assert result["content"].startswith(result["url"])
+        assert result["snippet"] == f"スニペット {result['url']}"
+        assert result["metadata"]["author"] == f"著者{result['url'][-1]}"
+
+
+@pytest.fixture
+def offline_env(monkeypatch):
+    """ディスクキャッシュとAPIキーを使わずにCrawlerServiceを作成するための環境"""
+    for name, value in {"SEARCH_CACHE_ENABLED": "false", "HTTP_CACHE_ENABLED": "false",
+                        "SEARCH_STRATEGY": "sequential", "GOOGLE_AISTUDIO_API_KEY": "test_key"}.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv("CRAWLER_MODE", raising=False)
+    return monkeypatch
+
+
+def test_constructing_crawler_does_not_launch_browser(offline_env):
+    with patch('services.crawler.webdriver') as mock_webdriver, \
+            patch('services.crawler.chromedriver_autoinstaller') as mock_installer:
+        service = CrawlerService()
+    assert service.mode == "auto"
+    assert service.driver_pool is None
+    mock_webdriver.Chrome.assert_not_called()
+    mock_installer.install.assert_not_called()
+
+
+def test_http_mode_never_starts_browser(offline_env):
+    offline_env.setenv("CRAWLER_MODE", "http")
+    setup_browser = Mock(return_value=True)
+    offline_env.setattr(CrawlerService, "setup_browser", setup_browser)
+    service = CrawlerService()
+
+    assert service._ensure_browser() is False
+    assert service._selenium_search_or_empty("クエリ") == []
+    assert service._fetch_serp_page_with_browser("クエリ", 2) == []
+    with pytest.raises(RuntimeError):
+        service._selenium_backend_search("クエリ")
+    setup_browser.assert_not_called()
+
+
+def test_auto_mode_starts_browser_on_first_selenium_use(offline_env):
+    started = []
+
+    def setup_browser(self):
+        started.append(self)
+        self.driver_pool = Mock(**{"stats.return_value": {"created": 1}})
+        return True
+
+    offline_env.setattr(CrawlerService, "setup_browser", setup_browser)
+    service = CrawlerService()
+    service._selenium_search_pooled = Mock(return_value=[{"url": "https://example.com/a"}])
+    assert started == []
+
+    assert service._selenium_search_or_empty("クエリ") == [{"url": "https://example.com/a"}]
+    assert service._selenium_search_or_empty("クエリ") == [{"url": "https://example.com/a"}]
+    assert started == [service]
+
+
+def test_auto_mode_does_not_retry_browser_within_retry_interval(offline_env):
+    offline_env.setenv("BROWSER_RETRY_INTERVAL", "60")
+    setup_browser = Mock(return_value=False)
+    offline_env.setattr(CrawlerService, "setup_browser", setup_browser)
+    service = CrawlerService()
+
+    assert service._ensure_browser() is False
+    assert service._ensure_browser() is False
+    setup_browser.assert_called_once()
@@ -0,0 +1,57 @@
+import time
+import random
+from services.dedup import NearDuplicateDetector, MinHasher, shingles
+
+ARTICLE = (
+    "政府は生成AIの利用に関する新しいガイドラインを公表した。"
+    "ガイドラインでは透明性の確保、著作権への配慮、個人情報の保護が求められている。"
+    "企業は導入にあたってリスク評価を行い、利用目的を明確にする必要がある。"
+)
+
+def make_result(url, content):
+    return {"url": url, "title": url, "content": content, "metadata": {}}
+
+def test_minhash_similarity_estimates_jaccard():
+    hasher = MinHasher(num_perm=128)
+    sig1 = hasher.signature(shingles(ARTICLE))
+    sig2 = hasher.signature(shingles(ARTICLE + "詳細は公式サイトを参照。"))
+    sig3 = hasher.signature(shingles("Completely unrelated English text about cooking pasta at home."))
+    assert MinHasher.similarity(sig1, sig2) > 0.8
+    assert MinHasher.similarity(sig1, sig3) < 0.2
+
+def test_near_duplicates_are_folded_into_first_result():
+    results = [
+        make_result("https://news.example.com/a", ARTICLE),
+        make_result("https://other.example.com/b", "全く別の話題：新しいスマートフォンの発売日が発表されました。価格は未定です。"),
+        make_result("https://amp.example.com/a", ARTICLE + " 関連記事"),
+        make_result("https://mirror.example.net/a", ARTICLE.replace("。", "。 ")),
+    ]
+    kept = NearDuplicateDetector(threshold=0.8).dedupe(results)
+
+    assert [r["url"] for r in kept] == ["https://news.example.com/a", "https://other.example.com/b"]
+    duplicates = kept[0]["metadata"]["duplicates"]
+    assert [d["url"] for d in duplicates] == ["https://amp.example.com/a", "https://mirror.example.net/a"]
+    assert all(d["similarity"] >= 0.8 for d in duplicates)
+
+def test_cluster_mode_keeps_all_results():
+    results = [make_result("https://a", ARTICLE), make_result("https://b", ARTICLE)]
+    kept = NearDuplicateDetector().dedupe(results, mode="cluster")
+    assert len(kept) == 2
+    assert kept[1]["metadata"]["duplicate_of"] == "https://a"
+
+def test_short_and_empty_texts_are_kept():
+    results = [make_result("https://a", ""), make_result("https://b", ""), make_result("https://c", "abc")]
+    assert len(NearDuplicateDetector().dedupe(results)) == 3
+
+def test_scales_roughly_linearly():
+    rng = random.Random(0)
+    vocabulary = [f"w{i}" for i in range(5000)]
+    texts = [" ".join(rng.choice(vocabulary) for _ in range(60)) for _ in range(1000)]
+    detector = NearDuplicateDetector()
+
+    start = time.perf_counter()
+    representatives, _ = detector.cluster(texts)
+    elapsed = time.perf_counter() - start
+
+    assert representatives == list(range(len(texts)))
+    assert elapsed < 10
@@ -0,0 +1,36 @@
+import json
+import pytest
+from services.fake_llm import FakeAIService, FakeLLM
+from services.sse import format_sse
+
+RESULTS = [
+    {"title": "生成AI規制の最新動向", "url": "https://example.com/1", "content": "本文1"},
+    {"title": "EU AI法の概要", "url": "https://example.com/2", "content": "本文2"},
+]
+
+@pytest.mark.asyncio
+async def test_stream_analyze_yields_tokens_then_parsed_analysis():
+    service = FakeAIService(FakeLLM(token_delay=0, token_chars=5))
+    events = [event async for event in service.stream_analyze(RESULTS)]
+
+    tokens = [data for event, data in events if event == "token"]
+    assert len(tokens) > 1 and all(len(token) <= 5 for token in tokens)
+    event, analysis = events[-1]
+    assert event == "analysis"
+    assert analysis["raw_analysis"] == "".join(tokens)
+    assert analysis["summary"].startswith("2件の検索結果")
+    assert any("EU AI法の概要" in insight for insight in analysis["insights"])
+    assert len(analysis["patterns"]) == 2 and len(analysis["further_research"]) == 2
+
+@pytest.mark.asyncio
+async def test_analyze_matches_streamed_analysis():
+    service = FakeAIService(FakeLLM(token_delay=0))
+    streamed = [data async for event, data in service.stream_analyze(RESULTS) if event == "analysis"][0]
+    assert await service.analyze(RESULTS) == streamed
+
+def test_format_sse():
+    message = format_sse("token", {"text": "改行\nを含む"}, event_id=3)
+    assert message.endswith("\n\n")
+    lines = message.strip().split("\n")
+    assert lines[:2] == ["event: token", "id: 3"]
+    assert json.loads(lines[2][len("data: "):]) == {"text": "改行\nを含む"}
@@ -0,0 +1,122 @@
+import time
+import asyncio
+import pytest
+from services.fetch_scheduler import (
+    FetchScheduler, ThrottledError, RobotsDisallowedError, TokenBucket
+)
+
+ROBOTS_TXT = """
+User-agent: *
+Disallow: /private/
+Crawl-delay: 1
+"""
+
+def make_scheduler(robots_text=ROBOTS_TXT, **kwargs):
+    calls = []
+    async def fetch_robots(url):
+        calls.append(url)
+        return 200, robots_text
+    scheduler = FetchScheduler(robots_fetcher=fetch_robots, **kwargs)
+    scheduler.robots_calls = calls
+    return scheduler
+
+@pytest.mark.asyncio
+async def test_robots_disallow_and_cache():
+    scheduler = make_scheduler(rate=100, burst=100)
+
+    async def fetch(url):
+        return url
+
+    assert await scheduler.fetch("https://example.com/page", fetch) == "https://example.com/page"
+    with pytest.raises(RobotsDisallowedError):
+        await scheduler.fetch("https://example.com/private/x", fetch)
+
+    # robots.txtはホストごとに1回だけ取得される
+    assert scheduler.robots_calls == ["https://example.com/robots.txt"]
+
+@pytest.mark.asyncio
+async def test_crawl_delay_limits_rate():
+    scheduler = make_scheduler(rate=100, burst=5)
+
+    async def fetch(url):
+        return url
+
+    await scheduler.fetch("https://example.com/", fetch)
+    # Crawl-delay: 1 によりホストの速度は1件/秒に制限される
+    assert scheduler.stats()["host_rates"]["https://example.com"] == 1.0
+    assert scheduler._buckets["https://example.com"].burst == 1.0
+
+@pytest.mark.asyncio
+async def test_throttled_url_is_requeued():
+    scheduler = make_scheduler(robots_text="", rate=100, burst=100)
+    attempts = []
+
+    async def fetch(url):
+        attempts.append(url)
+        if len(attempts) < 3:
+            raise ThrottledError(url, retry_after=0.01)
+        return "ok"
+
+    assert await scheduler.fetch("https://example.com/a", fetch) == "ok"
+    stats = scheduler.stats()
+    assert stats["requeues"] == 2
+    assert stats["host_rates"]["https://example.com"] < 100
+
+@pytest.mark.asyncio
+async def test_requeue_limit():
+    scheduler = make_scheduler(robots_text="", rate=100, burst=100, max_requeues=1)
+
+    async def fetch(url):
+        raise ThrottledError(url, retry_after=0)
+
+    with pytest.raises(ThrottledError):
+        await scheduler.fetch("https://example.com/a", fetch)
+
+def test_token_bucket_penalize_and_reward():
+    bucket = TokenBucket(rate=4, burst=4)
+    bucket.penalize(None, min_rate=0.1)
+    assert bucket.rate == 2
+    bucket.reward()
+    assert 2 < bucket.rate <= 4
+
+@pytest.mark.asyncio
+async def test_api_throttling_slows_the_api_host_only():
+    scheduler = make_scheduler(robots_text="", rate=100, burst=100)
+    scheduler.set_host_rate("https://api.firecrawl.dev/v0", rate=50)
+    attempts = []
+
+    async def fetch(url):
+        attempts.append(url)
+        if len(attempts) < 2:
+            raise ThrottledError("https://api.firecrawl.dev/v0/crawl", retry_after=0.01)
+        return "ok"
+
+    assert await scheduler.fetch("https://example.com/a", fetch, throttle_url="https://api.firecrawl.dev/v0") == "ok"
+    rates = scheduler.stats()["host_rates"]
+    assert rates["https://api.firecrawl.dev"] < 50
+    assert rates["https://example.com"] == 100
+
+@pytest.mark.asyncio
+async def test_hosts_are_evicted_least_recently_used_first():
+    scheduler = make_scheduler(robots_text="", rate=100, burst=100, max_hosts=2)
+    scheduler.set_host_rate("https://api.firecrawl.dev/v0", rate=50)
+
+    async def fetch(url):
+        return url
+
+    for host in ["a", "b", "a", "c"]:
+        await scheduler.fetch(f"https://{host}.example.com/", fetch)
+
+    # bは最近使われていないため破棄され、set_host_rateで指定したホストは残る
+    assert set(scheduler._robots) == {"https://a.example.com", "https://c.example.com"}
+    assert set(scheduler._buckets) == {"https://api.firecrawl.dev", "https://a.example.com", "https://c.example.com"}
+
+def test_token_bucket_works_across_event_loops():
+    bucket = TokenBucket(rate=100, burst=1)
+
+    async def contend():
+        await asyncio.gather(*(bucket.acquire() for _ in range(3)))
+
+    # 別のイベントループ（asyncio.runごと）で同じバケットを取り合ってもロックのエラーにならない
+    asyncio.run(contend())
+    asyncio.run(contend())
@@ -91,4 +91,94 @@ async def test_generate_summary_success(gemini_service):
         
         # 結果の検証
         assert summary == expected_summary
-        mock_model.generate_content.assert_called_once() 
\ No newline at end of file
+        mock_model.generate_content.assert_called_once() 
+
+
+@pytest.mark.asyncio
+async def test_gemini_agenerate_runs_prompts_concurrently_in_order(monkeypatch):
+    import asyncio
+    from services.crawler import GeminiLLM
+
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+
+    active = 0
+    peak = 0
+
+    async def generate_content_async(prompt, generation_config=None):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        # 後のプロンプトほど早く終わるようにして順序が保たれることを確認する
+        await asyncio.sleep(0.01 * (10 - int(prompt[-1])))
+        active -= 1
+        if prompt == "prompt 3":
+            raise RuntimeError("quota exceeded")
+        return Mock(text=f"answer to {prompt}")
+
+    with patch('services.crawler.genai') as mock_genai:
+        mock_genai.GenerativeModel.return_value.generate_content_async = generate_content_async
+        llm = GeminiLLM(google_api_key="test_key")
+        llm.max_concurrency = 3
+
+        result = await llm._agenerate([f"prompt {i}" for i in range(6)])
+
+    texts = [generation[0].text for generation in result.generations]
+    assert texts == ["answer to prompt 0", "answer to prompt 1", "answer to prompt 2", "",
+                     "answer to prompt 4", "answer to prompt 5"]
+    assert "quota exceeded" in result.generations[3][0].generation_info["error"]
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_map_reduce_keeps_cot_instructions_and_reports_truncation():
+    import logging
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from services.token_budget import AnalysisBudget, estimate_tokens
+
+    service = GeminiService.__new__(GeminiService)
+    service.logger = logging.getLogger(__name__)
+    service.budget = AnalysisBudget(max_prompt_tokens=400, chunk_tokens=100, chunk_overlap_tokens=0, max_rounds=1)
+    service.text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=100, chunk_overlap=0, length_function=estimate_tokens
+    )
+    mapped = []
+
+    async def arun(results):
+        mapped.append(results)
+        return "要点" * 40
+
+    service.map_chain = Mock(arun=arun)
+    instructions = "## ステップ1: 検索結果の整理\n指示をそのまま残す\n\n## 検索結果:\n"
+    prompt = instructions + "\n\n".join(f"タイトル: 記事{i}\n" + "内容" * 40 for i in range(20))
+
+    text, _, mode = await service._prepare_results_text(prompt)
+
+    assert text.startswith(instructions)
+    assert all("ステップ1" not in chunk for chunk in mapped)
+    assert mode == "map_reduce_truncated"
+
+
+@pytest.mark.asyncio
+async def test_generate_text_shares_the_cache_key_with_gemini_llm(monkeypatch, tmp_path):
+    import logging
+    from services import llm_cache
+    from services.crawler import GeminiLLM
+
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "llm.sqlite3"))
+    monkeypatch.setattr(llm_cache, "_llm_cache", None)
+
+    async def generate_content_async(prompt, generation_config=None):
+        return Mock(text="回答")
+
+    service = GeminiService.__new__(GeminiService)
+    service.logger = logging.getLogger(__name__)
+    service.api_key = "test_key"
+    with patch('services.gemini.genai') as mock_genai, patch('services.crawler.genai') as mock_crawler_genai:
+        for genai in (mock_genai, mock_crawler_genai):
+            genai.GenerativeModel.return_value.model_name = "models/gemini-1.5-flash"
+            genai.GenerativeModel.return_value.generate_content_async = generate_content_async
+        assert await service.generate_text("質問") == "回答"
+        model_name = GeminiLLM(google_api_key="test_key")._model_name()
+
+    # GeminiLLMと同じモデル名のキーで保存される
+    assert llm_cache.get_llm_cache().get("gemini", model_name, "質問", {}) == "回答"
@@ -0,0 +1,53 @@
+import os
+import pytest
+from services import html_parser
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fixtures")
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+BACKENDS = html_parser.available_backends()
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_bing_results_match_bs4(backend):
+    html = load_fixture("bing_serp.html")
+    expected = html_parser.parse_bing_results(html, backend="bs4")
+    results = html_parser.parse_bing_results(html, backend=backend)
+
+    assert len(expected) == 10
+    assert results == expected
+    assert results[0]["url"].startswith("https://www.example0.jp/")
+    assert results[0]["title"].startswith("生成AIの規制動向 0")
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_text_blocks_match_bs4(backend):
+    html = load_fixture("article.html")
+    expected_title, expected_blocks = html_parser.extract_text_blocks(html, backend="bs4")
+    title, blocks = html_parser.extract_text_blocks(html, backend=backend)
+
+    assert title == expected_title == "生成AIの規制動向：日本と欧州の比較"
+    assert blocks == expected_blocks
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_page_metadata(backend):
+    html = load_fixture("article.html")
+    metadata = html_parser.extract_page_metadata(html, backend=backend)
+    assert metadata == html_parser.extract_page_metadata(html, backend="bs4")
+    assert metadata["description"] == "生成AIに関する各国の規制動向を解説します。"
+
+def test_unknown_backend_falls_back(monkeypatch):
+    monkeypatch.setenv("HTML_PARSER", "unknown")
+    assert html_parser.resolve_backend() == BACKENDS[0]
+
+def test_empty_html():
+    for backend in BACKENDS:
+        assert html_parser.parse_bing_results("", backend=backend) == []
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_text_blocks_stop_at_budget(backend):
+    html = load_fixture("article.html")
+    _, blocks = html_parser.extract_text_blocks(html, backend=backend)
+    _, limited = html_parser.extract_text_blocks(html, backend=backend, max_chars=len(blocks[0]) + 1)
+    assert limited == blocks[:1]
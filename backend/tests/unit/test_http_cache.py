@@ -0,0 +1,107 @@
+import random
+import pytest
+import httpx
+from services.http_cache import HttpCache, cached_get, freshness_lifetime, parse_cache_control
+
+URL = "https://example.com/article"
+BODY = "<html><body>" + "本文" * 200 + "</body></html>"
+
+def make_client(responses):
+    requests = []
+    def handler(request):
+        requests.append(request)
+        return responses.pop(0)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client.requests = requests
+    return client
+
+def test_parse_cache_control_and_freshness():
+    assert parse_cache_control('public, max-age=60, no-cache="set-cookie"') == {
+        "public": None, "max-age": "60", "no-cache": "set-cookie"
+    }
+    assert freshness_lifetime({"cache-control": "max-age=60", "age": "10"}) == 50
+    assert freshness_lifetime({"cache-control": "no-cache, max-age=60"}) == 0
+    assert freshness_lifetime({
+        "expires": "Thu, 01 Jan 2026 00:10:00 GMT", "date": "Thu, 01 Jan 2026 00:00:00 GMT"
+    }) == 600
+    assert freshness_lifetime({}, default_ttl=30) == 30
+
+@pytest.mark.asyncio
+async def test_revalidates_with_validators_and_serves_304_from_cache():
+    cache = HttpCache()
+    client = make_client([
+        httpx.Response(200, text=BODY, headers={"etag": '"v1"', "last-modified": "Thu, 01 Jan 2026 00:00:00 GMT",
+                                                "content-type": "text/html; charset=utf-8"}),
+        httpx.Response(304, headers={"etag": '"v1"'}),
+    ])
+
+    first = await cached_get(client, URL, cache)
+    second = await cached_get(client, URL, cache)
+
+    assert first.text == BODY
+    assert second.status_code == 200 and second.text == BODY
+    assert second.headers["content-type"] == "text/html; charset=utf-8"
+    assert client.requests[1].headers["if-none-match"] == '"v1"'
+    assert client.requests[1].headers["if-modified-since"] == "Thu, 01 Jan 2026 00:00:00 GMT"
+    assert cache.stats()["revalidated"] == 1
+
+@pytest.mark.asyncio
+async def test_fresh_entries_skip_the_network():
+    cache = HttpCache()
+    client = make_client([httpx.Response(200, text=BODY, headers={"cache-control": "max-age=300"})])
+
+    await cached_get(client, URL, cache)
+    response = await cached_get(client, URL + "?utm_source=x", cache)
+
+    assert response.text == BODY
+    assert len(client.requests) == 1
+    assert cache.stats()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_no_store_and_errors_are_not_cached():
+    cache = HttpCache()
+    client = make_client([
+        httpx.Response(200, text=BODY, headers={"cache-control": "no-store"}),
+        httpx.Response(500, text="error"),
+    ])
+    await cached_get(client, URL, cache)
+    await cached_get(client, URL + "/2", cache)
+    assert cache.stats()["stores"] == 0
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    cache = HttpCache(db_path=str(tmp_path / "http.sqlite3"), max_bytes=2500)
+    body = lambda n: random.Random(n).randbytes(1000)  # 圧縮しにくい約1KBの本文
+    cache.store("a", {}, body(1))
+    cache.store("b", {}, body(2))
+    cache.get("a")  # aを最近使用したことにする
+    cache.store("c", {}, body(3))
+
+    assert cache.get("b") is None
+    assert cache.get("a")["body"] == body(1)
+    assert cache.stats()["total_bytes"] <= 2500
+    cache.close()
+
+    # 再起動後も本文と合計サイズが復元される
+    reopened = HttpCache(db_path=str(tmp_path / "http.sqlite3"), max_bytes=2500)
+    assert reopened.get("c")["body"] == body(3)
+    assert reopened.stats()["total_bytes"] > 0
+
+@pytest.mark.asyncio
+async def test_streamed_body_is_capped_and_not_cached(tmp_path):
+    cache = HttpCache(str(tmp_path / "cache.sqlite3"))
+    html_headers = {"content-type": "text/html", "cache-control": "max-age=60"}
+    client = make_client([
+        httpx.Response(200, headers=html_headers, content=BODY.encode("utf-8")),
+        httpx.Response(200, headers=html_headers, content=BODY.encode("utf-8")),
+        httpx.Response(200, headers={"content-type": "application/pdf"}, content=b"%PDF" * 1000),
+    ])
+    response = await cached_get(client, URL, cache, max_bytes=100, accept=("text/html",))
+    assert response.content == BODY.encode("utf-8")[:100]
+    assert cache.get(URL) is None
+
+    response = await cached_get(client, URL, cache, max_bytes=10 ** 6, accept=("text/html",))
+    assert response.text == BODY
+    assert cache.get(URL) is not None
+
+    with pytest.raises(ValueError):
+        await cached_get(client, URL + "/file.pdf", cache, max_bytes=100, accept=("text/html",))
@@ -0,0 +1,88 @@
+import time
+import asyncio
+import pytest
+from services.http_client import (
+    get_async_client, close_async_client, run_blocking, get_executor, shutdown_executor, map_blocking
+)
+
+@pytest.mark.asyncio
+async def test_async_client_is_shared():
+    client1 = get_async_client()
+    client2 = get_async_client()
+    assert client1 is client2
+
+    await close_async_client()
+    assert client1.is_closed
+
+    # 閉じた後は新しいクライアントが作成される
+    client3 = get_async_client()
+    assert client3 is not client1
+    await close_async_client()
+
+def test_async_client_is_per_event_loop():
+    async def use_client():
+        return get_async_client()
+
+    # 別のイベントループ（asyncio.runごと）では、そのループに紐づく別のクライアントを使う
+    loop1 = asyncio.new_event_loop()
+    loop2 = asyncio.new_event_loop()
+    try:
+        client1 = loop1.run_until_complete(use_client())
+        client2 = loop2.run_until_complete(use_client())
+        assert client1 is not client2
+        assert loop1.run_until_complete(use_client()) is client1
+
+        loop2.run_until_complete(close_async_client())
+        assert client2.is_closed and not client1.is_closed
+    finally:
+        loop1.run_until_complete(close_async_client())
+        loop1.close()
+        loop2.close()
+
+@pytest.mark.asyncio
+async def test_run_blocking_does_not_block_event_loop(monkeypatch):
+    monkeypatch.setenv("CRAWLER_MAX_WORKERS", "2")
+    shutdown_executor()
+
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        run_blocking(time.sleep, 0.2),
+        run_blocking(time.sleep, 0.2),
+        asyncio.sleep(0.01),
+    )
+    elapsed = time.perf_counter() - start
+
+    # 2つのブロッキング処理が並行に実行される
+    assert elapsed < 0.35
+    assert results == [None, None, None]
+    assert get_executor()._max_workers == 2
+    shutdown_executor()
+
+def test_map_blocking_keeps_order_and_limits_concurrency():
+    shutdown_executor()
+    running = 0
+    peak = 0
+
+    def work(item):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        time.sleep(0.02 * (5 - item))
+        running -= 1
+        if item == 3:
+            raise ValueError("failed")
+        return item * 10
+
+    results = map_blocking(work, range(5), max_concurrency=2)
+    assert results[:3] == [0, 10, 20] and results[4] == 40
+    assert isinstance(results[3], ValueError)
+    assert peak == 2
+    shutdown_executor()
+
+def test_map_blocking_runs_inline_on_shared_workers(monkeypatch):
+    monkeypatch.setenv("CRAWLER_MAX_WORKERS", "1")
+    shutdown_executor()
+    # ワーカーが1つでも、ワーカー内からの呼び出しは空きを待たずに完了する
+    future = get_executor().submit(map_blocking, lambda item: item + 1, [1, 2, 3])
+    assert future.result(timeout=2) == [2, 3, 4]
+    shutdown_executor()
@@ -0,0 +1,100 @@
+import time
+from services.keywords import KeywordExtractor, tokenize
+
+DOCS = [
+    "生成AIの規制について、欧州連合はAI法を採択した。AI法は生成AIのリスクを分類する。",
+    "日本政府は生成AIのガイドラインを公表した。ガイドラインは透明性を求めている。",
+    "量子コンピュータの研究が進んでいる。量子ビットの誤り訂正が課題である。",
+]
+
+def test_tokenize_splits_japanese_by_script():
+    tokens = tokenize("ＡＩ法は生成AIのリスクを分類する。ニュース・サイト 2024 の")
+    assert tokens == ["ai", "生成", "ai", "リスク", "分類", "ニュース", "サイト"]
+
+def test_tokenize_splits_long_kanji_runs_into_ngrams():
+    assert tokenize("人工知能倫理審査委員会") == ["人工", "工知", "知能", "能倫", "倫理", "理審", "審査", "査委", "委員", "員会"]
+    assert tokenize("the AI and ML", stopwords=frozenset({"the", "and"})) == ["ai", "ml"]
+
+def test_extract_batch_ranks_distinctive_terms():
+    extractor = KeywordExtractor()
+    per_text, corpus = extractor.extract_batch(DOCS, top_k=3)
+
+    assert len(per_text) == 3
+    assert per_text[0] == ["ai", "生成", "規制"]
+    assert per_text[1][0] == "ガイドライン"
+    assert per_text[2][0] == "量子"
+    # 複数の結果に現れる語は結果全体のキーワードで上位になる
+    assert "生成" in corpus
+
+def test_idf_persists_and_counts_each_document_once(tmp_path):
+    db_path = str(tmp_path / "keywords.sqlite3")
+    extractor = KeywordExtractor(db_path=db_path)
+    extractor.extract_batch(DOCS)
+    extractor.extract_batch(DOCS[:1])  # 同じ本文は再度数えない
+    extractor.close()
+
+    reopened = KeywordExtractor(db_path=db_path)
+    assert reopened._doc_count == 3
+    assert reopened._df[reopened._vocabulary["生成"]] == 2
+    # 蓄積された統計だけで1件のテキストを抽出できる
+    per_text, _ = reopened.extract_batch(["量子の研究"], update=False)
+    assert per_text == [["量子", "研究"]]
+    assert reopened._doc_count == 3
+
+def test_read_only_extraction_does_not_grow_vocabulary():
+    extractor = KeywordExtractor()
+    extractor.extract_batch(DOCS)
+    size = len(extractor._terms)
+    per_text, _ = extractor.extract_batch(["半導体の輸出規制"], update=False)
+    assert per_text == [["半導体", "輸出規制"]]
+    assert len(extractor._terms) == len(extractor._df) == size
+    assert "半導体" not in extractor._vocabulary
+
+def test_vocabulary_is_pruned_past_max_terms(tmp_path):
+    db_path = str(tmp_path / "keywords.sqlite3")
+    extractor = KeywordExtractor(db_path=db_path, max_terms=10)
+    extractor.extract_batch(DOCS)
+    # 文書頻度1の語は削除され、複数の文書に現れる語だけが残る
+    assert set(extractor._terms) == {"生成", "ai"}
+    per_text, _ = extractor.extract_batch(["生成AIの研究"], update=False)
+    assert per_text == [["研究", "生成", "ai"]]
+    extractor.close()
+
+    reopened = KeywordExtractor(db_path=db_path, max_terms=10)
+    assert set(reopened._terms) == {"生成", "ai"}
+    assert reopened._df[reopened._vocabulary["生成"]] == 2
+
+def test_document_statistics_are_aged_past_max_docs(tmp_path):
+    import sqlite3
+    db_path = str(tmp_path / "keywords.sqlite3")
+    extractor = KeywordExtractor(db_path=db_path, max_docs=4)
+    extractor.extract_batch(DOCS)
+    extractor.extract_batch(["生成AIの研究が進んでいる。", "半導体の輸出規制が強化された。"])
+    # 5件目で上限を超えたため、文書数と文書頻度を半減する
+    assert extractor._doc_count == 2
+    assert extractor._df[extractor._vocabulary["生成"]] == 1
+    assert "量子" not in extractor._vocabulary
+    extractor.close()
+
+    # 古い文書の記録から削除され、新しい文書の記録だけが残る
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM seen_docs").fetchone()[0] == 2
+        assert conn.execute("SELECT df FROM term_df WHERE term = '生成'").fetchone()[0] == 1
+        assert conn.execute("SELECT COUNT(*) FROM term_df WHERE term = '量子'").fetchone()[0] == 0
+    reopened = KeywordExtractor(db_path=db_path, max_docs=4)
+    assert reopened._doc_count == 2
+    reopened.extract_batch(["半導体の輸出規制が強化された。"])
+    assert reopened._doc_count == 2
+
+def test_empty_inputs():
+    extractor = KeywordExtractor()
+    assert extractor.extract_batch([]) == ([], [])
+    assert extractor.extract_batch(["", "の"]) == ([[], []], [])
+
+def test_batch_of_thousand_results_is_fast():
+    extractor = KeywordExtractor()
+    texts = [DOCS[i % 3] * 10 + f"項目{i}" for i in range(1000)]
+    start = time.perf_counter()
+    per_text, corpus = extractor.extract_batch(texts)
+    assert time.perf_counter() - start < 2.0
+    assert len(per_text) == 1000 and corpus
@@ -0,0 +1,44 @@
+import json
+import pytest
+from services.lexicon import Lexicon, LexiconMatcher, available_backends, load_lexicons
+
+BACKENDS = available_backends()
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_counts_distinct_words_per_label(backend):
+    matcher = LexiconMatcher({
+        "positive": ["良い", "成功", "good"],
+        "negative": ["問題", "bad"],
+    }, backend=backend)
+    counts = matcher.count("新製品は成功した。成功の理由は良い設計だ。Good job, no Bad news, no 問題")
+    assert counts == {"positive": 3, "negative": 2}
+    assert matcher.count("") == {"positive": 0, "negative": 0}
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_overlapping_and_nested_patterns(backend):
+    # 他の語の一部になっている語・重なり合う語も全て見つける
+    matcher = LexiconMatcher({"x": ["研究", "研究者", "究者", "he", "she", "hers"]}, backend=backend)
+    assert matcher.count("若手研究者 ushers")["x"] == 6
+    assert matcher.count("研")["x"] == 0
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_lexicon_matches_previous_heuristics(backend):
+    lexicon = Lexicon(backend=backend)
+    assert lexicon.sentiment("素晴らしい成功だった") == "positive"
+    assert lexicon.sentiment("最悪の失敗で問題が残った。ただし良い点もある") == "negative"
+    assert lexicon.sentiment("特に何もない") == "neutral"
+    assert lexicon.sentiments(["good", "bad", ""]) == ["positive", "negative", "neutral"]
+    assert lexicon.is_important("この調査は重要な結論を示した")
+    assert not lexicon.is_important("天気は晴れ")
+    assert lexicon.is_stopword("The") and not lexicon.is_stopword("研究")
+
+def test_lexicons_are_configurable(tmp_path):
+    path = tmp_path / "lexicon.json"
+    path.write_text(json.dumps({"positive": ["上昇"], "negative": ["下落"], "unknown": ["x"]}, ensure_ascii=False),
+                    encoding="utf-8")
+    lexicon = Lexicon(load_lexicons(str(path)))
+    assert lexicon.sentiment("株価が上昇した") == "positive"
+    assert lexicon.sentiment("素晴らしい") == "neutral"
+    # 指定しなかった辞書はデフォルトのまま
+    assert lexicon.is_important("重要")
+    assert load_lexicons(str(tmp_path / "missing.json")) == {}
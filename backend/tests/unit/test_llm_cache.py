@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from services.cache import TwoTierCache
+from services.llm_cache import LLMCache, bypass_llm_cache, get_llm_cache
+
+CONFIG = {"temperature": 0.7, "max_output_tokens": 2048}
+
+def make_cache(tmp_path=None):
+    db_path = str(tmp_path / "llm.sqlite3") if tmp_path else None
+    return LLMCache(TwoTierCache("llm_responses", max_entries=2, ttl=60, db_path=db_path))
+
+def test_repeated_prompt_costs_one_call():
+    cache = make_cache()
+    calls = []
+    def call():
+        calls.append(1)
+        return "回答"
+    assert cache.cached("gemini", "gemini-pro", "質問", CONFIG, call) == "回答"
+    assert cache.cached("gemini", "gemini-pro", "質問", CONFIG, call) == "回答"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["stored"] == 1
+
+def test_key_includes_provider_model_and_config():
+    key = LLMCache.make_key("gemini", "gemini-pro", "質問", CONFIG)
+    assert key == LLMCache.make_key("gemini", "gemini-pro", "質問", dict(reversed(list(CONFIG.items()))))
+    assert key != LLMCache.make_key("openai", "gemini-pro", "質問", CONFIG)
+    assert key != LLMCache.make_key("gemini", "gemini-1.5", "質問", CONFIG)
+    assert key != LLMCache.make_key("gemini", "gemini-pro", "質問", {**CONFIG, "temperature": 0.0})
+    assert key != LLMCache.make_key("gemini", "gemini-pro", "質問!", CONFIG)
+
+def test_bypass_refreshes_and_errors_are_not_cached():
+    cache = make_cache()
+    cache.set("gemini", "m", "p", None, "古い回答")
+    with bypass_llm_cache():
+        assert cache.cached("gemini", "m", "p", None, lambda: "新しい回答") == "新しい回答"
+    assert cache.get("gemini", "m", "p") == "新しい回答"
+    assert cache.stats()["bypassed"] == 1
+
+    def fail():
+        raise ValueError("API error")
+    with pytest.raises(ValueError):
+        cache.cached("gemini", "m", "other", None, fail)
+    assert cache.get("gemini", "m", "other") is None
+
+@pytest.mark.asyncio
+async def test_async_calls_and_bypass_propagate_to_tasks():
+    cache = make_cache()
+    calls = []
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return "回答"
+    await cache.acached("openai", "gpt", "p", None, call)
+    await cache.acached("openai", "gpt", "p", None, call)
+    assert len(calls) == 1
+    with bypass_llm_cache():
+        await asyncio.gather(asyncio.ensure_future(cache.acached("openai", "gpt", "p", None, call)))
+    assert len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_async_calls_read_and_write_off_the_event_loop():
+    import threading
+    cache = make_cache()
+    threads = []
+    get, set_ = cache.cache.get, cache.cache.set
+
+    def record(func):
+        def wrapper(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return func(*args, **kwargs)
+        return wrapper
+
+    cache.cache.get, cache.cache.set = record(get), record(set_)
+
+    async def call():
+        return "回答"
+
+    await cache.acached("openai", "gpt", "p", None, call)
+    assert len(threads) == 2 and threading.main_thread() not in threads
+
+def test_disk_tier_survives_restart(tmp_path):
+    make_cache(tmp_path).set("gemini", "m", "p", CONFIG, "保存された回答")
+    assert make_cache(tmp_path).get("gemini", "m", "p", CONFIG) == "保存された回答"
+
+def test_disabled(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+    assert get_llm_cache() is None
@@ -0,0 +1,116 @@
+import time
+from services.search_backends import CircuitBreaker, SearchBackend, SearchBackendRegistry
+
+def results(name, count=3):
+    return [{"url": f"https://{name}.example.com/{i}", "title": name} for i in range(count)]
+
+def sleeping_backend(name, delay, count=3):
+    def search(query, max_pages):
+        time.sleep(delay)
+        return results(name, count)
+    return SearchBackend(name, search)
+
+def failing_backend(name, calls=None):
+    def search(query, max_pages):
+        if calls is not None:
+            calls.append(query)
+        raise RuntimeError("blocked")
+    return SearchBackend(name, search)
+
+def test_fast_primary_does_not_hedge():
+    registry = SearchBackendRegistry(default_hedge_delay=1.0)
+    registry.register(sleeping_backend("primary", 0.01))
+    secondary = registry.register(sleeping_backend("secondary", 0.01))
+
+    merged = registry.search("q")
+
+    assert {r["metadata"]["backend"] for r in merged} == {"primary"}
+    assert secondary.stats()["calls"] == 0
+
+def test_slow_primary_is_hedged_after_delay():
+    registry = SearchBackendRegistry(default_hedge_delay=0.05)
+    registry.register(sleeping_backend("slow", 1.0))
+    registry.register(sleeping_backend("fast", 0.01))
+
+    start = time.perf_counter()
+    merged = registry.search("q")
+
+    assert time.perf_counter() - start < 0.5
+    assert {r["metadata"]["backend"] for r in merged} == {"fast"}
+
+def test_failure_starts_next_backend_and_merges_until_deadline():
+    registry = SearchBackendRegistry(default_hedge_delay=5.0, min_results=5)
+    registry.register(failing_backend("broken"))
+    registry.register(sleeping_backend("a", 0.01, count=2))
+    registry.register(sleeping_backend("b", 0.01, count=3))
+
+    start = time.perf_counter()
+    merged = registry.search("q", deadline=1.0)
+
+    # 失敗した場合も、件数が足りない場合もヘッジ待ちなしで次を開始する
+    assert time.perf_counter() - start < 0.5
+    assert len(merged) == 5
+
+def test_deadline_returns_partial_results():
+    registry = SearchBackendRegistry(default_hedge_delay=0.01, min_results=10)
+    registry.register(sleeping_backend("fast", 0.01, count=2))
+    registry.register(sleeping_backend("slow", 2.0))
+
+    start = time.perf_counter()
+    merged = registry.search("q", deadline=0.2)
+
+    assert time.perf_counter() - start < 1.0
+    assert len(merged) == 2
+
+def test_hedge_delay_uses_p95_latency():
+    registry = SearchBackendRegistry(default_hedge_delay=3.0, min_hedge_delay=0.0, min_samples=5)
+    backend = sleeping_backend("b", 0.0)
+    assert registry.hedge_delay(backend) == 3.0
+    for latency in [0.1] * 19 + [0.9]:
+        backend._record(True, latency)
+    assert registry.hedge_delay(backend) == 0.9
+
+def test_circuit_breaker_skips_failing_backend():
+    calls = []
+    registry = SearchBackendRegistry()
+    broken = registry.register(failing_backend("broken", calls))
+    broken.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+    registry.register(sleeping_backend("ok", 0.0))
+
+    for _ in range(3):
+        registry.search("q")
+
+    assert len(calls) == 2
+    assert broken.stats()["skipped"] == 1
+    assert broken.breaker.state == "open"
+
+    # reset_timeout後は1回だけ試行し、成功すれば閉じる
+    time.sleep(0.15)
+    assert broken.breaker.state == "half_open"
+    assert broken.breaker.allow() and not broken.breaker.allow()
+    broken.breaker.record_success()
+    assert broken.breaker.state == "closed"
+
+def test_asearch_runs_on_the_registry_executor():
+    import asyncio
+    import threading
+    threads = []
+
+    def search(query, max_pages):
+        threads.append(threading.current_thread().name)
+        return results("primary")
+
+    registry = SearchBackendRegistry()
+    registry.register(SearchBackend("primary", search))
+
+    async def run():
+        return await registry.asearch("q")
+
+    merged = asyncio.run(run())
+    assert len(merged) == 3
+    # 検索の待機は共有Executor（crawler-*）のワーカーを使わない
+    coordinator = registry._executor
+    assert coordinator is not None and coordinator._thread_name_prefix == "search-registry"
+    assert not threads[0].startswith("crawler")
+    registry.close()
+    assert registry._executor is None
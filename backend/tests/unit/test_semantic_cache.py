@@ -0,0 +1,93 @@
+import numpy as np
+from services.semantic_cache import HashingEmbedder, LSHIndex, SemanticCache
+
+SCOPE = {"endpoint": "cot_deepresearch", "max_pages": 5, "language": "ja"}
+RESULT = {"results": [{"title": "生成AI規制", "url": "https://example.com"}], "analysis": {"summary": "要約"}}
+
+def similarity(embedder, a, b):
+    return float(embedder.embed(a) @ embedder.embed(b))
+
+def test_embedder_matches_paraphrases_across_languages():
+    embedder = HashingEmbedder()
+    assert similarity(embedder, "生成AI 規制 動向", "generative AI regulation trends Japan") >= 0.9
+    assert similarity(embedder, "量子コンピュータ 実用化", "量子コンピューターの実用化") >= 0.9
+    assert similarity(embedder, "生成AI 規制 動向", "生成AI 規制 動向 米国") < 0.9
+    assert similarity(embedder, "生成AI 規制", "量子コンピュータ 実用化") < 0.1
+    # 英字の表記は単語境界で照合する
+    assert "c:人工知能" not in embedder.features("he said")
+
+def test_lsh_index_finds_nearest_neighbor():
+    rng = np.random.RandomState(0)
+    vectors = rng.standard_normal((200, 64)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = LSHIndex(64)
+    for i, vector in enumerate(vectors):
+        index.add(i, vector)
+    query = vectors[42] + 0.05 * rng.standard_normal(64).astype(np.float32)
+    query /= np.linalg.norm(query)
+    assert index.search(query, k=1)[0][0] == 42
+    index.remove(42)
+    assert all(item_id != 42 for item_id, _ in index.search(query, k=5))
+
+def test_lookup_returns_approximate_hit_and_records_stats():
+    cache = SemanticCache(threshold=0.9)
+    assert cache.lookup("生成AI 規制 動向", SCOPE) is None
+    cache.store("生成AI 規制 動向", SCOPE, RESULT)
+
+    hit = cache.lookup("generative AI regulation trends Japan", SCOPE)
+    assert hit["value"] == RESULT
+    assert hit["approximate"] and hit["matched_query"] == "生成AI 規制 動向"
+    assert cache.lookup("生成ai  規制 動向", SCOPE)["approximate"] is False
+    assert cache.lookup("生成AI 規制 動向 米国", SCOPE) is None
+    # パラメータが異なる場合は再利用しない
+    assert cache.lookup("生成AI 規制 動向", {**SCOPE, "max_pages": 10}) is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["exact_hits"] == 1 and stats["misses"] == 3
+    assert stats["near_misses"] == 1
+    assert stats["threshold"] == 0.9 and stats["hit_rate"] == 0.4
+    assert sum(stats["similarity_histogram"].values()) == 5
+
+def test_store_replaces_same_query_and_evicts_oldest():
+    cache = SemanticCache(max_entries=2)
+    cache.store("生成AI 規制", SCOPE, {"v": 1})
+    cache.store("生成ai 規制", SCOPE, {"v": 2})
+    assert cache.stats()["entries"] == 1
+    cache.store("量子コンピュータ 実用化", SCOPE, {"v": 3})
+    cache.store("半導体 サプライチェーン", SCOPE, {"v": 4})
+    assert cache.stats()["entries"] == 2
+    assert cache.lookup("生成AI 規制", SCOPE) is None
+    assert cache.lookup("半導体 サプライチェーン", SCOPE)["value"] == {"v": 4}
+
+def test_expired_entries_are_not_returned():
+    cache = SemanticCache(ttl=-1)
+    cache.store("生成AI 規制", SCOPE, RESULT)
+    assert cache.lookup("生成AI 規制", SCOPE) is None
+    assert cache.stats()["expirations"] == 1 and cache.stats()["entries"] == 0
+
+def test_index_is_rebuilt_from_disk(tmp_path):
+    db_path = str(tmp_path / "semantic.sqlite3")
+    cache = SemanticCache(db_path=db_path)
+    cache.store("生成AI 規制 動向", SCOPE, RESULT)
+    cache.close()
+
+    reopened = SemanticCache(db_path=db_path)
+    assert reopened.lookup("generative AI regulation trends", SCOPE)["value"] == RESULT
+    reopened.store("量子コンピュータ 実用化", SCOPE, {"v": 2})
+    assert reopened.stats()["entries"] == 2
+
+def test_replacement_and_eviction_are_persisted_in_insertion_order(tmp_path):
+    db_path = str(tmp_path / "semantic.sqlite3")
+    cache = SemanticCache(max_entries=2, db_path=db_path)
+    cache.store("生成AI 規制", SCOPE, {"v": 1})
+    cache.store("量子コンピュータ 実用化", SCOPE, {"v": 2})
+    cache.store("生成ai 規制", SCOPE, {"v": 3})  # 置き換えると最も新しいエントリになる
+    cache.store("半導体 サプライチェーン", SCOPE, {"v": 4})
+    assert cache.lookup("量子コンピュータ 実用化", SCOPE) is None
+    assert len(cache._by_query) == len(cache._entries) == 2
+    cache.close()
+
+    reopened = SemanticCache(max_entries=2, db_path=db_path)
+    assert reopened.lookup("生成AI 規制", SCOPE)["value"] == {"v": 3}
+    assert reopened.lookup("半導体 サプライチェーン", SCOPE)["value"] == {"v": 4}
+    assert reopened.stats()["entries"] == 2
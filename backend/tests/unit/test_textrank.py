@@ -0,0 +1,60 @@
+import time
+from services.textrank import TextRank, split_sentences
+
+ARTICLE = (
+    "政府は生成AIの利用に関するガイドラインを公表した。"
+    "ガイドラインは生成AIの利用における透明性の確保を企業に求めている。"
+    "生成AIの利用では著作権と個人情報の保護も重要な論点になる。"
+    "企業は生成AIの利用にあたってリスク評価を行う必要があるとされた。"
+    "なお、発表会場の近くでは桜がちょうど満開を迎えていた。"
+)
+
+def test_split_sentences():
+    text = "最初の文はここで終わります。短い。\nEnglish sentence number one is here. Version 3.5 was released today!"
+    assert split_sentences(text, min_chars=10) == [
+        "最初の文はここで終わります。",
+        "English sentence number one is here.",
+        "Version 3.5 was released today!",
+    ]
+    assert split_sentences("同じ文が二回出てくる場合。同じ文が二回出てくる場合。", min_chars=5) == ["同じ文が二回出てくる場合。"]
+
+def test_central_sentences_rank_above_outliers():
+    ranker = TextRank()
+    ranked = ranker.key_sentences(ARTICLE, top_k=5)
+    assert len(ranked) == 5
+    assert ranked[-1].startswith("なお")
+    scores = ranker.scores(split_sentences(ARTICLE))
+    assert abs(scores.sum() - 1.0) < 1e-6
+
+def test_prior_favours_important_sentences():
+    sentences = split_sentences(ARTICLE)
+    important = [i for i, sentence in enumerate(sentences) if "重要" in sentence]
+    plain = TextRank().scores(sentences)
+    boosted = TextRank(prior=lambda sentence: 3.0 if "重要" in sentence else 1.0).scores(sentences)
+    assert boosted[important[0]] > plain[important[0]]
+    assert abs(boosted.sum() - 1.0) < 1e-6
+
+def test_summarize_per_text_and_corpus():
+    ranker = TextRank()
+    other = "量子コンピュータの研究が進み、誤り訂正の実験に成功した。量子ビットの数も年々増えており、実用化が近づいている。"
+    per_text, corpus = ranker.summarize([ARTICLE, other, ""], per_text=2, top_k=3)
+    assert [len(sentences) for sentences in per_text] == [2, 2, 0]
+    assert len(corpus) == 3
+    assert set(corpus) <= set(per_text[0] + per_text[1])
+
+def test_sentence_cap_bounds_cost():
+    ranker = TextRank(max_sentences=100)
+    text = "".join(f"文書{i}の内容は生成AIと規制と市場{i % 7}に関するものである。" for i in range(2000))
+    start = time.perf_counter()
+    ranked = ranker.rank(split_sentences(text), top_k=5)
+    assert time.perf_counter() - start < 1.0
+    assert len(ranked) == 5
+
+def test_similarity_matrix_is_sparse_and_symmetric():
+    ranker = TextRank(neighbors=3)
+    sentences = split_sentences("".join(f"文書{i}の内容は生成AIと規制と市場{i % 7}に関するものである。" for i in range(50)))
+    weights = ranker.similarity_matrix(sentences)
+    assert weights.shape == (len(sentences), len(sentences))
+    assert weights.nnz <= 2 * 3 * len(sentences)
+    assert abs(weights - weights.T).max() == 0
+    assert weights.diagonal().sum() == 0
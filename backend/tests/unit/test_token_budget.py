@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+from services.token_budget import AnalysisBudget, estimate_tokens, map_concurrently, split_results_section
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+    assert estimate_tokens("生成AIの規制") == 5 + 1
+
+def test_budget_from_env(monkeypatch):
+    monkeypatch.setenv("ANALYSIS_MAX_PROMPT_TOKENS", "10")
+    monkeypatch.setenv("ANALYSIS_MAP_FANOUT", "2")
+    budget = AnalysisBudget.from_env()
+    assert budget.fanout == 2
+    assert budget.fits("あ" * 10) and not budget.fits("あ" * 11)
+
+def test_split_results_section_keeps_instructions():
+    prompt = "## ステップ1: 整理\n指示\n\n## 検索結果:\nタイトル: A\n## 検索結果:\n本文中の見出し"
+    instructions, results = split_results_section(prompt)
+    assert instructions == "## ステップ1: 整理\n指示\n\n## 検索結果:\n"
+    assert results == "タイトル: A\n## 検索結果:\n本文中の見出し"
+    assert split_results_section("タイトル: A") == ("", "タイトル: A")
+
+@pytest.mark.asyncio
+async def test_map_concurrently_limits_fanout_and_keeps_order():
+    running = 0
+    peak = 0
+
+    async def summarize(chunk):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if chunk == "bad":
+            raise RuntimeError("API error")
+        return chunk.upper()
+
+    results = await map_concurrently(["a", "b", "bad", "c", "d"], summarize, fanout=2)
+    assert results == ["A", "B", None, "C", "D"]
+    assert peak == 2
@@ -0,0 +1,52 @@
+import base64
+import time
+from services.url_utils import canonicalize_url, url_key, unwrap_redirect
+
+def bing_redirect(target):
+    encoded = base64.urlsafe_b64encode(target.encode()).decode().rstrip("=")
+    return f"https://www.bing.com/ck/a?!&&p=abc&ptn=3&u=a1{encoded}&ntb=1"
+
+def test_unwraps_redirects():
+    target = "https://example.com/article?id=1"
+    assert unwrap_redirect(bing_redirect(target)) == target
+    assert unwrap_redirect("https://www.google.com/url?q=https%3A%2F%2Fexample.com%2Fa&sa=U") == "https://example.com/a"
+    assert unwrap_redirect("https://duckduckgo.com/l/?uddg=https%3A%2F%2Fexample.com%2F") == "https://example.com/"
+    # リダイレクトでないURLはそのまま
+    assert unwrap_redirect("https://www.bing.com/search?q=test") == "https://www.bing.com/search?q=test"
+
+def test_canonicalize_strips_tracking_and_sorts_query():
+    url = "HTTPS://Example.COM:443/path?utm_source=bing&b=2&a=1&fbclid=xyz#section"
+    assert canonicalize_url(url) == "https://example.com/path?a=1&b=2"
+    assert canonicalize_url(bing_redirect("https://example.com/a?utm_medium=x")) == "https://example.com/a"
+
+def test_canonicalize_resolves_relative_links():
+    assert canonicalize_url("../b?fbclid=nav", base="https://example.com/x/y/z") == "https://example.com/x/b"
+    assert canonicalize_url("http://example.com") == "http://example.com/"
+    assert canonicalize_url("http://example.com:8080/a") == "http://example.com:8080/a"
+    assert canonicalize_url("mailto:someone@example.com") == "mailto:someone@example.com"
+
+def test_ambiguous_params_are_stripped_only_on_listed_hosts():
+    # ref, src等は一般のサイトではページの選択に使われ得るため残す
+    assert canonicalize_url("https://example.com/docs?ref=main") == "https://example.com/docs?ref=main"
+    assert canonicalize_url("https://example.com/img?src=a.png&si=2") == "https://example.com/img?si=2&src=a.png"
+    assert canonicalize_url("https://www.youtube.com/watch?v=abc&feature=share&si=xyz") == "https://www.youtube.com/watch?v=abc"
+    assert canonicalize_url("https://www.bing.com/search?q=test&form=QBLH") == "https://www.bing.com/search?q=test"
+    assert canonicalize_url("https://item.taobao.com/item.htm?id=1&spm=a21") == "https://item.taobao.com/item.htm?id=1"
+
+def test_url_key_folds_variants():
+    variants = [
+        "http://www.example.com/news/article/",
+        "https://example.com/news/article",
+        "https://m.example.com/news/article?utm_campaign=x",
+        "https://amp.example.com/news/article/amp/",
+        "https://example.com/news/article?amp=1#top",
+    ]
+    assert len({url_key(v) for v in variants}) == 1
+    assert url_key("https://example.com/a") != url_key("https://example.com/b")
+
+def test_fast_enough_for_thousands_of_links():
+    links = [f"/page/{i}?utm_source=x&id={i % 50}" for i in range(5000)]
+    start = time.perf_counter()
+    for link in links:
+        url_key(canonicalize_url(link, base="https://example.com/"))
+    assert time.perf_counter() - start < 1.0
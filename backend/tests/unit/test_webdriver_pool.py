@@ -0,0 +1,113 @@
+import threading
+import pytest
+from services.webdriver_pool import WebDriverPool, WebDriverPoolTimeout
+
+class FakeDriver:
+    def __init__(self, index):
+        self.index = index
+        self.alive = True
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("driver crashed")
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+@pytest.fixture
+def factory():
+    created = []
+    def create():
+        driver = FakeDriver(len(created))
+        created.append(driver)
+        return driver
+    create.created = created
+    return create
+
+def test_warm_up_creates_drivers(factory):
+    pool = WebDriverPool(factory, size=3)
+    assert pool.warm_up() == 3
+    assert pool.stats()["idle"] == 3
+    pool.close()
+    assert all(d.quit_called for d in factory.created)
+
+def test_lease_gives_exclusive_drivers(factory):
+    pool = WebDriverPool(factory, size=2)
+    with pool.lease() as d1:
+        with pool.lease() as d2:
+            assert d1 is not d2
+            # プールが空の場合はタイムアウトする
+            with pytest.raises(WebDriverPoolTimeout):
+                pool.acquire(timeout=0.05)
+    assert pool.stats()["idle"] == 2
+
+def test_crashed_driver_is_replaced(factory):
+    pool = WebDriverPool(factory, size=1)
+    pool.warm_up()
+    factory.created[0].alive = False
+
+    with pool.lease() as driver:
+        assert driver.index == 1
+    assert factory.created[0].quit_called
+    assert pool.stats()["replaced"] == 1
+
+def test_driver_broken_during_lease_is_discarded(factory):
+    pool = WebDriverPool(factory, size=1)
+    with pytest.raises(ValueError):
+        with pool.lease() as driver:
+            driver.alive = False
+            raise ValueError("page load failed")
+    assert pool.stats()["created"] == 0
+
+    with pool.lease() as driver:
+        assert driver.index == 1
+
+def test_waiting_lease_receives_returned_driver(factory):
+    pool = WebDriverPool(factory, size=1)
+    driver = pool.acquire()
+    received = []
+
+    thread = threading.Thread(target=lambda: received.append(pool.acquire(timeout=2)))
+    thread.start()
+    pool.release(driver)
+    thread.join()
+
+    assert received == [driver]
+
+def test_broken_release_lets_waiting_lease_create_a_driver(factory):
+    import time
+    pool = WebDriverPool(factory, size=1)
+    driver = pool.acquire()
+    received = []
+
+    thread = threading.Thread(target=lambda: received.append(pool.acquire(timeout=5)))
+    thread.start()
+    time.sleep(0.05)  # 待機中のスレッドがスロットの解放を待つ状態にする
+    start = time.perf_counter()
+    pool.release(driver, broken=True)
+    thread.join()
+
+    # 返却されたドライバーではなく、空いたスロットで作成した新しいドライバーを受け取る
+    assert time.perf_counter() - start < 1.0
+    assert [d.index for d in received] == [1]
+    assert driver.quit_called
+    assert pool.stats()["created"] == 1
+
+def test_close_wakes_waiting_lease(factory):
+    pool = WebDriverPool(factory, size=1)
+    pool.acquire()
+    errors = []
+
+    def wait():
+        try:
+            pool.acquire(timeout=5)
+        except WebDriverPoolTimeout as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=wait)
+    thread.start()
+    pool.close()
+    thread.join(timeout=2)
+    assert not thread.is_alive() and len(errors) == 1
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from dotenv import load_dotenv
+
+from backend.services.gemini import GeminiService
+from backend.services.llm_cache import bypass_llm_cache
+from backend.services.token_budget import estimate_tokens
+
+SENTENCES = [
+    "政府は生成AIの利用に関する新しいガイドラインを公表し、事業者に透明性の確保を求めた。",
+    "研究チームの分析によると、新しい手法は従来の手法より推論コストを約40%削減した。",
+    "欧州では包括的なAI規制法が成立し、高リスク用途には適合性評価が義務付けられる。",
+    "業界団体は自主規制の枠組みを提案しているが、実効性を疑問視する声もある。",
+    "The report notes that compliance costs fall disproportionately on smaller firms. ",
+    "専門家は、国際的なルールの調和が今後の重要な課題になると指摘している。",
+]
+
+
+def make_results(count, sentences_per_result, seed=0):
+    """全文取得した検索結果に相当する長い本文を作成する"""
+    rng = random.Random(seed)
+    return [
+        {
+            "title": f"記事{i + 1}",
+            "url": f"https://example.com/articles/{i + 1}",
+            "content": "".join(rng.choice(SENTENCES) for _ in range(sentences_per_result)),
+        }
+        for i in range(count)
+    ]
+
+
+async def measure(service, text, max_prompt_tokens):
+    """予算を変えて分析の所要時間を計測する（LLM応答キャッシュは使わない）"""
+    service.budget.max_prompt_tokens = max_prompt_tokens
+    start = time.perf_counter()
+    with bypass_llm_cache():
+        analysis = await service.analyze(text)
+    return time.perf_counter() - start, analysis
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='単一プロンプトとmap-reduceの分析時間の比較')
+    parser.add_argument('--results', type=int, default=15, help='検索結果の件数')
+    parser.add_argument('--sentences', type=int, default=200, help='1件あたりの文の数')
+    parser.add_argument('--budget', type=int, default=8000, help='map-reduceに切り替える推定トークン数')
+    args = parser.parse_args()
+
+    load_dotenv()
+    service = GeminiService()
+    # TextRankによる圧縮を経由しない長い入力（api_searchと同じく本文を連結した文字列）
+    text = "\n\n".join(
+        f"タイトル: {r['title']}\nURL: {r['url']}\n内容: {r['content']}"
+        for r in make_results(args.results, args.sentences)
+    )
+    print(f"input: {len(text)} chars, ~{estimate_tokens(text)} tokens")
+
+    for label, budget in (("single", sys.maxsize), ("map_reduce", args.budget)):
+        elapsed, analysis = await measure(service, text, budget)
+        status = "error" if "error" in analysis else analysis.get("analysis_mode")
+        print(f"{label:<11} {elapsed:7.1f} s  ({status})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
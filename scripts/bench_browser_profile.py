@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import argparse
+from urllib.parse import quote_plus
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from backend.services.browser_profile import get_browser_profile
+
+QUERIES = ["生成AI 規制", "量子コンピュータ 実用化", "半導体 サプライチェーン", "気候変動 適応策", "宇宙開発 民間"]
+
+
+def _children(pid):
+    """/procからpidの子孫プロセスを列挙する"""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            parents.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError):
+            continue
+    stack, found = [pid], []
+    while stack:
+        current = stack.pop()
+        for child in parents.get(current, []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def _rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def chrome_rss(driver):
+    """chromedriver配下のChromeプロセスのRSS合計（Linuxのみ）"""
+    pid = driver.service.process.pid
+    return sum(_rss_bytes(child) for child in _children(pid))
+
+
+def measure(profile_name, rounds):
+    """プロファイルごとにSERPの読み込み時間とChromeのRSSを計測する"""
+    profile = get_browser_profile(profile_name)
+    driver = profile.configure(webdriver.Chrome(options=profile.apply(webdriver.ChromeOptions())))
+    timings = []
+    peak_rss = 0
+    try:
+        for i in range(rounds):
+            query = QUERIES[i % len(QUERIES)]
+            start = time.perf_counter()
+            try:
+                driver.get(f"https://www.bing.com/search?q={quote_plus(query)}")
+            except TimeoutException:
+                driver.execute_script("window.stop();")
+            WebDriverWait(driver, 15).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "ol#b_results li.b_algo"))
+            )
+            timings.append(time.perf_counter() - start)
+            peak_rss = max(peak_rss, chrome_rss(driver))
+    finally:
+        driver.quit()
+    timings.sort()
+    return timings, peak_rss
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Chromeプロファイルごとのbing SERP読み込み時間とRSSの計測')
+    parser.add_argument('--rounds', type=int, default=10, help='プロファイルごとの読み込み回数')
+    parser.add_argument('--profiles', default='default,light', help='計測するプロファイル（カンマ区切り）')
+    args = parser.parse_args()
+
+    for name in args.profiles.split(','):
+        timings, peak_rss = measure(name, args.rounds)
+        median = timings[len(timings) // 2]
+        p90 = timings[min(len(timings) - 1, int(len(timings) * 0.9))]
+        print(f"{name:<8} median {median * 1000:7.0f} ms  p90 {p90 * 1000:7.0f} ms  "
+              f"peak RSS {peak_rss / 1024 / 1024:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+import argparse
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from backend.services.crawler import CrawlerService
+
+
+def measure(mode, eager):
+    """CrawlerServiceの作成時間と、最初にブラウザが必要になるまでの時間を計測する"""
+    start = time.perf_counter()
+    service = CrawlerService(mode=mode)
+    if eager:
+        # 変更前の動作（__init__でブラウザを起動）を再現する
+        service.setup_browser()
+    init_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    browser = service._ensure_browser()
+    first_use_seconds = time.perf_counter() - start
+
+    drivers = service.driver_pool.stats()["created"] if service.driver_pool else 0
+    service.close()
+    return init_seconds, first_use_seconds, browser, drivers
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CrawlerServiceの起動時間の計測')
+    parser.add_argument('--mode', choices=['auto', 'http'], default='auto', help='クローラーのモード')
+    parser.add_argument('--eager', action='store_true', help='作成直後にブラウザを起動する（変更前の動作）')
+    args = parser.parse_args()
+
+    init_seconds, first_use_seconds, browser, drivers = measure(args.mode, args.eager)
+    print(f"mode={args.mode} eager={args.eager}")
+    print(f"  CrawlerService(): {init_seconds * 1000:8.1f} ms")
+    print(f"  最初のブラウザ利用: {first_use_seconds * 1000:8.1f} ms (browser={browser}, drivers={drivers})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import time
+import argparse
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from backend.services import html_parser
+
+FIXTURES_DIR = os.path.join(root_dir, "backend", "tests", "fixtures")
+
+
+def bench(func, html, repeat):
+    """関数をrepeat回実行し、1回あたりの秒数を返す"""
+    func(html)  # ウォームアップ
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(html)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTMLパーサーのスループット計測')
+    parser.add_argument('--repeat', type=int, default=50, help='各計測の繰り返し回数')
+    args = parser.parse_args()
+
+    fixtures = {
+        "bing_serp.html": lambda backend: (lambda html: html_parser.parse_bing_results(html, backend=backend)),
+        "article.html": lambda backend: (lambda html: html_parser.extract_text_blocks(html, backend=backend)),
+    }
+
+    print(f"利用可能なバックエンド: {', '.join(html_parser.available_backends())}")
+    for name, make_func in fixtures.items():
+        with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+            html = f.read()
+        size_mb = len(html.encode("utf-8")) / 1024 / 1024
+
+        print(f"\n{name} ({size_mb * 1024:.1f} KB)")
+        baseline = None
+        for backend in reversed(html_parser.available_backends()):
+            seconds = bench(make_func(backend), html, args.repeat)
+            baseline = baseline or seconds
+            print(f"  {backend:<11} {seconds * 1000:8.2f} ms/page  {1 / seconds:8.1f} pages/s  "
+                  f"{size_mb / seconds:7.1f} MB/s  x{baseline / seconds:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from backend.services.lexicon import DEFAULT_LEXICONS, Lexicon, available_backends
+
+SENTENCES = [
+    "政府は生成AIの利用に関する新しいガイドラインを公表した。",
+    "研究チームの分析によると、新しい手法は従来より優れた性能を示した。",
+    "一方で、個人情報の扱いには問題があり、危険性を指摘する声もある。",
+    "The study found significant improvements in accuracy. ",
+    "Critics say the rollout was a failure and a bad precedent. ",
+    "その他の詳細は公式サイトで確認できる。",
+]
+
+
+def make_results(count, sentences_per_result, seed=0):
+    """検索結果の本文に相当するテキストを作成する"""
+    rng = random.Random(seed)
+    return ["".join(rng.choice(SENTENCES) for _ in range(sentences_per_result)) for _ in range(count)]
+
+
+def baseline_sentiment(text, positive_words, negative_words):
+    """変更前の実装（語ごとに部分文字列を検索する）"""
+    text_lower = text.lower()
+    positive_count = sum(1 for word in positive_words if word in text_lower)
+    negative_count = sum(1 for word in negative_words if word in text_lower)
+    if positive_count > negative_count:
+        return "positive"
+    if negative_count > positive_count:
+        return "negative"
+    return "neutral"
+
+
+def expand(words, size, seed=0):
+    """辞書をsize語まで架空の語で水増しする（大きな辞書での挙動を見るため）"""
+    rng = random.Random(seed)
+    chars = "あいうえおかきくけこさしすせそたちつてとアイウエオカキクケコ"
+    extra = ["".join(rng.choice(chars) for _ in range(rng.randint(2, 5))) for _ in range(max(0, size - len(words)))]
+    return list(words) + extra
+
+
+def main():
+    parser = argparse.ArgumentParser(description='辞書マッチャーの1件あたりのコスト計測')
+    parser.add_argument('--results', type=int, default=2000, help='検索結果の件数')
+    parser.add_argument('--sentences', type=int, default=20, help='1件あたりの文の数')
+    parser.add_argument('--sizes', default='31,300,1000', help='計測する辞書の語数（カンマ区切り）')
+    args = parser.parse_args()
+
+    texts = make_results(args.results, args.sentences)
+    avg_chars = sum(map(len, texts)) / len(texts)
+    print(f"{args.results} results, {avg_chars:.0f} chars/result")
+    print(f"利用可能なバックエンド: {', '.join(available_backends())}")
+
+    for size in (int(value) for value in args.sizes.split(',')):
+        half = size // 2
+        positive = expand(DEFAULT_LEXICONS["positive"], half, seed=1)
+        negative = expand(DEFAULT_LEXICONS["negative"], size - half, seed=2)
+        print(f"\nlexicon size {size}")
+
+        start = time.perf_counter()
+        for text in texts:
+            baseline_sentiment(text, positive, negative)
+        baseline = (time.perf_counter() - start) / len(texts)
+        print(f"  {'baseline':<14} {baseline * 1e6:8.1f} us/result")
+
+        for backend in available_backends():
+            lexicon = Lexicon({"positive": positive, "negative": negative}, backend=backend)
+            start = time.perf_counter()
+            lexicon.sentiments(texts)
+            seconds = (time.perf_counter() - start) / len(texts)
+            print(f"  {backend:<14} {seconds * 1e6:8.1f} us/result  x{baseline / seconds:.1f}")
+
+
+if __name__ == "__main__":
+    main()
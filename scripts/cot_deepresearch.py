@@ -2,6 +2,7 @@ import os
 import sys
 import logging
 import json
+import asyncio
 import argparse
 from datetime import datetime
 
@@ -15,6 +16,7 @@ import nest_asyncio
 # バックエンドサービスのインポート
 from backend.services.crawler import CrawlerService
 from backend.services import get_ai_service
+from backend.services.token_budget import RESULTS_HEADING
 
 # 非同期処理の設定
 nest_asyncio.apply()
@@ -31,20 +33,37 @@ class CoTDeepResearch:
     def __init__(self):
         self.logger = logger
         self.logger.info('CoTDeepResearchインスタンスが作成されました。')
+        # クローラーサービスは最初の実行時に作成し、以降の実行で再利用する
+        self.crawler = None
         
     async def execute(self, query, max_pages=15, depth=2):
         """Chain-of-Thought Deep Researchを実行する"""
+        result = None
+        async for event, data in self.execute_stream(query, max_pages, depth):
+            if event in ("done", "error"):
+                result = data
+        return result
+    
+    async def execute_stream(self, query, max_pages=15, depth=2):
+        """Chain-of-Thought Deep Researchを実行し、各段階の結果を(イベント名, データ)として順に返す
+        
+        results（検索結果）、token（生成中の分析テキスト、ストリーミングに対応したAIサービスのみ）、
+        analysis（分析結果）の後に、executeと同じ結果を done として返す。失敗した場合は error を返して終了する。
+        """
         self.logger.info(f'CoTDeepResearch開始: クエリ="{query}", max_pages={max_pages}, depth={depth}')
         
         try:
-            # クローラーサービスの初期化
-            crawler = CrawlerService()
-            self.logger.info('クローラーサービスを初期化しました。')
+            # クローラーサービスの初期化（ブラウザは必要になった時点で起動される）
+            if self.crawler is None:
+                self.crawler = CrawlerService()
+                self.logger.info('クローラーサービスを初期化しました。')
+            crawler = self.crawler
             
             # 検索の実行
             self.logger.info(f'検索を開始します: {query}')
-            results = crawler.crawl(query, max_pages=max_pages)
+            results = await crawler.deep_crawl(query, max_pages=max_pages)
             self.logger.info(f'検索結果: {len(results)}件取得')
+            yield "results", {"query": query, "results": results, "result_count": len(results)}
             
             # 検索結果のフィードバック生成
             crawler_feedback = self._generate_feedback(results)
@@ -59,9 +78,18 @@ class CoTDeepResearch:
             # CoTプロンプトの作成
             prompt = self._create_cot_prompt(query, combined_text, depth)
             
-            # 分析の実行
-            analysis = await gemini.analyze(prompt)
+            # 分析の実行（ストリーミングに対応している場合は生成中のテキストを順に返す）
+            if hasattr(gemini, "stream_analyze"):
+                analysis = None
+                async for event, data in gemini.stream_analyze(prompt):
+                    if event == "token":
+                        yield "token", {"text": data}
+                    else:
+                        analysis = data
+            else:
+                analysis = await gemini.analyze(prompt)
             self.logger.info('Chain-of-Thought推論が完了しました。')
+            yield "analysis", {"analysis": analysis}
             
             # 結果の保存
             results_dict = {
@@ -75,21 +103,10 @@ class CoTDeepResearch:
                     "result_count": len(results)
                 }
             }
-            
-            # 保存先ディレクトリの作成
-            output_dir = os.path.join(root_dir, "data", "research_results")
-            os.makedirs(output_dir, exist_ok=True)
-            
-            # ファイル名を作成して結果を保存
-            filename = f"cot_research_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            filepath = os.path.join(output_dir, filename)
-            
-            with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(results_dict, f, ensure_ascii=False, indent=2)
-                
+            filepath = await asyncio.to_thread(self._save_results, results_dict)
             self.logger.info(f'結果を保存しました: {filepath}')
             
-            return {
+            yield "done", {
                 "message": "CoTDeepResearch診断完了。",
                 "feedback": crawler_feedback,
                 "analysis": analysis,
@@ -98,11 +115,25 @@ class CoTDeepResearch:
             
         except Exception as e:
             self.logger.error(f'CoTDeepResearch実行中にエラーが発生しました: {str(e)}', exc_info=True)
-            return {
+            yield "error", {
                 "error": str(e),
                 "message": "CoTDeepResearch実行中にエラーが発生しました。"
             }
     
+    def _save_results(self, results_dict):
+        """結果をdata/research_resultsにJSONファイルとして保存し、パスを返す"""
+        # 保存先ディレクトリの作成
+        output_dir = os.path.join(root_dir, "data", "research_results")
+        os.makedirs(output_dir, exist_ok=True)
+        
+        # ファイル名を作成して結果を保存
+        filename = f"cot_research_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        filepath = os.path.join(output_dir, filename)
+        
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(results_dict, f, ensure_ascii=False, indent=2)
+        return filepath
+    
     def _generate_feedback(self, results):
         """検索結果からフィードバックを生成する"""
         feedback = ""
@@ -119,6 +150,14 @@ class CoTDeepResearch:
     def _generate_combined_text(self, results):
         """検索結果から結合テキストを生成する"""
         combined_text = ""
+        # 結果全体の重要文（クロール時にTextRankで選んだもの）を順位順に先頭に置く
+        corpus_sentences = sorted(
+            (item for res in results for item in res.get('metadata', {}).get('corpus_key_sentences', [])),
+            key=lambda item: item['rank']
+        )
+        if corpus_sentences:
+            overview = "\n".join(f"- {item['sentence']}" for item in corpus_sentences)
+            combined_text += f"全体の要点:\n{overview}\n\n"
         for res in results:
             title = res.get('title', '')
             url = res.get('url', '')
@@ -127,6 +166,13 @@ class CoTDeepResearch:
             author = res.get('metadata', {}).get('author', '')
 
             combined_text += f"タイトル: {title}\nURL: {url}\n概要: {summary}\n"
+            key_sentences = res.get('metadata', {}).get('key_sentences')
+            if key_sentences:
+                # 本文全体の代わりにTextRankで選んだ重要文を渡す
+                combined_text += f"要点: {' '.join(key_sentences)}\n"
+            elif res.get('metadata', {}).get('full_content'):
+                # 取得したページ本文（長すぎる場合は切り詰める）
+                combined_text += f"本文: {res.get('content', '')[:2000]}\n"
             if pub_date:
                 combined_text += f"発行日時: {pub_date}\n"
             if author:
@@ -156,20 +202,20 @@ class CoTDeepResearch:
             "証拠の評価に基づいて、最も可能性の高い結論を導き出してください。不確実性がある場合は、その程度も示してください。\n\n"
             "## ステップ6: 追加調査が必要な領域\n"
             "結論を強化するために追加の調査が必要な領域や、現在の情報では答えられない重要な質問を特定してください。\n\n"
-            "## 検索結果:\n" + combined_text
         )
         
         if depth >= 3:
             # 深度3以上の場合、より詳細な分析を要求
             prompt += (
-                "\n## 追加の分析要件:\n"
+                "## 追加の分析要件:\n"
                 "1. 各情報源のバイアスや視点の違いを特定し、それが結論にどのように影響するか分析してください。\n"
                 "2. 時系列的な変化や傾向があれば特定してください。\n"
                 "3. 複数の視点から問題を検討し、異なる文化的・社会的文脈での解釈の違いを考慮してください。\n"
-                "4. 結論の実用的な応用や影響について考察してください。\n"
+                "4. 結論の実用的な応用や影響について考察してください。\n\n"
             )
         
-        return prompt
+        # 検索結果は最後に置く（予算を超える場合は分析サービスが検索結果の部分だけを要約する）
+        return prompt + RESULTS_HEADING + combined_text
 
 async def main():
     parser = argparse.ArgumentParser(description='Chain-of-Thought Deep Research')
@@ -204,5 +250,4 @@ async def main():
     print(f"\n結果は以下のファイルに保存されました: {result['filepath']}")
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main()) 
\ No newline at end of file
@@ -1,11 +1,24 @@
 """Web crawler module using FirecrawllAPI"""
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 import json
 import asyncio
 
 import aiohttp
-from bs4 import BeautifulSoup
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from backend.services.crawl_checkpoint import CrawlCheckpointStore, checkpoint_interval, get_crawl_checkpoints
+from backend.services.crawl_frontier import CrawlFrontier
+from backend.services.fetch_scheduler import (
+    FetchScheduler,
+    RobotsDisallowedError,
+    ThrottledError,
+    get_fetch_scheduler,
+    raise_for_throttle,
+)
+from backend.services.html_parser import extract_page_metadata
+from backend.services.http_cache import HttpCache, get_http_cache
+from backend.services.http_client import run_blocking
+from backend.services.url_utils import canonicalize_url
 
 
 class CrawlerConfig(BaseModel):
@@ -16,15 +29,30 @@ class CrawlerConfig(BaseModel):
     timeout: int = 30
     headers: Optional[Dict[str, str]] = None
     max_concurrent_requests: int = 5
+    cache_ttl: int = 3600
+    max_links_per_page: int = 10
+    max_pages_per_depth: Optional[int] = None
+    max_pages: int = 50
+    # Firecrawl API自体への1秒あたりのリクエスト数（429/503を受けるとこの速度を落とす）
+    api_rate: float = 10.0
+    checkpoint_interval: int = Field(default_factory=checkpoint_interval)
 
 
 class WebCrawler:
     """Web crawler implementation using FirecrawllAPI"""
     
-    def __init__(self, config: CrawlerConfig):
+    def __init__(self, config: CrawlerConfig, scheduler: Optional[FetchScheduler] = None,
+                 cache: Optional[HttpCache] = None, checkpoints: Optional[CrawlCheckpointStore] = None):
         self.config = config
         self.session = None
         self.semaphore = asyncio.Semaphore(config.max_concurrent_requests)
+        # ホストごとの速度制限とrobots.txtはCrawlerServiceと共有のスケジューラーで管理
+        self.scheduler = scheduler or get_fetch_scheduler()
+        self.scheduler.set_host_rate(config.base_url, config.api_rate)
+        # 取得結果はCrawlerServiceと共有のHTTPキャッシュにcache_ttl秒保存する
+        self.cache = cache if cache is not None else get_http_cache()
+        # job_idを指定したクロールはフロンティアと取得済みページを定期的に保存する
+        self.checkpoints = checkpoints if checkpoints is not None else get_crawl_checkpoints()
         
     async def __aenter__(self):
         self.session = aiohttp.ClientSession(
@@ -41,7 +69,7 @@ class WebCrawler:
             
     async def _fetch_page(self, url: str) -> Dict:
         """
-        Fetch a single page using FirecrawllAPI
+        Fetch a single page using FirecrawllAPI, paced by the shared fetch scheduler
         
         Args:
             url: Target URL to fetch
@@ -49,79 +77,149 @@ class WebCrawler:
         Returns:
             Page data including content and metadata
         """
+        if self.cache is not None:
+            entry = await run_blocking(self.cache.get, self._cache_key(url))
+            if entry is not None and entry["fresh"]:
+                self.cache.record("hits")
+                return json.loads(entry["body"])
+            self.cache.record("misses")
+        # 429/503はFirecrawl APIの制限のため、対象ページのホストではなくAPIのホストの速度を落とす
+        return await self.scheduler.fetch(url, self._fetch_page_once, throttle_url=self.config.base_url)
+
+    def _cache_key(self, url: str) -> str:
+        return f"firecrawl:{canonicalize_url(url)}"
+
+    async def _fetch_page_once(self, url: str) -> Dict:
+        """Single fetch attempt; raises ThrottledError on 429/503 so the scheduler requeues it"""
         async with self.semaphore:
             endpoint = f"{self.config.base_url}/crawl"
-            params = {
-                "url": url,
-                "depth": self.config.max_depth
-            }
+            # リンクの追跡はクライアント側のフロンティアで行うため、APIには1ページだけを要求する
+            params = {"url": url}
             
             async with self.session.post(endpoint, json=params) as response:
+                raise_for_throttle(endpoint, response.status, response.headers)
                 response.raise_for_status()
                 data = await response.json()
                 
-                # HTMLコンテンツをパース
-                soup = BeautifulSoup(data["html"], "html.parser")
-                
-                # メタデータを抽出
-                title = soup.title.string if soup.title else ""
-                description = soup.find("meta", {"name": "description"})
-                description = description["content"] if description else ""
-                
-                # 本文を抽出（シンプルな実装）
-                text = " ".join([p.get_text() for p in soup.find_all("p")])
+                # HTMLコンテンツをパースしてメタデータと本文を抽出（高速パーサーを優先）
+                page = extract_page_metadata(data["html"])
                 
-                return {
+                result = {
                     "url": url,
-                    "title": title,
-                    "description": description,
-                    "text": text,
+                    "title": page["title"],
+                    "description": page["description"],
+                    "text": page["text"],
                     "metadata": data.get("metadata", {}),
                     "links": data.get("links", [])
                 }
+                if self.cache is not None and self.config.cache_ttl > 0:
+                    # Firecrawl APIはPOSTのため再検証できず、cache_ttlの間だけ再利用する
+                    await run_blocking(
+                        self.cache.store,
+                        self._cache_key(url),
+                        {"cache-control": f"max-age={self.config.cache_ttl}", "content-type": "application/json"},
+                        json.dumps(result, ensure_ascii=False).encode("utf-8")
+                    )
+                return result
     
-    async def crawl(self, url: str) -> List[Dict]:
+    async def crawl(self, url: str, job_id: Optional[str] = None) -> List[Dict]:
         """
         Crawl the specified URL using FirecrawllAPI
         
         Args:
             url: Target URL to crawl
+            job_id: Checkpoint id; a crawl restarted with the same id skips pages already fetched
             
         Returns:
             List of crawled data
         """
+        return [page async for page in self.crawl_stream(url, job_id)]
+
+    async def crawl_stream(self, url: str, job_id: Optional[str] = None) -> AsyncIterator[Dict]:
+        """
+        Crawl the specified URL and yield pages as soon as they are fetched
+        
+        Args:
+            url: Target URL to crawl
+            job_id: Checkpoint id; a crawl restarted with the same id skips pages already fetched
+            
+        Yields:
+            Crawled page data
+        """
         if not self.session:
             async with self:
-                return await self._crawl(url)
-        return await self._crawl(url)
+                async for page in self._crawl(url, job_id):
+                    yield page
+        else:
+            async for page in self._crawl(url, job_id):
+                yield page
         
-    async def _crawl(self, url: str) -> List[Dict]:
-        """Internal crawl implementation"""
+    async def _crawl(self, url: str, job_id: Optional[str] = None) -> AsyncIterator[Dict]:
+        """Internal crawl implementation (best-first over a depth/score frontier)"""
+        frontier = CrawlFrontier(
+            max_depth=self.config.max_depth,
+            max_links_per_page=self.config.max_links_per_page,
+            max_pages_per_depth=self.config.max_pages_per_depth,
+            max_pages=self.config.max_pages,
+        )
+        checkpoint = None
+        if job_id and self.checkpoints is not None:
+            checkpoint = self.checkpoints.job(job_id, interval=self.config.checkpoint_interval)
+
+        if checkpoint is not None and checkpoint.resumed:
+            # 保存済みのフロンティアから再開し、取得済みのページは再取得せずに返す
+            frontier.restore(checkpoint.state)
+            for page in checkpoint.pages.values():
+                yield page
+        else:
+            try:
+                # 開始ページの取得に失敗した場合はエラーを返す
+                page_data = await self._fetch_page(url)
+            except (aiohttp.ClientError, ThrottledError, RobotsDisallowedError) as e:
+                # エラーハンドリング
+                yield {
+                    "url": url,
+                    "error": str(e),
+                    "text": "",
+                    "metadata": {}
+                }
+                return
+            # 開始ページは取得済みとして記録する（訪問済み・取得数に含める）
+            frontier.add(url, depth=1)
+            frontier.pop()
+            frontier.add_links(page_data.get("links", []), parent=url, depth=2)
+            if checkpoint is not None:
+                checkpoint.add_page(url, page_data)
+                checkpoint.flush(frontier.snapshot())
+            yield page_data
+
+        # 同時実行数はセマフォと同じ数に抑え、取得できたページから順に返す
+        pending: Dict[asyncio.Task, tuple] = {}
         try:
-            # 単一ページのクロール
-            page_data = await self._fetch_page(url)
-            results = [page_data]
-            
-            # 設定された深さまでリンクを追跡
-            if self.config.max_depth > 1:
-                tasks = []
-                for link in page_data["links"][:10]:  # 最大10個のリンクまで
-                    if link.startswith(("http://", "https://")):
-                        tasks.append(self._fetch_page(link))
-                
-                if tasks:
-                    additional_pages = await asyncio.gather(*tasks, return_exceptions=True)
-                    for page in additional_pages:
-                        if isinstance(page, Dict):
-                            results.append(page)
-            
-            return results
-            
-        except aiohttp.ClientError as e:
-            # エラーハンドリング
-            return [{
-                "url": url,
-                "error": str(e),
-                "text": "",
-                "metadata": {}
-            }] 
\ No newline at end of file
+            while True:
+                while len(pending) < self.config.max_concurrent_requests:
+                    item = frontier.pop()
+                    if item is None:
+                        break
+                    pending[asyncio.ensure_future(self._fetch_page(item[0]))] = item
+                if not pending:
+                    break
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    link, depth = pending.pop(task)
+                    if task.exception() is not None:
+                        # 追跡先のページの失敗は無視して他のページを続ける
+                        continue
+                    page = task.result()
+                    frontier.add_links(page.get("links", []), parent=page["url"], depth=depth + 1)
+                    if checkpoint is not None:
+                        checkpoint.add_page(link, page)
+                        if checkpoint.due():
+                            checkpoint.flush(frontier.snapshot(pending.values()))
+                    yield page
+        finally:
+            for task in pending:
+                task.cancel()
+            if checkpoint is not None:
+                # 中断時は取得中だったURLを待ち行列へ戻して保存する
+                checkpoint.flush(frontier.snapshot(pending.values()))